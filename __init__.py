@@ -8,8 +8,10 @@
 from database.engine import init_db, get_session, async_session_maker
 from database.models import (
     Base, User, Tournament, TournamentParticipant, Match,
-    TournamentRecord, SystemSettings, AdminLog, TesterAccessLog,
-    TournamentStatus, TournamentFormat, MatchStatus
+    TournamentRecord, PlayoffSlot, StandingsSnapshot, ArchivedMatch, ArchivedParticipant,
+    SystemSettings, AdminLog, TesterAccessLog, BroadcastJob, NotificationOutbox,
+    TournamentStatus, TournamentFormat, MatchStatus, FixtureMode, SeedingMode, BroadcastStatus,
+    OutboxStatus
 )
 
 __all__ = [
@@ -22,12 +24,22 @@ __all__ = [
     'TournamentParticipant',
     'Match',
     'TournamentRecord',
+    'PlayoffSlot',
+    'StandingsSnapshot',
+    'ArchivedMatch',
+    'ArchivedParticipant',
     'SystemSettings',
     'AdminLog',
     'TesterAccessLog',
+    'BroadcastJob',
+    'NotificationOutbox',
     'TournamentStatus',
     'TournamentFormat',
     'MatchStatus',
+    'FixtureMode',
+    'SeedingMode',
+    'BroadcastStatus',
+    'OutboxStatus',
 ]
 
 
@@ -51,8 +63,9 @@ __all__ = ['user_kb', 'admin_kb']
 """T-League Bot - Middlewares package"""
 
 from middlewares.maintenance import MaintenanceMiddleware
+from middlewares.ratelimit import RateLimitMiddleware
 
-__all__ = ['MaintenanceMiddleware']
+__all__ = ['MaintenanceMiddleware', 'RateLimitMiddleware']
 
 
 # ==================== services/__init__.py ====================
@@ -63,6 +76,18 @@ from services.rating import RatingService
 from services.records import RecordsService
 from services.schedule import ScheduleService
 from services.notifications import NotificationService
+from services.playoff import PlayoffService
+from services.swiss import SwissService
+from services.groups import GroupStageService
+from services.standings import StandingsService
+from services.purge import PurgeService
+from services.summary import SummaryService
+from services.dashboard import DashboardService
+from services.seeding import SeedingService
+from services.archive import ArchiveService
+from services.broadcast import BroadcastService
+from services.outbox import OutboxService
+from services.reachability import ReachabilityService
 
 __all__ = [
     'TournamentService',
@@ -70,6 +95,18 @@ __all__ = [
     'RecordsService',
     'ScheduleService',
     'NotificationService',
+    'PlayoffService',
+    'SwissService',
+    'GroupStageService',
+    'StandingsService',
+    'PurgeService',
+    'SummaryService',
+    'DashboardService',
+    'SeedingService',
+    'ArchiveService',
+    'BroadcastService',
+    'OutboxService',
+    'ReachabilityService',
 ]
 
 
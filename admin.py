@@ -8,26 +8,35 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy import select, update
 from database.models import (
     User, Tournament, SystemSettings, AdminLog, 
-    TournamentFormat, TournamentStatus
+    TournamentFormat, TournamentStatus, SeedingMode
 )
 from database.engine import async_session_maker
 from keyboards.admin_kb import (
     get_admin_panel_keyboard, get_tournament_management_keyboard,
     get_tournament_admin_keyboard, get_tournament_format_keyboard,
     get_broadcast_confirm_keyboard, get_export_keyboard,
-    get_confirmation_keyboard, get_round_selection_for_deadline
+    get_confirmation_keyboard, get_round_selection_for_deadline,
+    get_seeding_mode_keyboard
 )
 from services.tournament import TournamentService
 from services.rating import RatingService
 from services.records import RecordsService
 from services.schedule import ScheduleService
 from services.notifications import NotificationService
+from services.purge import PurgeService
+from services.summary import SummaryService
+from services.archive import ArchiveService
+from services.dashboard import DashboardService
+from services.broadcast import BroadcastService
+from services.outbox import OutboxService
 from states.states import (
     TournamentCreation, AdminBroadcast, 
     DeadlineSettings, RatingRecalculation
 )
+from utils.helpers import parse_tournament_list_callback
 from config import config
 from datetime import datetime
+import asyncio
 import csv
 import io
 
@@ -162,6 +171,35 @@ async def tournament_format_selected(callback: CallbackQuery, state: FSMContext)
     
     tournament_format = format_map.get(format_name, TournamentFormat.ROUND_ROBIN)
     await state.update_data(format=tournament_format)
+    
+    # Швейцарская система сама составляет пары по очкам и рейтингу
+    if tournament_format != TournamentFormat.SWISS:
+        await state.set_state(TournamentCreation.seeding)
+        await callback.message.answer(
+            "🎯 Выберите посев участников при жеребьёвке:",
+            reply_markup=get_seeding_mode_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    await state.set_state(TournamentCreation.max_participants)
+    await callback.message.answer(
+        "👥 Введите максимальное количество участников\n"
+        "(или отправьте '-' для неограниченного):"
+    )
+    await callback.answer()
+
+@router.callback_query(TournamentCreation.seeding, F.data.startswith("seeding_"))
+async def tournament_seeding_selected(callback: CallbackQuery, state: FSMContext):
+    """Выбор режима посева"""
+    mode_map = {
+        "rating": SeedingMode.RATING,
+        "previous": SeedingMode.PREVIOUS,
+        "random": SeedingMode.RANDOM
+    }
+    
+    seeding_mode = mode_map.get(callback.data.split("_", 1)[1], SeedingMode.RATING)
+    await state.update_data(seeding_mode=seeding_mode)
     await state.set_state(TournamentCreation.max_participants)
     
     await callback.message.answer(
@@ -194,7 +232,8 @@ async def tournament_max_participants_entered(message: Message, state: FSMContex
             name=data['name'],
             description=data.get('description'),
             format=data['format'],
-            max_participants=max_participants
+            max_participants=max_participants,
+            seeding_mode=data.get('seeding_mode', SeedingMode.RATING)
         )
         
         # Логирование
@@ -204,6 +243,12 @@ async def tournament_max_participants_entered(message: Message, state: FSMContex
             f"Турнир: {tournament.name} (ID: {tournament.id})"
         )
     
+    seeding_names = {
+        SeedingMode.RATING: "По рейтингу",
+        SeedingMode.PREVIOUS: "По месту в прошлом турнире",
+        SeedingMode.RANDOM: "Случайный"
+    }
+    
     format_names = {
         TournamentFormat.ROUND_ROBIN: "Круговой",
         TournamentFormat.PLAYOFF: "Плей-офф",
@@ -215,6 +260,7 @@ async def tournament_max_participants_entered(message: Message, state: FSMContex
         f"✅ <b>Турнир создан!</b>\n\n"
         f"🏆 Название: {tournament.name}\n"
         f"📊 Формат: {format_names.get(tournament.format)}\n"
+        f"🎯 Посев: {seeding_names.get(tournament.seeding_mode)}\n"
         f"👥 Макс. участников: {max_participants or 'Не ограничено'}\n"
         f"🔒 Регистрация: Закрыта (откройте в управлении)\n\n"
         f"ID турнира: {tournament.id}",
@@ -226,17 +272,27 @@ async def tournament_max_participants_entered(message: Message, state: FSMContex
 # ================== УПРАВЛЕНИЕ ТУРНИРАМИ ==================
 
 @router.callback_query(F.data == "admin_manage_tournaments")
+@router.callback_query(F.data.regexp(r"^admin_tournaments_[a-z]+(_[np]\d+)?$"))
 async def show_tournament_management(callback: CallbackQuery):
-    """Управление турнирами"""
+    """Управление турнирами (постранично, с вкладками статусов)"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
         return
     
+    status_filter, after_id, before_id = parse_tournament_list_callback(
+        callback.data, "admin_tournaments"
+    )
+    status = None if status_filter == "all" else TournamentStatus(status_filter)
+    
     async with async_session_maker() as session:
-        tournaments = await TournamentService.get_all_tournaments(session)
+        tournaments, has_prev, has_next = await TournamentService.get_tournaments_page(
+            session, status, after_id, before_id
+        )
     
     text = "⚙️ <b>Управление турнирами</b>\n\nВыберите турнир:"
-    keyboard = get_tournament_management_keyboard(tournaments)
+    keyboard = get_tournament_management_keyboard(
+        tournaments, status_filter, has_prev, has_next
+    )
     
     await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
     await callback.answer()
@@ -251,14 +307,12 @@ async def show_tournament_admin(callback: CallbackQuery):
     tournament_id = int(callback.data.split("_")[2])
     
     async with async_session_maker() as session:
-        tournament = await TournamentService.get_tournament(session, tournament_id)
+        tournament = await SummaryService.get_summary(session, tournament_id)
         
         if not tournament:
             await callback.answer("Турнир не найден", show_alert=True)
             return
         
-        participants = await TournamentService.get_participants(session, tournament_id)
-        
         reg_status = "Открыта" if tournament.registration_open else "Закрыта"
         draw_status = "Проведена" if tournament.draw_completed else "Не проведена"
         
@@ -267,11 +321,13 @@ async def show_tournament_admin(callback: CallbackQuery):
             f"📊 Статус: {tournament.status}\n"
             f"🔓 Регистрация: {reg_status}\n"
             f"🎲 Жеребьёвка: {draw_status}\n"
-            f"👥 Участников: {len(participants)}\n"
+            f"👥 Участников: {tournament.participants_count}\n"
         )
         
         if tournament.total_rounds > 0:
             text += f"🔄 Всего туров: {tournament.total_rounds}\n"
+        if tournament.matches_total:
+            text += f"⚽ Сыграно матчей: {tournament.matches_confirmed} из {tournament.matches_total}\n"
         
         text += "\nВыберите действие:"
         
@@ -407,13 +463,18 @@ async def finish_tournament_admin(callback: CallbackQuery, bot):
             # Расчёт рекордов
             await RecordsService.calculate_tournament_records(session, tournament_id)
             
+            # Перенос матчей и участников в архив
+            await ArchiveService.archive_tournament(session, tournament_id)
+            
             await log_admin_action(
                 callback.from_user.id,
                 "Завершение турнира",
                 f"Турнир ID: {tournament_id}"
             )
             await callback.answer("✅ Турнир завершён! Рекорды рассчитаны.", show_alert=True)
-            await show_tournament_admin(callback)
+            await show_tournament_admin(
+                callback.model_copy(update={"data": f"admin_tournament_{tournament_id}"})
+            )
         else:
             await callback.answer("❌ Не удалось завершить турнир.", show_alert=True)
             """
@@ -482,7 +543,7 @@ async def select_round_for_deadline(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(DeadlineSettings.enter_time)
-async def set_deadline_time(message: Message, state: FSMContext, bot):
+async def set_deadline_time(message: Message, state: FSMContext):
     """Установка времени дедлайна"""
     try:
         # Парсинг времени МСК
@@ -508,28 +569,18 @@ async def set_deadline_time(message: Message, state: FSMContext, bot):
             )
             
             if count > 0:
-                # Получение участников тура для уведомления
-                matches_data = await ScheduleService.get_tournament_matches(
+                # Участники тура для уведомления
+                player_ids = await ScheduleService.get_round_player_ids(
                     session, tournament_id, round_number
                 )
+                DashboardService.invalidate(*player_ids)
                 
-                # Отправка уведомлений
-                notified = set()
-                for match, player1, player2 in matches_data:
-                    for player in [player1, player2]:
-                        if player.id not in notified:
-                            try:
-                                await bot.send_message(
-                                    player.id,
-                                    f"⏰ <b>Установлен дедлайн!</b>\n\n"
-                                    f"Тур {round_number}\n"
-                                    f"📅 До: {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК\n\n"
-                                    f"Не забудьте сыграть матч и внести результат!",
-                                    parse_mode="HTML"
-                                )
-                                notified.add(player.id)
-                            except:
-                                pass
+                # Уведомления - в очередь сводок (объединятся с другими несрочными)
+                await NotificationService.notify_deadline_set(
+                    session, player_ids, tournament_id, round_number, deadline_msk
+                )
+                await session.commit()
+                OutboxService.wake()
                 
                 await log_admin_action(
                     message.from_user.id,
@@ -542,7 +593,7 @@ async def set_deadline_time(message: Message, state: FSMContext, bot):
                     f"🔄 Тур: {round_number}\n"
                     f"⏰ До: {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК\n"
                     f"⚔️ Матчей: {count}\n"
-                    f"📢 Уведомлено участников: {len(notified)}",
+                    f"📢 Уведомлений в очереди: {len(player_ids)}",
                     parse_mode="HTML"
                 )
             else:
@@ -603,22 +654,19 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext, bot):
     
     await callback.message.edit_text("📢 Рассылка началась...", parse_mode="HTML")
     
-    async with async_session_maker() as session:
-        success, fail = await NotificationService.broadcast_message(
-            bot, session, message_text
-        )
+    # Рассылка идёт в фоне и обновляет это сообщение прогрессом
+    job = await BroadcastService.create_job(
+        message_text,
+        callback.from_user.id,
+        progress_chat_id=callback.message.chat.id,
+        progress_message_id=callback.message.message_id
+    )
+    BroadcastService.start_job(bot, job.id)
     
     await log_admin_action(
         callback.from_user.id,
         "Массовая рассылка",
-        f"Успешно: {success}, Неудачно: {fail}"
-    )
-    
-    await callback.message.edit_text(
-        f"✅ <b>Рассылка завершена!</b>\n\n"
-        f"Отправлено: {success}\n"
-        f"Не отправлено: {fail}",
-        parse_mode="HTML"
+        f"Задание #{job.id}, получателей: {job.total}"
     )
     
     await state.clear()
@@ -693,7 +741,10 @@ async def recalculate_all_records(callback: CallbackQuery):
     
     async with async_session_maker() as session:
         result = await session.execute(
-            select(Tournament).where(Tournament.status == TournamentStatus.FINISHED)
+            select(Tournament).where(
+                Tournament.status == TournamentStatus.FINISHED,
+                Tournament.deleted_at.is_(None)
+            )
         )
         tournaments = result.scalars().all()
         
@@ -845,4 +896,99 @@ async def show_admin_participants(callback: CallbackQuery):
         from keyboards.user_kb import get_back_button
         keyboard = get_back_button(f"admin_tournament_{tournament_id}")
         await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-        await callback.answer()
\ No newline at end of file
+        await callback.answer()
+
+
+# ================== УДАЛЕНИЕ ТУРНИРА ==================
+
+@router.callback_query(F.data.startswith("admin_delete_tournament_"))
+async def start_tournament_deletion(callback: CallbackQuery):
+    """Подтверждение удаления турнира"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
+        return
+    
+    tournament_id = int(callback.data.split("_")[3])
+    
+    async with async_session_maker() as session:
+        tournament = await TournamentService.get_tournament(session, tournament_id)
+    
+    if not tournament:
+        await callback.answer("Турнир не найден", show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        f"🗑️ <b>Удаление турнира «{tournament.name}»</b>\n\n"
+        "⚠️ Будут удалены все матчи, участники и рекорды турнира.\n\n"
+        "Продолжить?",
+        reply_markup=get_confirmation_keyboard("delete_tournament", tournament_id),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("confirm_delete_tournament_"))
+async def confirm_tournament_deletion(callback: CallbackQuery):
+    """
+    Удаление турнира: турнир сразу скрывается, данные удаляются в фоне
+    порциями, прогресс обновляется в этом же сообщении.
+    """
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав администратора.", show_alert=True)
+        return
+    
+    tournament_id = int(callback.data.split("_")[3])
+    
+    from keyboards.user_kb import get_back_button
+    
+    async with async_session_maker() as session:
+        success = await TournamentService.delete_tournament(session, tournament_id)
+    
+    if not success:
+        await callback.answer("❌ Турнир не найден или уже удаляется.", show_alert=True)
+        return
+    
+    await log_admin_action(
+        callback.from_user.id,
+        "Удаление турнира",
+        f"Турнир ID: {tournament_id}"
+    )
+    
+    message = callback.message
+    last_edit = [0.0]
+    
+    async def report(done: int, total: int):
+        # Не чаще раза в пару секунд - лимит Telegram на редактирование
+        now = asyncio.get_running_loop().time()
+        if done < total and now - last_edit[0] < 2:
+            return
+        last_edit[0] = now
+        
+        if done >= total:
+            text = f"✅ <b>Турнир удалён</b>\n\nУдалено записей: {done}"
+        else:
+            text = f"🗑️ <b>Удаление турнира...</b>\n\nУдалено записей: {done} из {total}"
+        try:
+            await message.edit_text(
+                text,
+                reply_markup=get_back_button("admin_manage_tournaments"),
+                parse_mode="HTML"
+            )
+        except Exception:
+            pass
+    
+    await message.edit_text(
+        "🗑️ <b>Турнир скрыт</b>\n\nДанные удаляются в фоне...",
+        reply_markup=get_back_button("admin_manage_tournaments"),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+    
+    PurgeService.start_purge(tournament_id, report)
+
+@router.callback_query(F.data.startswith("cancel_delete_tournament_"))
+async def cancel_tournament_deletion(callback: CallbackQuery):
+    """Отмена удаления турнира"""
+    tournament_id = int(callback.data.split("_")[3])
+    await show_tournament_admin(
+        callback.model_copy(update={"data": f"admin_tournament_{tournament_id}"})
+    )
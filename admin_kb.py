@@ -3,6 +3,7 @@ T-League Bot - Клавиатуры администратора
 """
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from keyboards.user_kb import add_tournament_list_navigation
 
 def get_admin_main_menu() -> InlineKeyboardMarkup:
     """Главное меню администратора (inline)"""
@@ -36,8 +37,13 @@ def get_admin_panel_keyboard(maintenance_mode: bool = False) -> InlineKeyboardMa
     kb.adjust(1)
     return kb.as_markup()
 
-def get_tournament_management_keyboard(tournaments: list) -> InlineKeyboardMarkup:
-    """Управление турнирами"""
+def get_tournament_management_keyboard(
+    tournaments: list,
+    status_filter: str = "all",
+    has_prev: bool = False,
+    has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """Управление турнирами (одна страница)"""
     kb = InlineKeyboardBuilder()
     
     for tournament in tournaments:
@@ -52,8 +58,15 @@ def get_tournament_management_keyboard(tournaments: list) -> InlineKeyboardMarku
             callback_data=f"admin_tournament_{tournament.id}"
         )
     
+    if not tournaments:
+        kb.button(text="Турниров нет", callback_data="no_action")
+    
+    sizes = add_tournament_list_navigation(
+        kb, "admin_tournaments", status_filter, tournaments, has_prev, has_next
+    )
+    
     kb.button(text="◀️ К админ-панели", callback_data="admin_panel")
-    kb.adjust(1)
+    kb.adjust(*([1] * max(len(tournaments), 1)), *sizes, 1)
     return kb.as_markup()
 
 def get_tournament_admin_keyboard(tournament_id: int, status: str, registration_open: bool, draw_completed: bool) -> InlineKeyboardMarkup:
@@ -94,6 +107,16 @@ def get_tournament_format_keyboard() -> InlineKeyboardMarkup:
     kb.adjust(1)
     return kb.as_markup()
 
+def get_seeding_mode_keyboard() -> InlineKeyboardMarkup:
+    """Выбор режима посева"""
+    kb = InlineKeyboardBuilder()
+    kb.button(text="📈 По рейтингу", callback_data="seeding_rating")
+    kb.button(text="🏅 По месту в прошлом турнире", callback_data="seeding_previous")
+    kb.button(text="🎲 Случайный", callback_data="seeding_random")
+    kb.button(text="❌ Отмена", callback_data="admin_panel")
+    kb.adjust(1)
+    return kb.as_markup()
+
 def get_broadcast_confirm_keyboard() -> InlineKeyboardMarkup:
     """Подтверждение рассылки"""
     kb = InlineKeyboardBuilder()
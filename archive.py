@@ -0,0 +1,248 @@
+"""
+T-League Bot - Архив завершённых турниров
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, update, func
+from database.engine import async_session_maker
+from database.models import (
+    Tournament, TournamentParticipant, Match, ArchivedMatch, ArchivedParticipant,
+    User, PlayoffSlot, MatchStatus, TournamentStatus, TournamentFormat
+)
+from services.groups import GroupStageService
+from services.playoff import PlayoffService, FINISHED_STATUSES
+from datetime import datetime
+from typing import List, Dict, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Колонки матча, которые переносятся в архив
+ARCHIVED_MATCH_COLUMNS = (
+    "id", "tournament_id", "round_number", "player1_id", "player2_id",
+    "player1_score", "player2_score", "player1_tiebreak", "player2_tiebreak",
+    "bracket_slot", "status", "played_at", "confirmed_at", "created_at"
+)
+
+# Турниры, уже перенесённые в архив (для выбора таблиц без лишнего запроса)
+_archived_ids: set = set()
+
+
+class ArchiveService:
+    """
+    Сервис архива.
+    После завершения турнира его матчи и участники переносятся из рабочих таблиц
+    (их сканируют дедлайны, просрочки и "мои матчи") в компактные архивные таблицы.
+    Итоговая таблица сохраняется с местами, поэтому просмотр истории - один запрос.
+    Размер рабочих таблиц зависит только от идущих турниров.
+    """
+
+    @staticmethod
+    async def is_archived(session: AsyncSession, tournament_id: int) -> bool:
+        """Перенесён ли турнир в архив"""
+        if tournament_id in _archived_ids:
+            return True
+        archived_at = await session.scalar(
+            select(Tournament.archived_at).where(Tournament.id == tournament_id)
+        )
+        if archived_at is not None:
+            _archived_ids.add(tournament_id)
+        return archived_at is not None
+
+    @staticmethod
+    async def get_models(session: AsyncSession, tournament_id: int) -> Tuple[type, type]:
+        """(модель матчей, модель участников) - рабочие или архивные таблицы турнира"""
+        if await ArchiveService.is_archived(session, tournament_id):
+            return ArchivedMatch, ArchivedParticipant
+        return Match, TournamentParticipant
+
+    @staticmethod
+    async def _final_order(session: AsyncSession, tournament: Tournament) -> List[TournamentParticipant]:
+        """
+        Участники в порядке итоговых мест.
+        Плей-офф и "группы + плей-офф" - по сетке: выше тот, кто прошёл дальше
+        (победитель - позиция тура total_rounds + 1). Выбывшие в одном туре сетки
+        и не попавшие в неё - по таблице (для групп - по месту в группе).
+        """
+        if tournament.format == TournamentFormat.GROUP_PLAYOFF and tournament.groups_count:
+            tables = await GroupStageService.get_group_tables(session, tournament.id)
+            # Места групп: все первые, затем все вторые и т.д. (внутри места - по очкам)
+            placed = [
+                (place, participant)
+                for rows in tables.values()
+                for place, (participant, _) in enumerate(rows)
+            ]
+            placed.sort(key=lambda item: (
+                item[0],
+                -item[1].points,
+                -(item[1].goals_for - item[1].goals_against),
+                -item[1].goals_for
+            ))
+            participants = [participant for _, participant in placed]
+        else:
+            from services.tournament import TournamentService
+            table = await TournamentService.get_tournament_table(session, tournament.id)
+            user_ids = [row.user_id for row, _ in table]
+
+            result = await session.execute(
+                select(TournamentParticipant).where(TournamentParticipant.tournament_id == tournament.id)
+            )
+            by_user = {p.user_id: p for p in result.scalars().all()}
+            participants = [by_user[uid] for uid in user_ids if uid in by_user]
+
+        if tournament.format in (TournamentFormat.PLAYOFF, TournamentFormat.GROUP_PLAYOFF):
+            reached = await ArchiveService._bracket_rounds(session, tournament.id)
+            # Сортировка устойчивая: при равном туре сохраняется порядок таблицы
+            participants.sort(key=lambda p: -reached.get(p.user_id, 0))
+        return participants
+
+    @staticmethod
+    async def _bracket_rounds(session: AsyncSession, tournament_id: int) -> Dict[int, int]:
+        """
+        Игрок -> последний тур сетки, до которого он дошёл: по позициям сетки
+        и по победам в её матчах (победитель финала - тур total_rounds + 1,
+        даже если позиция победителя не записана).
+        """
+        result = await session.execute(
+            select(PlayoffSlot.user_id, func.max(PlayoffSlot.round_number))
+            .where(PlayoffSlot.tournament_id == tournament_id)
+            .group_by(PlayoffSlot.user_id)
+        )
+        reached = dict(result.all())
+
+        result = await session.execute(
+            select(Match).where(
+                Match.tournament_id == tournament_id,
+                Match.bracket_slot.is_not(None),
+                Match.status.in_(FINISHED_STATUSES)
+            )
+        )
+        for match in result.scalars().all():
+            winner_id = PlayoffService.get_match_winner(match)
+            if winner_id is not None:
+                reached[winner_id] = max(reached.get(winner_id, 0), match.round_number + 1)
+        return reached
+
+    @staticmethod
+    async def archive_tournament(session: AsyncSession, tournament_id: int) -> bool:
+        """
+        Перенос завершённого турнира в архив одной транзакцией:
+        матчи - INSERT ... SELECT, участники - с итоговым местом, затем удаление из рабочих таблиц.
+        """
+        tournament = await session.get(Tournament, tournament_id)
+        if not tournament or tournament.status != TournamentStatus.FINISHED or tournament.archived_at:
+            return False
+
+        participants = await ArchiveService._final_order(session, tournament)
+
+        columns = [getattr(Match, name) for name in ARCHIVED_MATCH_COLUMNS]
+        await session.execute(
+            insert(ArchivedMatch).from_select(
+                list(ARCHIVED_MATCH_COLUMNS),
+                select(*columns).where(Match.tournament_id == tournament_id)
+            )
+        )
+        session.add_all([
+            ArchivedParticipant(
+                tournament_id=tournament_id,
+                user_id=participant.user_id,
+                position=position,
+                points=participant.points,
+                matches_played=participant.matches_played,
+                wins=participant.wins,
+                draws=participant.draws,
+                losses=participant.losses,
+                goals_for=participant.goals_for,
+                goals_against=participant.goals_against,
+                byes=participant.byes or 0,
+                group_number=participant.group_number,
+                registered_at=participant.registered_at
+            )
+            for position, participant in enumerate(participants, 1)
+        ])
+        await session.flush()
+
+        await session.execute(delete(Match).where(Match.tournament_id == tournament_id))
+        await session.execute(
+            delete(TournamentParticipant).where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        await session.execute(
+            update(Tournament)
+            .where(Tournament.id == tournament_id)
+            .values(archived_at=datetime.utcnow())
+        )
+        await session.commit()
+
+        _archived_ids.add(tournament_id)
+        return True
+
+    @staticmethod
+    async def archive_pending(pause: float = 0.1) -> int:
+        """Перенос в архив турниров, завершённых до появления архива (каждый - своей транзакцией)"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Tournament.id).where(
+                    Tournament.status == TournamentStatus.FINISHED,
+                    Tournament.archived_at.is_(None),
+                    Tournament.deleted_at.is_(None)
+                )
+            )
+            tournament_ids = [tournament_id for (tournament_id,) in result.all()]
+
+        archived = 0
+        for tournament_id in tournament_ids:
+            try:
+                async with async_session_maker() as session:
+                    if await ArchiveService.archive_tournament(session, tournament_id):
+                        archived += 1
+            except Exception as e:
+                logger.error(f"Failed to archive tournament {tournament_id}: {e}")
+            await asyncio.sleep(pause)
+        return archived
+
+    # ================== ЧТЕНИЕ АРХИВА ==================
+
+    @staticmethod
+    async def get_final_table(session: AsyncSession, tournament_id: int) -> List[tuple]:
+        """Итоговая таблица архивного турнира: [(участник, пользователь), ...] одним запросом"""
+        result = await session.execute(
+            select(ArchivedParticipant, User)
+            .join(User, ArchivedParticipant.user_id == User.id)
+            .where(ArchivedParticipant.tournament_id == tournament_id)
+            .order_by(ArchivedParticipant.position)
+        )
+        return result.all()
+
+    @staticmethod
+    async def get_group_tables(session: AsyncSession, tournament_id: int) -> Dict[int, List[tuple]]:
+        """Итоговые таблицы групп архивного турнира (места - по сетке, поэтому порядок как у живых групп)"""
+        tables: Dict[int, List[tuple]] = {}
+        for participant, user in await ArchiveService.get_final_table(session, tournament_id):
+            tables.setdefault(participant.group_number, []).append((participant, user))
+        for rows in tables.values():
+            rows.sort(key=lambda row: (
+                -row[0].points,
+                -(row[0].goals_for - row[0].goals_against),
+                -row[0].goals_for
+            ))
+        return tables
+
+    @staticmethod
+    async def get_user_history(
+        session: AsyncSession,
+        user_id: int,
+        limit: int
+    ) -> List[ArchivedMatch]:
+        """Последние подтверждённые матчи игрока из архива (по индексам игрока)"""
+        matches = []
+        for column in (ArchivedMatch.player1_id, ArchivedMatch.player2_id):
+            result = await session.execute(
+                select(ArchivedMatch)
+                .where(column == user_id, ArchivedMatch.status == MatchStatus.CONFIRMED)
+                .order_by(ArchivedMatch.confirmed_at.desc())
+                .limit(limit)
+            )
+            matches.extend(result.scalars().all())
+
+        matches.sort(key=lambda m: m.confirmed_at or datetime.min, reverse=True)
+        return matches[:limit]
@@ -0,0 +1,159 @@
+"""
+T-League Bot - Проверка итоговых мест турниров с сеткой в архиве
+Запуск: python bench_archive.py [участников]
+На временной SQLite-базе проводит до конца турнир плей-офф и турнир
+"группы + плей-офф" со случайными результатами (ничьи решаются серией
+пенальти), завершает и переносит их в архив. Проверяет, что первое место -
+победитель сетки, места идут по последнему достигнутому туру сетки (не
+попавшие в сетку - ниже всех), таблицы групп в архиве совпадают с живыми,
+а посев "по предыдущему турниру" повторяет архивные места.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from typing import Dict, List
+
+from config import config
+from bench_expiry import create_tournament
+
+
+async def play_out(tournament_id: int, rng: random.Random) -> int:
+    """Случайные результаты всех матчей, пока турнир создаёт новые туры; возвращает число матчей"""
+    from sqlalchemy import select
+    from database.engine import async_session_maker
+    from database.models import Match, MatchStatus
+    from services.tournament import TournamentService
+
+    played = 0
+    while True:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Match).where(
+                    Match.tournament_id == tournament_id,
+                    Match.status == MatchStatus.SCHEDULED
+                ).order_by(Match.round_number, Match.id)
+            )
+            matches = result.scalars().all()
+            if not matches:
+                return played
+            for match in matches:
+                match.player1_score, match.player2_score = rng.randint(0, 3), rng.randint(0, 3)
+                if match.bracket_slot is not None and match.player1_score == match.player2_score:
+                    match.player1_tiebreak, match.player2_tiebreak = rng.choice([(5, 4), (3, 4)])
+                match.status = MatchStatus.CONFIRMED
+                for user_id, goals_for, goals_against in (
+                    (match.player1_id, match.player1_score, match.player2_score),
+                    (match.player2_id, match.player2_score, match.player1_score),
+                ):
+                    outcome = "win" if goals_for > goals_against else "loss" if goals_for < goals_against else "draw"
+                    await TournamentService.update_participant_stats(
+                        session, tournament_id, user_id, outcome, goals_for, goals_against
+                    )
+                await TournamentService.on_match_finished(session, match)
+                played += 1
+            await session.commit()
+
+
+async def run_check(players: int = 12) -> bool:
+    """Места в архиве по сетке и посев по ним"""
+    # База - временная: настраивается до импорта движка
+    config.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_archive.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from sqlalchemy import select
+    from database.engine import init_db, async_session_maker
+    from database.models import (
+        ArchivedParticipant, PlayoffSlot, Tournament, TournamentFormat, TournamentParticipant, SeedingMode
+    )
+    from services.archive import ArchiveService
+    from services.groups import GroupStageService
+    from services.seeding import SeedingService
+    from services.tournament import TournamentService
+
+    await init_db()
+    rng = random.Random(1)
+    ok = True
+    first_user_id = 1
+    last_positions: List[int] = []
+
+    # Оба турнира проводятся до переноса в архив
+    formats = (TournamentFormat.PLAYOFF, TournamentFormat.GROUP_PLAYOFF)
+    tournaments = []
+    for number, format in enumerate(formats, 1):
+        tournament_id = await create_tournament(number, format, players, first_user_id)
+        first_user_id += players
+        tournaments.append((format, tournament_id, await play_out(tournament_id, rng)))
+
+    for format, tournament_id, played in tournaments:
+        async with async_session_maker() as session:
+            live_groups: Dict[int, List[int]] = {}
+            if format == TournamentFormat.GROUP_PLAYOFF:
+                tables = await GroupStageService.get_group_tables(session, tournament_id)
+                live_groups = {group: [p.user_id for p, _ in rows] for group, rows in tables.items()}
+            await TournamentService.finish_tournament(session, tournament_id)
+        async with async_session_maker() as session:
+            archived = await ArchiveService.archive_tournament(session, tournament_id)
+
+        async with async_session_maker() as session:
+            tournament = await session.get(Tournament, tournament_id)
+            champion = await session.scalar(
+                select(PlayoffSlot.user_id).where(
+                    PlayoffSlot.tournament_id == tournament_id,
+                    PlayoffSlot.round_number == tournament.total_rounds + 1
+                )
+            )
+            result = await session.execute(
+                select(PlayoffSlot.user_id, PlayoffSlot.round_number)
+                .where(PlayoffSlot.tournament_id == tournament_id)
+            )
+            reached: Dict[int, int] = {}
+            for user_id, round_number in result.all():
+                reached[user_id] = max(reached.get(user_id, 0), round_number)
+            result = await session.execute(
+                select(ArchivedParticipant.user_id)
+                .where(ArchivedParticipant.tournament_id == tournament_id)
+                .order_by(ArchivedParticipant.position)
+            )
+            positions = [user_id for (user_id,) in result.all()]
+            archived_groups = {
+                group: [p.user_id for p, _ in rows]
+                for group, rows in (await ArchiveService.get_group_tables(session, tournament_id)).items()
+            } if live_groups else {}
+
+        rounds = [reached.get(user_id, 0) for user_id in positions]
+        by_bracket = all(a >= b for a, b in zip(rounds, rounds[1:]))
+        groups_ok = archived_groups == live_groups
+        tournament_ok = archived and positions[:1] == [champion] and by_bracket and groups_ok
+        ok = ok and tournament_ok
+        last_positions = positions
+        print(f"{format.value}: участников {players}, матчей {played}, в архиве: {archived}")
+        print(f"  первое место - победитель сетки: {positions[:1] == [champion]}, "
+              f"места по туру сетки: {by_bracket}" + (f", таблицы групп совпадают: {groups_ok}" if live_groups else ""))
+
+    # Следующий турнир тех же игроков с посевом по предыдущему
+    async with async_session_maker() as session:
+        tournament = await TournamentService.create_tournament(session, "Next", "", TournamentFormat.PLAYOFF)
+        tournament.seeding_mode = SeedingMode.PREVIOUS
+        session.add_all([
+            TournamentParticipant(tournament_id=tournament.id, user_id=user_id)
+            for user_id in last_positions
+        ])
+        await session.commit()
+        seeded = await SeedingService.rank_participants(session, tournament)
+
+    seeding_ok = seeded == last_positions
+    ok = ok and seeding_ok
+    print(f"Посев по предыдущему турниру повторяет архивные места: {seeding_ok}")
+    print("✅ Места в архиве - по сетке" if ok else "❌ Места в архиве не совпадают с сеткой")
+    return ok
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    ok = asyncio.run(run_check(size))
+    sys.exit(0 if ok else 1)
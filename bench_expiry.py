@@ -0,0 +1,170 @@
+"""
+T-League Bot - Проверка технических результатов по истечении дедлайнов
+Запуск: python bench_expiry.py [турниров_плей-офф] [участников]
+На временной SQLite-базе создаёт турниры плей-офф и круговой турнир,
+переносит дедлайны открытых матчей в прошлое и запускает
+ScheduleService.check_expired_matches тур за туром в обоих режимах
+TECHNICAL_LOSS_MODE. Проверяет, что в плей-офф у каждого просроченного
+матча есть победитель (верхняя позиция пары), сетка доходит до финала и
+у турнира появляется победитель, а в круговом турнире режим "double"
+по-прежнему даёт обоюдное поражение 0:0. Выводит время и число SQL-запросов
+проверок (продвижение идёт один раз на тур, а не на каждый матч).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from config import config
+
+
+async def create_tournament(number: int, format, players: int, first_user_id: int) -> int:
+    """Турнир с жеребьёвкой и запуском; возвращает id"""
+    from database.engine import async_session_maker
+    from database.models import User, TournamentParticipant
+    from services.tournament import TournamentService
+
+    async with async_session_maker() as session:
+        user_ids = list(range(first_user_id, first_user_id + players))
+        session.add_all([
+            User(id=user_id, username=f"user{user_id}", full_name=f"User {user_id}", rating=1000 - user_id)
+            for user_id in user_ids
+        ])
+        tournament = await TournamentService.create_tournament(session, f"Expiry {number}", "", format)
+        session.add_all([
+            TournamentParticipant(tournament_id=tournament.id, user_id=user_id)
+            for user_id in user_ids
+        ])
+        tournament.participants_count = players
+        await session.commit()
+        await TournamentService.conduct_draw(session, tournament.id)
+        await TournamentService.start_tournament(session, tournament.id)
+        return tournament.id
+
+
+async def expire_open_matches() -> tuple:
+    """Дедлайн всех открытых матчей - в прошлом; одна проверка; (матчей, секунд, SQL-запросов)"""
+    from sqlalchemy import event, update
+    from database.engine import engine, async_session_maker
+    from database.models import Match, MatchStatus
+    from services.schedule import ScheduleService
+
+    async with async_session_maker() as session:
+        await session.execute(
+            update(Match)
+            .where(Match.status == MatchStatus.SCHEDULED)
+            .values(deadline=datetime.utcnow() - timedelta(minutes=1), deadline_set=True)
+        )
+        await session.commit()
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            expired = await ScheduleService.check_expired_matches(session)
+            return len(expired), time.perf_counter() - started, statements[0]
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+
+async def run_check(playoffs: int = 50, players: int = 16) -> bool:
+    """Сетки плей-офф доходят до победителя в обоих режимах технического результата"""
+    # База - временная: настраивается до импорта движка
+    config.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_expiry.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from sqlalchemy import select
+    from database.engine import init_db, async_session_maker
+    from database.models import Match, MatchStatus, PlayoffSlot, Tournament, TournamentFormat
+    from services.playoff import PlayoffService
+
+    await init_db()
+    ok = True
+    first_user_id = 1
+    number = 0
+
+    for mode in ("double", "non_reporter"):
+        config.TECHNICAL_LOSS_MODE = mode
+        tournament_ids: List[int] = []
+        for _ in range(playoffs):
+            number += 1
+            tournament_ids.append(
+                await create_tournament(number, TournamentFormat.PLAYOFF, players, first_user_id)
+            )
+            first_user_id += players
+        number += 1
+        round_robin_id = await create_tournament(number, TournamentFormat.ROUND_ROBIN, 4, first_user_id)
+        first_user_id += 4
+
+        sweeps = []
+        for _ in range(PlayoffService.get_bracket_size(players).bit_length() + 1):
+            expired, elapsed, statements = await expire_open_matches()
+            if not expired:
+                break
+            sweeps.append((expired, elapsed, statements))
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Match).where(Match.tournament_id.in_(tournament_ids))
+            )
+            knockout = result.scalars().all()
+            no_winner = [m.id for m in knockout if PlayoffService.get_match_winner(m) is None]
+            upper_wins = all(
+                PlayoffService.get_match_winner(m) == m.player1_id for m in knockout
+            )
+
+            result = await session.execute(
+                select(Tournament.id, Tournament.total_rounds).where(Tournament.id.in_(tournament_ids))
+            )
+            final_rounds = dict(result.all())
+            result = await session.execute(
+                select(PlayoffSlot.tournament_id, PlayoffSlot.round_number)
+                .where(PlayoffSlot.tournament_id.in_(tournament_ids), PlayoffSlot.position == 0)
+            )
+            champions = {
+                tournament_id for tournament_id, round_number in result.all()
+                if round_number == final_rounds[tournament_id] + 1
+            }
+
+            result = await session.execute(
+                select(Match.player1_score, Match.player2_score).where(
+                    Match.tournament_id == round_robin_id,
+                    Match.status == MatchStatus.TECHNICAL,
+                    Match.round_number == 1
+                )
+            )
+            round_robin_scores = set(result.all())
+
+        mode_ok = (
+            not no_winner
+            and upper_wins
+            and len(champions) == len(tournament_ids)
+            and round_robin_scores == {(0, 0)}
+        )
+        ok = ok and mode_ok
+        print(f"Режим {mode}: турниров плей-офф {playoffs} по {players}, матчей сетки {len(knockout)}")
+        for sweep, (expired, elapsed, statements) in enumerate(sweeps, 1):
+            print(f"  проверка {sweep}: просрочено {expired}, {elapsed * 1000:.0f} мс, SQL-запросов {statements}")
+        print(f"  без победителя: {len(no_winner)}, побеждает верхняя позиция: {upper_wins}, "
+              f"с победителем турнира: {len(champions)}/{len(tournament_ids)}")
+        print(f"  круговой турнир, тур 1: {sorted(round_robin_scores)}")
+
+    print("✅ Сетки доходят до победителя" if ok else "❌ Сетка остановилась после технического результата")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    ok = asyncio.run(run_check(count, size))
+    sys.exit(0 if ok else 1)
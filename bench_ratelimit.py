@@ -0,0 +1,96 @@
+"""
+T-League Bot - Нагрузочная проверка ограничения исходящих запросов
+Запуск: python bench_ratelimit.py [получателей_рассылки] [интерактивных_ответов] [доля_429] [seed]
+Поднимает локальный поддельный Bot API (fake_bot_api с лимитами Telegram:
+общая корзина и корзины чатов, при превышении - 429 с retry_after; кроме
+того, доля запросов получает случайный 429 для проверки повторов; 429
+воспроизводимы при одном seed) и
+отправляет через Bot с RateLimitMiddleware массовую рассылку, интерактивные
+ответы во время рассылки и серию сообщений в один чат.
+Проверяет, что ни одно сообщение не потеряно, и сравнивает задержки.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from config import config
+from fake_bot_api import FakeBotApi
+from middlewares.ratelimit import RateLimitMiddleware
+from services.notifications import NotificationService
+
+TOKEN = "123456:BENCH"
+
+
+async def run_benchmark(
+    recipients: int = 300,
+    interactive: int = 30,
+    flood_rate: float = 0.1,
+    seed: int = 1
+) -> bool:
+    """Рассылка + интерактивные ответы + серия в один чат через локальный API"""
+    api = FakeBotApi(
+        flood_rate=flood_rate,
+        seed=seed,
+        global_rate=config.TELEGRAM_GLOBAL_RATE,
+        chat_rate=config.TELEGRAM_CHAT_RATE,
+        chat_burst=config.TELEGRAM_CHAT_BURST
+    )
+    await api.start()
+
+    session = AiohttpSession(api=api.api_server)
+    bot = Bot(TOKEN, session=session)
+    bot.session.middleware(RateLimitMiddleware())
+
+    async def reply(chat_id: int) -> float:
+        await asyncio.sleep(chat_id % interactive * 0.2)
+        started = time.perf_counter()
+        await bot.send_message(chat_id, "interactive")
+        return time.perf_counter() - started
+
+    async def same_chat(count: int) -> float:
+        started = time.perf_counter()
+        for _ in range(count):
+            await bot.send_message(1, "same chat")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    bulk_ids = list(range(1000, 1000 + recipients))
+    bulk_task = asyncio.create_task(NotificationService.send_many(bot, bulk_ids, "bulk"))
+    latencies = await asyncio.gather(*(reply(chat_id) for chat_id in range(2, 2 + interactive)))
+    same_chat_time = await same_chat(10)
+    sent, failed = await bulk_task
+    elapsed = time.perf_counter() - started
+
+    await bot.session.close()
+    await api.stop()
+
+    expected = recipients + interactive + 10
+    delivered = len(api.calls_of("sendMessage"))
+    print(f"Сообщений: {expected}, доставлено: {delivered}, ошибок рассылки: {failed}")
+    print(f"Ответов 429 от API: {api.rejected} (повторены автоматически)")
+    print(f"Время: {elapsed:.1f} с, {delivered / elapsed:.1f} сообщений/с "
+          f"(лимит {config.TELEGRAM_GLOBAL_RATE:g}/с)")
+    print(f"Интерактивные ответы во время рассылки: p50 {statistics.median(latencies) * 1000:.0f} мс, "
+          f"max {max(latencies) * 1000:.0f} мс")
+    print(f"10 сообщений в один чат: {same_chat_time:.1f} с (лимит {config.TELEGRAM_CHAT_RATE:g}/с)")
+
+    # Путь повтора после 429 должен реально сработать, и без потерь
+    retried = api.rejected > 0
+    ok = retried and delivered == expected and failed == 0
+    if not retried:
+        print("❌ API не вернул ни одного 429 - повторы не проверены")
+    print("✅ Все сообщения доставлены" if delivered == expected and failed == 0 else "❌ Часть сообщений потеряна")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    replies = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    flood = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    ok = asyncio.run(run_benchmark(count, replies, flood, seed))
+    sys.exit(0 if ok else 1)
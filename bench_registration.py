@@ -0,0 +1,163 @@
+"""
+T-League Bot - Нагрузочная проверка регистрации на турнир
+Запуск: python bench_registration.py [пользователей] [лимит_участников]
+Одновременно регистрирует пользователей (каждый в своей сессии, часть нажимает дважды)
+на временной SQLite-базе и проверяет, что лимит не превышен и дублей нет.
+Параллельно карточку турнира открывают зрители (сводка и участие пересобираются
+в кэше SummaryService) - кэш в конце должен совпасть с базой.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from database.models import (
+    Base, User, Tournament, TournamentParticipant, TournamentFormat, TournamentStatus
+)
+from services.tournament import TournamentService
+from services.summary import SummaryService
+
+
+async def run_benchmark(users_count: int = 500, max_participants: int = 100):
+    """Одновременные регистрации + проверка инвариантов"""
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_registration.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        connect_args={"timeout": 60}
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_maker() as session:
+        session.add_all([
+            User(id=uid, username=f"user{uid}", full_name=f"User {uid}")
+            for uid in range(1, users_count + 1)
+        ])
+        tournament = Tournament(
+            name="Bench",
+            format=TournamentFormat.ROUND_ROBIN,
+            status=TournamentStatus.REGISTRATION,
+            registration_open=True,
+            max_participants=max_participants
+        )
+        session.add(tournament)
+        await session.commit()
+        tournament_id = tournament.id
+
+    done = [0]
+
+    async def click(user_id: int) -> bool:
+        async with session_maker() as session:
+            accepted = await TournamentService.register_participant(session, tournament_id, user_id)
+        done[0] += 1
+        return accepted
+
+    # Каждый десятый пользователь нажимает кнопку дважды
+    clicks = list(range(1, users_count + 1)) + list(range(1, users_count + 1, 10))
+
+    clicking = True
+
+    async def view(seed: int):
+        """
+        Зритель: карточка турнира и участие случайных пользователей. В первой
+        половине нажатий сводка иногда сбрасывается; потерянная при пересборке
+        регистрация остаётся в кэше до конца.
+        """
+        rng = random.Random(seed)
+        while clicking:
+            if done[0] < len(clicks) // 2 and rng.random() < 0.3:
+                SummaryService.invalidate(tournament_id)
+            async with session_maker() as session:
+                await SummaryService.get_summary(session, tournament_id)
+                await SummaryService.is_participant(session, tournament_id, rng.randint(1, users_count))
+            await asyncio.sleep(0)
+
+    viewers = [asyncio.create_task(view(seed)) for seed in range(10)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(click(uid) for uid in clicks))
+    elapsed = time.perf_counter() - started
+    clicking = False
+    await asyncio.gather(*viewers)
+
+    async with session_maker() as session:
+        rows = await session.scalar(
+            select(func.count(TournamentParticipant.id))
+            .where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        distinct_users = await session.scalar(
+            select(func.count(func.distinct(TournamentParticipant.user_id)))
+            .where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        counter = await session.scalar(
+            select(Tournament.participants_count).where(Tournament.id == tournament_id)
+        )
+        result = await session.execute(
+            select(TournamentParticipant.user_id).where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        registered = {user_id for (user_id,) in result.all()}
+        cached_count = (await SummaryService.get_summary(session, tournament_id)).participants_count
+        cached_registered = {
+            user_id for user_id in range(1, users_count + 1)
+            if await SummaryService.is_participant(session, tournament_id, user_id)
+        }
+
+    # Регистрация ровно во время пересборки сводки (загрузка придержана до её конца)
+    async with session_maker() as session:
+        open_tournament = Tournament(
+            name="Race",
+            format=TournamentFormat.ROUND_ROBIN,
+            status=TournamentStatus.REGISTRATION,
+            registration_open=True
+        )
+        session.add(open_tournament)
+        await session.commit()
+        open_id = open_tournament.id
+
+    loaded, release = asyncio.Event(), asyncio.Event()
+    load = SummaryService._load
+
+    async def held_load(session, tid):
+        summary = await load(session, tid)
+        loaded.set()
+        await release.wait()
+        return summary
+
+    SummaryService._load = held_load
+    async with session_maker() as session:
+        viewer = asyncio.create_task(SummaryService.get_summary(session, open_id))
+        await loaded.wait()
+        async with session_maker() as register_session:
+            await TournamentService.register_participant(register_session, open_id, 1)
+        release.set()
+        await viewer
+    SummaryService._load = load
+    async with session_maker() as session:
+        race_count = (await SummaryService.get_summary(session, open_id)).participants_count
+
+    await engine.dispose()
+
+    accepted = sum(results)
+    print(f"Нажатий: {len(clicks)}, лимит: {max_participants}")
+    print(f"Принято: {accepted}, строк участников: {rows}, уникальных: {distinct_users}, счётчик: {counter}")
+    print(f"Время: {elapsed:.2f} с, {len(clicks) / elapsed:.0f} регистраций/с")
+    cache_ok = cached_count == counter and cached_registered == registered and race_count == 1
+    print(f"Кэш сводки: участников {cached_count}, участие совпадает с базой: {cached_registered == registered}")
+    print(f"Регистрация во время пересборки сводки: участников в кэше {race_count} из 1")
+
+    ok = accepted == rows == distinct_users == counter <= max_participants and cache_ok
+    print("✅ Превышения лимита и дублей нет, кэш совпадает с базой" if ok else "❌ Нарушены инварианты регистрации")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    ok = asyncio.run(run_benchmark(count, limit))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,165 @@
+"""
+T-League Bot - Проверка создания следующего тура при одновременных подтверждениях
+Запуск: python bench_round_race.py [турниров] [участников]
+На временной SQLite-базе создаёт турниры плей-офф и швейцарской системы,
+вносит результаты всех открытых матчей и одновременно пропускает через
+Dispatcher.feed_update подтверждения последних матчей тура во всех турнирах.
+Неподтверждённые из-за конфликта подтверждения повторяются. Проверяет, что
+каждый тур создан ровно один раз (полное число пар), сетка плей-офф доходит
+до победителя, а швейцарская система - до последнего тура.
+Выводит время каждой волны подтверждений.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import List
+
+from config import config
+from fake_bot_api import FakeBotApi
+from bench_expiry import create_tournament
+
+
+async def report_open_matches(tournament_ids: List[int]) -> List[tuple]:
+    """Результат 2:1 во всех открытых матчах; возвращает (id матча, соперник)"""
+    from sqlalchemy import select, update
+    from database.engine import async_session_maker
+    from database.models import Match, MatchStatus
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Match.id, Match.player2_id).where(
+                Match.tournament_id.in_(tournament_ids),
+                Match.status == MatchStatus.SCHEDULED
+            )
+        )
+        matches = [tuple(row) for row in result.all()]
+        await session.execute(
+            update(Match)
+            .where(Match.id.in_([match_id for match_id, _ in matches]))
+            .values(
+                player1_score=2, player2_score=1,
+                reported_by=Match.player1_id, status=MatchStatus.PENDING
+            )
+        )
+        await session.commit()
+    return matches
+
+
+async def run_check(tournaments: int = 20, players: int = 16) -> bool:
+    """Одновременные подтверждения: каждый тур создаётся один раз"""
+    # База - временная: настраивается до импорта движка
+    config.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_round_race.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.types import Update
+    from sqlalchemy import select
+    import bot as bot_module
+    from database.engine import init_db, async_session_maker
+    from database.models import Match, MatchStatus, PlayoffSlot, Tournament, TournamentFormat
+
+    await init_db()
+    playoff_ids = []
+    swiss_ids = []
+    for number in range(2 * tournaments):
+        format = TournamentFormat.PLAYOFF if number < tournaments else TournamentFormat.SWISS
+        (playoff_ids if number < tournaments else swiss_ids).append(
+            await create_tournament(number + 1, format, players, number * players + 1)
+        )
+    tournament_ids = playoff_ids + swiss_ids
+
+    api = FakeBotApi()
+    await api.start()
+    bot = Bot(config.BOT_TOKEN, session=AiohttpSession(api=api.api_server))
+    dp = bot_module.create_dispatcher()
+    update_ids = iter(range(1, 10 ** 9))
+
+    async def confirm(match_id: int, user_id: int):
+        # Кнопка под своим сообщением на каждый матч: правка не совпадает с прошлой
+        raw = api.callback_update(user_id, f"confirm_match_{match_id}", message_id=match_id)
+        update = Update.model_validate({"update_id": next(update_ids), **raw}, context={"bot": bot})
+        await dp.feed_update(bot, update)
+
+    waves = []
+    retries = 0
+    errors = 0
+    while True:
+        pending = await report_open_matches(tournament_ids)
+        if not pending:
+            break
+        started = time.perf_counter()
+        while pending:
+            results = await asyncio.gather(
+                *(confirm(match_id, user_id) for match_id, user_id in pending),
+                return_exceptions=True
+            )
+            errors += sum(isinstance(result, Exception) for result in results)
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(Match.id, Match.player2_id).where(
+                        Match.id.in_([match_id for match_id, _ in pending]),
+                        Match.status == MatchStatus.PENDING
+                    )
+                )
+                pending = [tuple(row) for row in result.all()]
+            retries += len(pending)
+        waves.append(time.perf_counter() - started)
+
+    await bot.session.close()
+    await api.stop()
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Match.tournament_id, Match.round_number).where(Match.tournament_id.in_(tournament_ids))
+        )
+        per_round = Counter(result.all())
+        result = await session.execute(
+            select(Tournament.id, Tournament.total_rounds).where(Tournament.id.in_(tournament_ids))
+        )
+        final_rounds = dict(result.all())
+        result = await session.execute(
+            select(PlayoffSlot.tournament_id, PlayoffSlot.round_number)
+            .where(PlayoffSlot.tournament_id.in_(playoff_ids), PlayoffSlot.position == 0)
+        )
+        champions = {
+            tournament_id for tournament_id, round_number in result.all()
+            if round_number == final_rounds[tournament_id] + 1
+        }
+
+    # Полная сетка: в туре r - players / 2^r пар; швейцарская система - players // 2 пар в туре
+    wrong_rounds = [
+        key for key, count in per_round.items()
+        if count != (players >> key[1] if key[0] in playoff_ids else players // 2)
+    ]
+    swiss_finished = [
+        tournament_id for tournament_id in swiss_ids
+        if max(round_number for tid, round_number in per_round if tid == tournament_id)
+        == final_rounds[tournament_id]
+    ]
+    ok = (
+        not errors and not wrong_rounds
+        and len(champions) == len(playoff_ids) and len(swiss_finished) == len(swiss_ids)
+    )
+    print(f"Турниров: плей-офф {tournaments} и швейцарских {tournaments} по {players}")
+    for wave, elapsed in enumerate(waves, 1):
+        print(f"  волна {wave}: {elapsed * 1000:.0f} мс")
+    print(f"  повторных подтверждений: {retries}, ошибок: {errors}, "
+          f"туров с неверным числом пар: {len(wrong_rounds)}, "
+          f"плей-офф с победителем: {len(champions)}/{len(playoff_ids)}, "
+          f"швейцарских до последнего тура: {len(swiss_finished)}/{len(swiss_ids)}")
+    print("✅ Каждый тур создан один раз" if ok else "❌ Тур создан повторно или не создан")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    ok = asyncio.run(run_check(count, size))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,148 @@
+"""
+T-League Bot - Проверка числа SQL-запросов в списке и карточке турнира
+Запуск: python bench_schedule_queries.py [участников...]   (по умолчанию 6 16 30)
+Для каждого размера создаёт на временной SQLite-базе круговой турнир с
+открытым первым туром и пропускает через Dispatcher.feed_update нажатия
+"Турниры", карточку турнира, расписание и таблицу (кэши нового турнира
+холодные), а также читает всё расписание ScheduleService.get_tournament_matches.
+Считает SQL-запросы (before_cursor_execute) на каждое действие и завершается
+с ошибкой, если число запросов превышает MAX_STATEMENTS или растёт вместе
+с числом матчей (N+1).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from config import config
+from fake_bot_api import FakeBotApi
+
+# Предел запросов на действие - не зависит от числа участников и матчей
+MAX_STATEMENTS = {
+    "tournaments": 2,
+    "tournament_detail": 3,
+    "tournament_schedule": 5,
+    "tournament_table": 5,
+    "get_tournament_matches": 2,
+}
+
+
+async def create_tournament(number: int, players: int, first_user_id: int) -> int:
+    """Круговой турнир с участниками и дедлайном первого тура; возвращает id"""
+    from database.engine import async_session_maker
+    from database.models import User, TournamentParticipant, TournamentFormat
+    from services.tournament import TournamentService
+    from services.schedule import ScheduleService
+
+    async with async_session_maker() as session:
+        user_ids = list(range(first_user_id, first_user_id + players))
+        session.add_all([
+            User(id=user_id, username=f"user{user_id}", full_name=f"User {user_id}")
+            for user_id in user_ids
+        ])
+        tournament = await TournamentService.create_tournament(
+            session, f"Queries {number}", "", TournamentFormat.ROUND_ROBIN
+        )
+        session.add_all([
+            TournamentParticipant(tournament_id=tournament.id, user_id=user_id)
+            for user_id in user_ids
+        ])
+        tournament.participants_count = players
+        await session.commit()
+        await TournamentService.conduct_draw(session, tournament.id)
+        await TournamentService.start_tournament(session, tournament.id)
+        await ScheduleService.set_deadline_for_round(
+            session, tournament.id, 1, ScheduleService.utc_to_msk(datetime.utcnow()) + timedelta(days=3)
+        )
+        return tournament.id
+
+
+async def run_check(sizes: List[int]) -> bool:
+    """Счёт запросов по действиям для турниров разного размера"""
+    # База - временная: настраивается до импорта движка
+    config.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_schedule_queries.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.types import Update
+    from sqlalchemy import event, select, func
+    import bot as bot_module
+    from database.engine import engine, init_db, async_session_maker
+    from database.models import Match
+    from services.schedule import ScheduleService
+
+    await init_db()
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    api = FakeBotApi()
+    await api.start()
+    bot = Bot(config.BOT_TOKEN, session=AiohttpSession(api=api.api_server))
+    dp = bot_module.create_dispatcher()
+    update_ids = iter(range(1, 10 ** 9))
+
+    async def feed(user_id: int, data: str) -> int:
+        """Нажатие кнопки; возвращает число SQL-запросов"""
+        raw = api.callback_update(user_id, data)
+        update = Update.model_validate({"update_id": next(update_ids), **raw}, context={"bot": bot})
+        statements[0] = 0
+        await dp.feed_update(bot, update)
+        return statements[0]
+
+    results: Dict[int, Dict[str, int]] = {}
+    matches_count: Dict[int, int] = {}
+    first_user_id = 1
+    for number, players in enumerate(sizes, 1):
+        tournament_id = await create_tournament(number, players, first_user_id)
+        user_id = first_user_id
+        first_user_id += players
+
+        async with async_session_maker() as session:
+            matches_count[players] = await session.scalar(
+                select(func.count(Match.id)).where(Match.tournament_id == tournament_id)
+            )
+
+        counts = {
+            "tournaments": await feed(user_id, "tournaments"),
+            "tournament_detail": await feed(user_id, f"tournament_{tournament_id}"),
+            "tournament_schedule": await feed(user_id, f"tournament_schedule_{tournament_id}"),
+            "tournament_table": await feed(user_id, f"tournament_table_{tournament_id}"),
+        }
+        async with async_session_maker() as session:
+            statements[0] = 0
+            await ScheduleService.get_tournament_matches(session, tournament_id)
+            counts["get_tournament_matches"] = statements[0]
+        results[players] = counts
+
+    await bot.session.close()
+    await api.stop()
+
+    print(f"{'Действие':<26}" + "".join(f"{f'{n} уч.':>10}" for n in sizes) + f"{'предел':>9}")
+    print(f"{'(матчей в базе)':<26}" + "".join(f"{matches_count[n]:>10}" for n in sizes))
+    ok = True
+    for action, limit in MAX_STATEMENTS.items():
+        values = [results[n][action] for n in sizes]
+        row_ok = max(values) <= limit and len(set(values)) == 1
+        ok = ok and row_ok
+        print(f"{action:<26}" + "".join(f"{value:>10}" for value in values) + f"{limit:>9}"
+              + ("" if row_ok else "  ❌"))
+
+    print("✅ Число запросов не зависит от числа матчей" if ok else "❌ Превышен предел запросов или N+1")
+    return ok
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [6, 16, 30]
+    ok = asyncio.run(run_check(sizes))
+    sys.exit(0 if ok else 1)
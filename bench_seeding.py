@@ -0,0 +1,124 @@
+"""
+T-League Bot - Проверка посева по предыдущему турниру
+Запуск: python bench_seeding.py [участников] [новичков]
+На временной SQLite-базе завершает турнир со случайной итоговой таблицей
+(порядок не совпадает с рейтингом), создаёт следующий турнир с посевом
+"по предыдущему турниру" и проверяет, что посев повторяет итоговые места -
+до переноса предыдущего турнира в архив и после него. Новички идут в конце
+по рейтингу. Выводит время rank_participants.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from database.models import (
+    Base, User, Tournament, TournamentParticipant, ArchivedParticipant,
+    TournamentFormat, TournamentStatus, SeedingMode
+)
+from services.archive import ArchiveService
+from services.seeding import SeedingService
+
+
+async def run_benchmark(players: int = 1000, newcomers: int = 50) -> bool:
+    """Посев до и после архивации против итоговой таблицы предыдущего турнира"""
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_seeding.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(1)
+    user_ids = list(range(1, players + newcomers + 1))
+    ratings = {uid: rng.randint(50, 300) for uid in user_ids}
+    # Итоговые места предыдущего турнира: разные очки, порядок случайный
+    finish = rng.sample(range(1, players + 1), players)
+
+    async with session_maker() as session:
+        session.add_all([
+            User(id=uid, username=f"user{uid}", full_name=f"User {uid}", rating=ratings[uid])
+            for uid in user_ids
+        ])
+        previous = Tournament(
+            name="Previous",
+            format=TournamentFormat.ROUND_ROBIN,
+            status=TournamentStatus.FINISHED,
+            finished_at=datetime.utcnow(),
+            participants_count=players
+        )
+        current = Tournament(
+            name="Current",
+            format=TournamentFormat.ROUND_ROBIN,
+            status=TournamentStatus.REGISTRATION,
+            seeding_mode=SeedingMode.PREVIOUS,
+            participants_count=len(user_ids)
+        )
+        session.add_all([previous, current])
+        await session.flush()
+        session.add_all([
+            TournamentParticipant(
+                tournament_id=previous.id,
+                user_id=uid,
+                points=3 * (players - place),
+                matches_played=players - 1
+            )
+            for place, uid in enumerate(finish)
+        ])
+        session.add_all([
+            TournamentParticipant(tournament_id=current.id, user_id=uid)
+            for uid in user_ids
+        ])
+        await session.commit()
+        previous_id, current_id = previous.id, current.id
+
+    expected = finish + sorted(
+        range(players + 1, players + newcomers + 1),
+        key=lambda uid: (-ratings[uid], uid)
+    )
+    by_rating = sorted(user_ids, key=lambda uid: (-ratings[uid], uid))
+
+    async def seed() -> tuple:
+        async with session_maker() as session:
+            tournament = await session.get(Tournament, current_id)
+            started = time.perf_counter()
+            ranked = await SeedingService.rank_participants(session, tournament)
+            return ranked, time.perf_counter() - started
+
+    live_order, live_time = await seed()
+
+    async with session_maker() as session:
+        archived = await ArchiveService.archive_tournament(session, previous_id)
+    async with session_maker() as session:
+        result = await session.execute(
+            select(ArchivedParticipant.user_id)
+            .where(ArchivedParticipant.tournament_id == previous_id)
+            .order_by(ArchivedParticipant.position)
+        )
+        archived_finish = [uid for (uid,) in result.all()]
+
+    archived_order, archived_time = await seed()
+    await engine.dispose()
+
+    print(f"Участников: {players} + новичков {newcomers}")
+    print(f"До архивации: {live_time * 1000:.1f} мс, совпадает с итоговой таблицей: {live_order == expected}")
+    print(f"Архив: {'перенесён' if archived else 'не перенесён'}, места сохранены: {archived_finish == finish}")
+    print(f"После архивации: {archived_time * 1000:.1f} мс, совпадает с итоговыми местами: "
+          f"{archived_order == expected}, совпадает с рейтингом: {archived_order == by_rating}")
+
+    ok = archived and archived_finish == finish and live_order == expected == archived_order
+    print("✅ Посев повторяет итоговые места" if ok else "❌ Посев не совпадает с итоговыми местами")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    extra = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ok = asyncio.run(run_benchmark(count, extra))
+    sys.exit(0 if ok else 1)
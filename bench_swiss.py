@@ -0,0 +1,125 @@
+"""
+T-League Bot - Бенчмарк жеребьёвки швейцарской системы
+Запуск: python bench_swiss.py [игроков] [туров]
+Моделирует полный турнир со случайными результатами и выводит время жеребьёвки каждого тура.
+Затем на малых турнирах, где туров почти столько же, сколько соперников, сверяет число
+повторных встреч и повторных bye в каждом туре с минимумом, найденным полным перебором.
+"""
+import random
+import sys
+import time
+from typing import Dict, List, Set
+
+from services.swiss import SwissService, SwissPlayer
+
+
+def run_benchmark(players_count: int = 512, rounds: int = 9, seed: int = 1):
+    """Прогон турнира: жеребьёвка каждого тура + случайные результаты"""
+    rng = random.Random(seed)
+    players = {
+        uid: SwissPlayer(user_id=uid, score=0, rating=rng.randint(50, 300))
+        for uid in range(1, players_count + 1)
+    }
+    history = {uid: set() for uid in players}
+    points = {uid: 0 for uid in players}
+    results = []
+    timings = []
+
+    for round_number in range(1, rounds + 1):
+        started = time.perf_counter()
+        pairs, bye = SwissService.pair_players(list(players.values()), history)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+
+        rematches = sum(1 for a, b in pairs if b in history[a])
+        print(
+            f"Тур {round_number}: пар {len(pairs)}, bye {bye}, "
+            f"повторов {rematches}, {elapsed * 1000:.1f} мс"
+        )
+
+        for home, away in pairs:
+            history[home].add(away)
+            history[away].add(home)
+            players[home].home_count += 1
+            s1, s2 = rng.choice([(1, 0), (0, 1), (1, 1), (2, 0), (0, 2)])
+            results.append((home, away, s1, s2))
+            if s1 > s2:
+                points[home] += 3
+            elif s1 < s2:
+                points[away] += 3
+            else:
+                points[home] += 1
+                points[away] += 1
+        if bye is not None:
+            points[bye] += 3
+            players[bye].had_bye = True
+
+        tiebreaks = SwissService.calculate_tiebreaks(points, results)
+        for uid, player in players.items():
+            player.score = points[uid]
+            player.buchholz = tiebreaks[uid][0]
+
+    print(f"\nИгроков: {players_count}, туров: {rounds}")
+    print(f"Максимум на тур: {max(timings) * 1000:.1f} мс, всего: {sum(timings) * 1000:.1f} мс")
+    return timings
+
+
+def min_conflicts(players: List[SwissPlayer], history: Dict[int, Set[int]]) -> int:
+    """Полный перебор: наименьшее число повторных встреч и повторных bye в туре"""
+    best = len(players)
+
+    def solve(rest: List[SwissPlayer], conflicts: int, bye_left: bool):
+        nonlocal best
+        if conflicts >= best:
+            return
+        if not rest:
+            best = conflicts
+            return
+        first, others = rest[0], rest[1:]
+        if bye_left:
+            solve(others, conflicts + first.had_bye, False)
+        for k, second in enumerate(others):
+            solve(others[:k] + others[k + 1:], conflicts + (second.user_id in history[first.user_id]), bye_left)
+
+    solve(players, 0, len(players) % 2 == 1)
+    return best
+
+
+def run_rematch_check(tournaments: int = 300, seed: int = 1) -> bool:
+    """Малые турниры до последнего возможного тура: повторов не больше минимума"""
+    rng = random.Random(seed)
+    rounds_checked = 0
+    worse = 0
+    for _ in range(tournaments):
+        players_count = rng.randint(5, 10)
+        players = {uid: SwissPlayer(user_id=uid, score=0, rating=rng.randint(50, 300))
+                   for uid in range(1, players_count + 1)}
+        history = {uid: set() for uid in players}
+        for _ in range(players_count):
+            pairs, bye = SwissService.pair_players(list(players.values()), history)
+            conflicts = sum(b in history[a] for a, b in pairs)
+            conflicts += bye is not None and players[bye].had_bye
+            if conflicts > min_conflicts(list(players.values()), history):
+                worse += 1
+            rounds_checked += 1
+            for home, away in pairs:
+                history[home].add(away)
+                history[away].add(home)
+                players[home].home_count += 1
+                players[rng.choice((home, away))].score += 3
+            if bye is not None:
+                players[bye].score += 3
+                players[bye].had_bye = True
+
+    print(f"\nМалых турниров: {tournaments}, туров: {rounds_checked}, "
+          f"туров с лишними повторами: {worse}")
+    print("✅ Повторов не больше минимума" if not worse else "❌ Есть туры с лишними повторами")
+    return not worse
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    rounds_count = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    run_benchmark(count, rounds_count)
+    ok = run_rematch_check()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,266 @@
+"""
+T-League Bot - Сквозной бенчмарк обработки обновлений
+Запуск: python bench_updates.py [пользователей] [турниров] [участников] [одновременно]
+Заполняет временную SQLite-базу (пользователи, круговые турниры с открытым
+первым туром и дедлайном), генерирует потоки Update для каждого
+пользователя - меню, турниры, таблицы, расписание, рейтинг, профиль,
+"Мои матчи", внесение и подтверждение результатов, админ-панель - и
+пропускает их через Dispatcher.feed_update с настоящими роутерами user.py,
+matches.py и admin.py. Ответы бота уходят в локальный fake_bot_api без
+задержки и без RateLimitMiddleware (её проверяет bench_ratelimit).
+Выводит обновлений в секунду, p50/p99 задержки и число SQL-запросов
+на обновление по каждому хендлеру.
+"""
+import asyncio
+import contextvars
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from fake_bot_api import FakeBotApi
+
+# Учёт текущего обновления: имя хендлера и счётчик SQL
+_current: contextvars.ContextVar[Optional["UpdateStats"]] = contextvars.ContextVar("bench_update", default=None)
+
+
+@dataclass
+class UpdateStats:
+    handler: str = "(не обработано)"
+    statements: int = 0
+
+
+@dataclass
+class HandlerStats:
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def seed(users_count: int, tournaments_count: int, participants: int, admin_id: int) -> List[Tuple[int, int, int]]:
+    """Пользователи и турниры с открытым первым туром; возвращает матчи (id, игрок1, игрок2)"""
+    from sqlalchemy import select
+    from database.engine import init_db, async_session_maker
+    from database.models import User, Match, TournamentParticipant, TournamentFormat
+    from services.tournament import TournamentService
+    from services.schedule import ScheduleService
+
+    await init_db()
+    rng = random.Random(1)
+    async with async_session_maker() as session:
+        session.add_all([
+            User(
+                id=user_id,
+                username=f"user{user_id}",
+                full_name=f"User {user_id}",
+                rating=rng.randint(50, 300),
+                is_admin=user_id == admin_id
+            )
+            for user_id in list(range(1, users_count + 1)) + [admin_id]
+        ])
+        await session.commit()
+
+        for number in range(tournaments_count):
+            tournament = await TournamentService.create_tournament(
+                session, f"Bench {number + 1}", "", TournamentFormat.ROUND_ROBIN
+            )
+            first = number * participants + 1
+            session.add_all([
+                TournamentParticipant(tournament_id=tournament.id, user_id=user_id)
+                for user_id in range(first, min(first + participants, users_count + 1))
+            ])
+            tournament.participants_count = participants
+            await session.commit()
+            await TournamentService.conduct_draw(session, tournament.id)
+            await TournamentService.start_tournament(session, tournament.id)
+            await ScheduleService.set_deadline_for_round(
+                session, tournament.id, 1, ScheduleService.utc_to_msk(datetime.utcnow()) + timedelta(days=3)
+            )
+
+        result = await session.execute(
+            select(Match.id, Match.player1_id, Match.player2_id)
+            .where(Match.round_number == 1, Match.deadline_set == True)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+def build_scripts(
+    users_count: int,
+    tournaments_count: int,
+    matches: List[Tuple[int, int, int]],
+    admin_id: int,
+    seed_value: int = 1
+) -> List[List[Tuple[int, str, str]]]:
+    """
+    Сценарии пользователей: списки (user_id, "message"/"callback", данные).
+    Порядок внутри сценария сохраняется; подтверждение результата идёт
+    от соперника сразу после внесения, в том же сценарии.
+    """
+    rng = random.Random(seed_value)
+    reporter_matches = {player1_id: (match_id, player2_id) for match_id, player1_id, player2_id in matches}
+    scripts = []
+
+    for user_id in range(1, users_count + 1):
+        tournament_id = rng.randint(1, tournaments_count)
+        steps = [
+            (user_id, "message", "/start"),
+            (user_id, "callback", "tournaments"),
+            (user_id, "callback", f"tournament_{tournament_id}"),
+            (user_id, "callback", f"tournament_table_{tournament_id}"),
+            (user_id, "callback", f"tournament_schedule_{tournament_id}"),
+            (user_id, "callback", "main_menu"),
+            (user_id, "callback", rng.choice(["rating", "rating_full"])),
+            (user_id, "callback", "my_profile"),
+            (user_id, "callback", "my_matches"),
+        ]
+        if rng.random() < 0.3:
+            steps.append((user_id, "callback", "records_menu"))
+
+        match = reporter_matches.get(user_id)
+        if match and rng.random() < 0.7:
+            match_id, opponent_id = match
+            steps += [
+                (user_id, "callback", f"report_open_{match_id}"),
+                (user_id, "message", f"{rng.randint(0, 4)}:{rng.randint(0, 4)}"),
+                (opponent_id, "callback", f"confirm_match_{match_id}"),
+            ]
+        steps.append((user_id, "callback", "main_menu"))
+        scripts.append(steps)
+
+    scripts.append([
+        (admin_id, "message", "/start"),
+        (admin_id, "callback", "admin_panel"),
+        (admin_id, "callback", "admin_manage_tournaments"),
+        (admin_id, "callback", "admin_logs"),
+        (admin_id, "callback", "admin_panel"),
+    ])
+    rng.shuffle(scripts)
+    return scripts
+
+
+async def run_benchmark(
+    users_count: int = 2000,
+    tournaments_count: int = 4,
+    participants: int = 50,
+    concurrency: int = 50
+) -> bool:
+    """Заполнение базы, прогон сценариев и отчёт по хендлерам"""
+    # База - временная: настраивается до импорта движка
+    config.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_updates.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.types import Update
+    from sqlalchemy import event
+    import bot as bot_module
+    from database.engine import engine
+
+    admin_id = config.ADMIN_IDS[0]
+    participants = min(participants, users_count // max(tournaments_count, 1))
+    started = time.perf_counter()
+    matches = await seed(users_count, tournaments_count, participants, admin_id)
+    print(f"База: {users_count} пользователей, {tournaments_count} турниров по {participants}, "
+          f"матчей тура 1: {len(matches)} ({time.perf_counter() - started:.1f} с)")
+
+    def count_statement(*args):
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    api = FakeBotApi()
+    await api.start()
+    bot = Bot(config.BOT_TOKEN, session=AiohttpSession(api=api.api_server))
+    dp = bot_module.create_dispatcher()
+
+    async def track_handler(handler, event_obj, data):
+        stats = _current.get()
+        if stats is not None:
+            stats.handler = data["handler"].callback.__name__
+        return await handler(event_obj, data)
+
+    dp.message.middleware(track_handler)
+    dp.callback_query.middleware(track_handler)
+
+    handlers: Dict[str, HandlerStats] = {}
+    update_ids = iter(range(1, 10 ** 9))
+
+    async def feed(user_id: int, kind: str, payload: str):
+        raw = api.message_update(user_id, payload) if kind == "message" else api.callback_update(user_id, payload)
+        update = Update.model_validate({"update_id": next(update_ids), **raw}, context={"bot": bot})
+        stats = UpdateStats()
+        _current.set(stats)
+        error = False
+        begin = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            error = True
+        elapsed = time.perf_counter() - begin
+        record = handlers.setdefault(stats.handler, HandlerStats())
+        record.latencies.append(elapsed)
+        record.statements.append(stats.statements)
+        record.errors += error
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_script(steps: List[Tuple[int, str, str]]):
+        async with semaphore:
+            for step in steps:
+                # Своя копия контекста на каждое обновление
+                await asyncio.create_task(feed(*step))
+
+    scripts = build_scripts(users_count, tournaments_count, matches, admin_id)
+    total = sum(len(steps) for steps in scripts)
+    started = time.perf_counter()
+    await asyncio.gather(*(run_script(steps) for steps in scripts))
+    elapsed = time.perf_counter() - started
+
+    await bot.session.close()
+    await api.stop()
+
+    print(f"Обновлений: {total}, одновременно пользователей: {concurrency}")
+    print(f"Время: {elapsed:.2f} с, {total / elapsed:.0f} обновлений/с\n")
+    print(f"{'Хендлер':<28}{'шт':>7}{'p50 мс':>9}{'p99 мс':>9}{'SQL/upd':>9}{'ошибок':>8}")
+    for name, record in sorted(handlers.items(), key=lambda item: -len(item[1].latencies)):
+        print(
+            f"{name:<28}{len(record.latencies):>7}"
+            f"{statistics.median(record.latencies) * 1000:>9.1f}"
+            f"{percentile(record.latencies, 0.99) * 1000:>9.1f}"
+            f"{statistics.mean(record.statements):>9.1f}"
+            f"{record.errors:>8}"
+        )
+
+    all_latencies = [value for record in handlers.values() for value in record.latencies]
+    all_statements = [value for record in handlers.values() for value in record.statements]
+    errors = sum(record.errors for record in handlers.values())
+    print(f"\nВсего: p50 {statistics.median(all_latencies) * 1000:.1f} мс, "
+          f"p99 {percentile(all_latencies, 0.99) * 1000:.1f} мс, "
+          f"SQL на обновление {statistics.mean(all_statements):.1f}, ошибок {errors}")
+    print(f"Вызовов Bot API: {len(api.calls)}")
+    return errors == 0
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tournaments = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    per_tournament = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    parallel = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+    ok = asyncio.run(run_benchmark(users, tournaments, per_tournament, parallel))
+    sys.exit(0 if ok else 1)
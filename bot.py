@@ -3,14 +3,23 @@ T-League Bot - Главный файл запуска (Обновлённая в
 """
 import asyncio
 import logging
+from typing import Optional
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from config import config
 from database.engine import init_db
 from middlewares.maintenance import MaintenanceMiddleware
+from middlewares.ratelimit import RateLimitMiddleware
+from services.purge import PurgeService
+from services.archive import ArchiveService
+from services.schedule import ScheduleService
+from services.broadcast import BroadcastService
+from services.outbox import OutboxService
 
 # Импорт хендлеров
 from handlers import user, admin, matches
@@ -28,6 +37,25 @@ async def on_startup(bot: Bot):
     await init_db()
     logger.info("База данных инициализирована")
     
+    # Очистка турниров, удаление которых прервал перезапуск
+    pending = await PurgeService.resume_pending()
+    if pending:
+        logger.info(f"Продолжена очистка удалённых турниров: {pending}")
+    
+    # Перенос в архив турниров, завершённых до появления архива
+    asyncio.create_task(ArchiveService.archive_pending())
+    
+    # Технические результаты по истечении дедлайнов
+    asyncio.create_task(ScheduleService.run_expiry_sweeps())
+    
+    # Рассылки, прерванные перезапуском
+    broadcasts = await BroadcastService.resume_pending(bot)
+    if broadcasts:
+        logger.info(f"Продолжены рассылки: {broadcasts}")
+    
+    # Доставка уведомлений из очереди (в том числе оставшихся до перезапуска)
+    OutboxService.start_worker(bot)
+    
     # Уведомление администраторов о запуске
     for admin_id in config.ADMIN_IDS:
         try:
@@ -65,19 +93,23 @@ async def on_shutdown(bot: Bot):
     
     logger.info("Бот остановлен")
 
-async def main():
-    """Основная функция запуска бота"""
-    if config.BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
-        logger.error("❌ ОШИБКА: Токен бота не установлен!")
-        logger.error("Откройте config.py и укажите токен в BOT_TOKEN")
-        return
-    
-    # Инициализация бота и диспетчера
+def create_bot(api_server: Optional[TelegramAPIServer] = None) -> Bot:
+    """
+    Бот с общим лимитом исходящих сообщений.
+    api_server - другой адрес Bot API (например, локальный fake_bot_api для нагрузочных тестов).
+    """
     bot = Bot(
         token=config.BOT_TOKEN,
+        session=AiohttpSession(api=api_server) if api_server else None,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
     
+    # Общий лимит исходящих сообщений (приоритет - ответам пользователям)
+    bot.session.middleware(RateLimitMiddleware())
+    return bot
+
+def create_dispatcher() -> Dispatcher:
+    """Диспетчер со всеми middleware, роутерами и хуками запуска/остановки (один на процесс)"""
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
     
@@ -93,6 +125,18 @@ async def main():
     # Регистрация startup/shutdown хуков
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
+    return dp
+
+async def main():
+    """Основная функция запуска бота"""
+    if config.BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
+        logger.error("❌ ОШИБКА: Токен бота не установлен!")
+        logger.error("Откройте config.py и укажите токен в BOT_TOKEN")
+        return
+    
+    # Инициализация бота и диспетчера
+    bot = create_bot()
+    dp = create_dispatcher()
     
     # Запуск polling
     try:
@@ -0,0 +1,193 @@
+"""
+T-League Bot - Фоновые задания массовой рассылки
+"""
+from aiogram import Bot
+from sqlalchemy import select, update, func
+from database.engine import async_session_maker
+from database.models import BroadcastJob, BroadcastStatus, User
+from services.notifications import NotificationService
+from config import config
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Запущенные рассылки: job_id -> задача (держим ссылку, чтобы задачу не собрал GC)
+_tasks: Dict[int, asyncio.Task] = {}
+
+
+class BroadcastService:
+    """
+    Сервис массовых рассылок.
+    Задание хранится в БД: текст, курсор (последний обработанный user_id)
+    и счётчики. Получатели читаются порциями по config.BROADCAST_BATCH_SIZE
+    по первичному ключу (без недоступных - заблокировавших бота), порция
+    отправляется через NotificationService.send_many (параллельно,
+    с ограничением скорости и паузой на RetryAfter), после порции
+    курсор и счётчики сохраняются. После перезапуска задание продолжается с курсора.
+    """
+
+    @staticmethod
+    async def create_job(
+        text: str,
+        created_by: int,
+        progress_chat_id: Optional[int] = None,
+        progress_message_id: Optional[int] = None
+    ) -> BroadcastJob:
+        """Создание задания (аудитория - доступные пользователи на момент запуска)"""
+        async with async_session_maker() as session:
+            total = await session.scalar(
+                select(func.count(User.id)).where(User.is_reachable == True)
+            ) or 0
+            job = BroadcastJob(
+                text=text,
+                created_by=created_by,
+                progress_chat_id=progress_chat_id,
+                progress_message_id=progress_message_id,
+                total=total
+            )
+            session.add(job)
+            await session.commit()
+            return job
+
+    @staticmethod
+    def format_progress(job: BroadcastJob) -> str:
+        """Текст прогресса для сообщения администратора"""
+        done = job.sent + job.failed
+        if job.status == BroadcastStatus.DONE:
+            return (
+                f"✅ <b>Рассылка #{job.id} завершена!</b>\n\n"
+                f"Отправлено: {job.sent}\n"
+                f"Не отправлено: {job.failed}"
+            )
+        percent = int(done * 100 / job.total) if job.total else 0
+        return (
+            f"📢 <b>Рассылка #{job.id}</b>\n\n"
+            f"Обработано: {done}/{job.total} ({percent}%)\n"
+            f"✅ Отправлено: {job.sent}\n"
+            f"❌ Не отправлено: {job.failed}"
+        )
+
+    @staticmethod
+    async def _show_progress(bot: Bot, job: BroadcastJob):
+        """Обновление сообщения с прогрессом (ошибки редактирования не прерывают рассылку)"""
+        if not job.progress_chat_id or not job.progress_message_id:
+            return
+        try:
+            await bot.edit_message_text(
+                BroadcastService.format_progress(job),
+                chat_id=job.progress_chat_id,
+                message_id=job.progress_message_id,
+                parse_mode="HTML"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update broadcast {job.id} progress: {e}")
+
+    @staticmethod
+    async def _save_progress(job_id: int, cursor_user_id: int, sent: int, failed: int) -> BroadcastJob:
+        """Сдвиг курсора и счётчиков задания (одна короткая транзакция)"""
+        async with async_session_maker() as session:
+            await session.execute(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == job_id)
+                .values(
+                    cursor_user_id=cursor_user_id,
+                    sent=BroadcastJob.sent + sent,
+                    failed=BroadcastJob.failed + failed
+                )
+            )
+            await session.commit()
+            return await session.get(BroadcastJob, job_id)
+
+    @staticmethod
+    async def run_job(bot: Bot, job_id: int) -> Optional[BroadcastJob]:
+        """
+        Рассылка с сохранённого курсора до конца аудитории.
+        При остановке бота посреди порции курсор сохраняется по последнему
+        получателю, до которого всё отправлено: повторно сообщение получат
+        только обогнавшие его параллельные отправки (до NOTIFY_CONCURRENCY),
+        при аварийном падении - не больше одной порции.
+        """
+        loop = asyncio.get_running_loop()
+        last_progress = 0.0
+
+        while True:
+            async with async_session_maker() as session:
+                job = await session.get(BroadcastJob, job_id)
+                if not job or job.status != BroadcastStatus.RUNNING:
+                    return job
+
+                result = await session.execute(
+                    select(User.id)
+                    .where(User.id > job.cursor_user_id, User.is_reachable == True)
+                    .order_by(User.id)
+                    .limit(config.BROADCAST_BATCH_SIZE)
+                )
+                user_ids = [user_id for (user_id,) in result.all()]
+
+                if not user_ids:
+                    job.status = BroadcastStatus.DONE
+                    job.finished_at = datetime.utcnow()
+                    await session.commit()
+                    await BroadcastService._show_progress(bot, job)
+                    return job
+
+            results: Dict[int, bool] = {}
+            try:
+                sent, failed = await NotificationService.send_many(
+                    bot, user_ids, job.text,
+                    on_result=lambda user_id, ok: results.__setitem__(user_id, ok)
+                )
+            except asyncio.CancelledError:
+                # Сохраняем непрерывно обработанную часть порции
+                done = []
+                for user_id in user_ids:
+                    if user_id not in results:
+                        break
+                    done.append(results[user_id])
+                if done:
+                    sent = sum(done)
+                    await BroadcastService._save_progress(
+                        job_id, user_ids[len(done) - 1], sent, len(done) - sent
+                    )
+                raise
+
+            job = await BroadcastService._save_progress(job_id, user_ids[-1], sent, failed)
+
+            if loop.time() - last_progress >= config.BROADCAST_PROGRESS_INTERVAL:
+                last_progress = loop.time()
+                await BroadcastService._show_progress(bot, job)
+
+    @staticmethod
+    def start_job(bot: Bot, job_id: int) -> asyncio.Task:
+        """Запуск рассылки в фоне (повторный запуск того же задания не дублируется)"""
+        task = _tasks.get(job_id)
+        if task and not task.done():
+            return task
+
+        async def run():
+            try:
+                await BroadcastService.run_job(bot, job_id)
+            except Exception as e:
+                logger.error(f"Broadcast {job_id} failed: {e}")
+            finally:
+                _tasks.pop(job_id, None)
+
+        task = asyncio.create_task(run())
+        _tasks[job_id] = task
+        return task
+
+    @staticmethod
+    async def resume_pending(bot: Bot) -> List[int]:
+        """Продолжение рассылок, прерванных перезапуском бота"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(BroadcastJob.id).where(BroadcastJob.status == BroadcastStatus.RUNNING)
+            )
+            job_ids = [job_id for (job_id,) in result.all()]
+
+        for job_id in job_ids:
+            BroadcastService.start_job(bot, job_id)
+        return job_ids
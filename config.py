@@ -45,8 +45,63 @@ class Config:
     RATING_LOSS: int = -5
     INITIAL_RATING: int = 100
 
+    # Жеребьёвка: с какого числа участников круговой турнир хранит туры "лениво"
+    # (создаются только открытые туры, остальные вычисляются по формуле)
+    LAZY_FIXTURES_MIN_PARTICIPANTS: int = 32
+
+    # Швейцарская система
+    SWISS_ROUNDS: int = 0  # 0 - log2(участников) с округлением вверх
+    SWISS_BYE_POINTS: int = 3  # Очки за свободный тур
+    SWISS_SEARCH_BUDGET: int = 200000  # Лимит шагов перебора пар без повторных встреч
+    SWISS_MATCHING_WINDOW: int = 16  # Соперники в пределах стольких мест по таблице, если перебор не нашёл пар
+
+    # Групповой этап (формат "группы + плей-офф")
+    GROUP_SIZE: int = 4  # Желаемый размер группы
+    GROUP_QUALIFIERS: int = 2  # Сколько лучших из каждой группы выходят в плей-офф
+
+    # Критерии турнирной таблицы по порядку (первый - не "head_to_head"):
+    # points, head_to_head (мини-таблица личных встреч), goal_difference, goals_for, wins
+    STANDINGS_TIEBREAKERS: List[str] = field(
+        default_factory=lambda: ["points", "head_to_head", "goal_difference", "goals_for"]
+    )
+
+    # Список турниров
+    TOURNAMENTS_PAGE_SIZE: int = 8  # Кнопок турниров на странице
+
+    # Расписание
+    SCHEDULE_PAGE_LIMIT: int = 4096  # Максимальная длина страницы тура (лимит сообщения Telegram)
+
+    # Фоновая очистка удалённых турниров
+    PURGE_CHUNK_SIZE: int = 500  # Строк за одну короткую транзакцию
+    PURGE_CHUNK_PAUSE: float = 0.05  # Пауза между порциями (секунды) - БД свободна для других
+
     # Настройки уведомлений
     DEADLINE_WARNING_HOURS: int = 24  # За сколько часов предупреждать о дедлайне
+    NOTIFY_CONCURRENCY: int = 10  # Одновременных запросов к Telegram при рассылке
+    BROADCAST_BATCH_SIZE: int = 200  # Получателей рассылки за одну порцию (курсор сохраняется после порции)
+    BROADCAST_PROGRESS_INTERVAL: float = 5  # Как часто обновлять прогресс рассылки (секунды)
+
+    # Очередь уведомлений (outbox)
+    OUTBOX_BATCH_SIZE: int = 100  # Уведомлений за один проход обработчика
+    OUTBOX_POLL_INTERVAL: float = 5  # Проверка очереди без сигнала о новых уведомлениях (секунды)
+    OUTBOX_MAX_ATTEMPTS: int = 5  # Попыток доставки до отметки "не доставлено"
+    OUTBOX_RETRY_DELAY: float = 10  # Первая пауза перед повтором, дальше удваивается (секунды)
+    OUTBOX_RETENTION_DAYS: int = 7  # Сколько хранить доставленные (для дедупликации)
+    DIGEST_WINDOW: float = 60  # Сколько копить несрочные уведомления чата перед отправкой одним сообщением (секунды)
+    DIGEST_MESSAGE_LIMIT: int = 4096  # Максимальная длина сводного сообщения (лимит Telegram)
+
+    # Технические результаты по истечении дедлайна
+    # "non_reporter" - победа внёсшему результат, матч без результата - обоюдное поражение
+    # "double" - обоюдное поражение всегда
+    TECHNICAL_LOSS_MODE: str = "non_reporter"
+    TECHNICAL_WIN_SCORE: int = 3  # Счёт технической победы (TECHNICAL_WIN_SCORE:0)
+    EXPIRY_SWEEP_INTERVAL: int = 300  # Как часто проверять дедлайны (секунды)
+
+    # Ограничение исходящих запросов к Telegram (RateLimitMiddleware)
+    TELEGRAM_GLOBAL_RATE: float = 30  # Сообщений в секунду на бота (лимит Telegram)
+    TELEGRAM_CHAT_RATE: float = 1  # Сообщений в секунду в один чат
+    TELEGRAM_CHAT_BURST: float = 3  # Сколько сообщений в чат можно отправить подряд
+    TELEGRAM_RETRY_MAX_WAIT: float = 600  # Сколько секунд суммарно ждать повторов после 429 (затем ошибка)
 
     # Часовой пояс МСК (UTC+3)
     MSK_TIMEZONE_OFFSET: int = 3
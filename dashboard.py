@@ -0,0 +1,116 @@
+"""
+T-League Bot - Открытые матчи игрока ("Мои матчи")
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, union_all
+from database.models import Match, Tournament, User, MatchStatus
+from datetime import datetime, timedelta
+from typing import Dict, List
+from config import config
+
+# Статусы открытых матчей (ещё не засчитаны)
+OPEN_STATUSES = (MatchStatus.SCHEDULED, MatchStatus.PENDING, MatchStatus.DISPUTED)
+
+# Кэш: user_id -> открытые матчи
+_dashboards: Dict[int, List[tuple]] = {}
+
+
+class DashboardService:
+    """
+    Сервис "Мои матчи": открытые матчи игрока во всех турнирах.
+    Список загружается одним запросом (UNION ALL двух веток - игрок первым и
+    вторым, каждая по своему индексу) и хранится в памяти до изменения
+    матчей игрока: внесение, подтверждение, оспаривание, дедлайн, тех. результат.
+    """
+
+    @staticmethod
+    async def get_open_matches(session: AsyncSession, user_id: int) -> List[tuple]:
+        """
+        Открытые матчи с дедлайном: id, tournament_id, tournament_name,
+        round_number, status, deadline, reported_by, opponent_username,
+        opponent_full_name - по возрастанию дедлайна
+        """
+        rows = _dashboards.get(user_id)
+        if rows is not None:
+            return rows
+
+        def branch(player_column, opponent_column):
+            return (
+                select(
+                    Match.id.label("id"),
+                    Match.tournament_id,
+                    Tournament.name.label("tournament_name"),
+                    Match.round_number,
+                    Match.status,
+                    Match.deadline,
+                    Match.reported_by,
+                    User.username.label("opponent_username"),
+                    User.full_name.label("opponent_full_name")
+                )
+                .join(Tournament, Tournament.id == Match.tournament_id)
+                .join(User, User.id == opponent_column)
+                .where(
+                    player_column == user_id,
+                    Match.status.in_(OPEN_STATUSES),
+                    Match.deadline_set == True,
+                    Tournament.deleted_at.is_(None)
+                )
+            )
+
+        query = union_all(
+            branch(Match.player1_id, Match.player2_id),
+            branch(Match.player2_id, Match.player1_id)
+        ).order_by("deadline", "id")
+
+        result = await session.execute(query)
+        rows = result.all()
+        _dashboards[user_id] = rows
+        return rows
+
+    @staticmethod
+    def invalidate(*user_ids: int):
+        """Сброс списка игроков, чьи матчи изменились"""
+        for user_id in user_ids:
+            _dashboards.pop(user_id, None)
+
+    @staticmethod
+    def invalidate_tournament(tournament_id: int):
+        """Сброс списков, где есть матчи турнира (завершение, удаление)"""
+        for user_id in [
+            user_id for user_id, rows in _dashboards.items()
+            if any(row.tournament_id == tournament_id for row in rows)
+        ]:
+            del _dashboards[user_id]
+
+    @staticmethod
+    def format_dashboard(rows: List[tuple], user_id: int) -> str:
+        """Текст "Мои матчи" """
+        if not rows:
+            return (
+                "⚔️ <b>Мои матчи</b>\n\n"
+                "Открытых матчей нет.\n"
+                "Матчи появляются здесь, когда для тура установлен дедлайн."
+            )
+
+        lines = ["⚔️ <b>Мои матчи</b>\n"]
+        for number, row in enumerate(rows, 1):
+            opponent = f"@{row.opponent_username}" if row.opponent_username else row.opponent_full_name
+            deadline_msk = row.deadline + timedelta(hours=config.MSK_TIMEZONE_OFFSET)
+            overdue = " (просрочен)" if row.deadline < datetime.utcnow() else ""
+
+            if row.status == MatchStatus.SCHEDULED:
+                status = "⏳ Ждёт результата"
+            elif row.status == MatchStatus.DISPUTED:
+                status = "⚠️ Оспорен - решает администратор"
+            elif row.reported_by == user_id:
+                status = "⌛ Ждёт подтверждения соперника"
+            else:
+                status = "⌛ Подтвердите результат соперника"
+
+            lines.append(
+                f"<b>{number}. {row.tournament_name}</b> · Тур {row.round_number}\n"
+                f"🆚 {opponent}\n"
+                f"⏰ {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК{overdue}\n"
+                f"{status}\n"
+            )
+        return "\n".join(lines)
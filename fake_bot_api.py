@@ -0,0 +1,426 @@
+"""
+T-League Bot - Локальный поддельный Bot API для нагрузочных проверок
+Запуск: python fake_bot_api.py [пользователей] [задержка_мс] [доля_429]
+HTTP-сервер с методами, которые использует бот: sendMessage, editMessageText,
+answerCallbackQuery, getChatMember, sendDocument, getUpdates (и служебные
+getMe, deleteWebhook). Задержка ответа, ответы 429 (случайные или по лимитам
+Telegram) и запись всех вызовов настраиваются. Bot, созданный через
+bot.create_bot(api.api_server), работает с настоящим диспетчером из bot.py
+без обращения к Telegram.
+Без аргументов запускает демонстрацию: временная база, polling через
+getUpdates, /start от каждого пользователя и отчёт о пропускной способности.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiogram.client.telegram import TelegramAPIServer
+
+from config import config
+from middlewares.ratelimit import TokenBucket
+
+
+@dataclass
+class ApiCall:
+    """Записанный вызов: метод, параметры, время (perf_counter) и успех"""
+    method: str
+    params: Dict[str, Any]
+    at: float
+    ok: bool = True
+
+
+@dataclass
+class SentMessage:
+    """Сообщение в поддельном чате (для editMessageText и отчётов)"""
+    chat_id: int
+    message_id: int
+    text: str
+    reply_markup: Optional[dict] = None
+    document: Optional[Tuple[str, int]] = None  # имя файла, размер
+
+
+class FakeBotApi:
+    """
+    Поддельный Bot API.
+    latency/jitter - задержка каждого ответа (секунды: базовая + случайная до jitter);
+    flood_rate - доля запросов с чатом, на которые отвечает 429 (retry_after секунд);
+    seed - воспроизводимые случайные 429: свой генератор на чат, n-й запрос
+    в чат получает один и тот же ответ при любом порядке запросов;
+    global_rate/chat_rate/chat_burst - лимиты Telegram (корзины токенов), превышение - 429.
+    Все вызовы пишутся в calls, сообщения - в messages.
+    """
+
+    BOT_ID = 100000
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        global_rate: Optional[float] = None,
+        chat_rate: Optional[float] = None,
+        chat_burst: Optional[float] = None,
+        limit_tolerance: float = 0.05,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self._chat_randoms: Dict[int, random.Random] = {}
+        self.global_bucket = TokenBucket(global_rate, global_rate) if global_rate else None
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst or 1
+        # Допуск на неточность таймеров клиента
+        self.limit_tolerance = limit_tolerance
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+
+        self.calls: List[ApiCall] = []
+        self.messages: Dict[Tuple[int, int], SentMessage] = {}
+        self.rejected = 0
+        self.chat_members: Dict[Tuple[int, int], str] = {}
+        self._message_ids: Dict[int, int] = {}
+
+        self._updates: List[dict] = []
+        self._update_id = 0
+        self._new_updates = asyncio.Event()
+
+        self._handlers: Dict[str, Callable] = {
+            "getMe": self._get_me,
+            "deleteWebhook": self._true,
+            "getUpdates": self._get_updates,
+            "sendMessage": self._send_message,
+            "editMessageText": self._edit_message_text,
+            "answerCallbackQuery": self._true,
+            "getChatMember": self._get_chat_member,
+            "sendDocument": self._send_document,
+        }
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    # ---------- запуск ----------
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запуск сервера; возвращает базовый адрес (порт 0 - любой свободный)"""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def api_server(self) -> TelegramAPIServer:
+        """Адрес для bot.create_bot(api_server=...)"""
+        return TelegramAPIServer.from_base(self.base_url)
+
+    # ---------- входящие обновления ----------
+
+    def push_update(self, update: dict) -> int:
+        """Обновление в очередь getUpdates; возвращает update_id"""
+        self._update_id += 1
+        self._updates.append({"update_id": self._update_id, **update})
+        self._new_updates.set()
+        return self._update_id
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+
+    def message_update(self, user_id: int, text: str) -> dict:
+        """Обновление "пользователь написал боту" (команды размечаются как в Telegram)"""
+        message = {
+            "message_id": self._next_message_id(user_id),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"message": message}
+
+    def callback_update(self, user_id: int, data: str, message_id: Optional[int] = None) -> dict:
+        """
+        Обновление "нажата inline-кнопка" под сообщением бота.
+        По умолчанию - под последним сообщением бота в этом чате.
+        """
+        if message_id is None:
+            message_id = max(
+                (key[1] for key in self.messages if key[0] == user_id),
+                default=None
+            ) or self._store_message(user_id, "…").message_id
+        message = self.messages.get((user_id, message_id)) or self._store_message(user_id, "…", message_id)
+        return {
+            "callback_query": {
+                "id": f"{user_id}:{time.perf_counter_ns()}",
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": self._message_json(message)
+            }
+        }
+
+    # ---------- записанные результаты ----------
+
+    def calls_of(self, method: str) -> List[ApiCall]:
+        return [call for call in self.calls if call.method == method and call.ok]
+
+    def sent_to(self, chat_id: int) -> List[ApiCall]:
+        """Успешные sendMessage/editMessageText/sendDocument в чат, по порядку"""
+        return [
+            call for call in self.calls
+            if call.ok and call.method != "answerCallbackQuery" and call.params.get("chat_id") == chat_id
+        ]
+
+    # ---------- обработка запросов ----------
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        handler = self._handlers.get(method)
+        if handler is None:
+            return self._error(404, "Not Found: method not found")
+
+        if "chat_id" in params and method != "getChatMember":
+            flood = self._flood(params["chat_id"])
+            if flood:
+                self.rejected += 1
+                self.calls.append(ApiCall(method, params, time.perf_counter(), ok=False))
+                return flood
+
+        try:
+            result = await handler(params)
+        except _ApiError as e:
+            self.calls.append(ApiCall(method, params, time.perf_counter(), ok=False))
+            return self._error(e.code, e.description)
+        if method != "getUpdates":
+            self.calls.append(ApiCall(method, params, time.perf_counter()))
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> Dict[str, Any]:
+        """Параметры формы: числа - int, JSON-поля - dict/list, файлы - (имя, размер)"""
+        params: Dict[str, Any] = {}
+        if not request.can_read_body:
+            return params
+        for key, value in (await request.post()).items():
+            if isinstance(value, web.FileField):
+                params[key] = (value.filename, len(value.file.read()))
+            elif key in ("chat_id", "user_id", "message_id", "offset", "limit", "timeout"):
+                params[key] = int(value) if value.lstrip("-").isdigit() else value
+            elif value[:1] in ("{", "["):
+                params[key] = json.loads(value)
+            else:
+                params[key] = value
+        return params
+
+    def _flood(self, chat_id) -> Optional[web.Response]:
+        """429 по случайной доле или по лимитам Telegram"""
+        if self.flood_rate and self._random(chat_id).random() < self.flood_rate:
+            return self._retry_after()
+        buckets = []
+        if self.chat_rate:
+            buckets.append(self._chat_buckets.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst)))
+        if self.global_bucket:
+            buckets.append(self.global_bucket)
+        for bucket in buckets:
+            if bucket.take() > self.limit_tolerance:
+                return self._retry_after()
+        return None
+
+    def _random(self, chat_id):
+        """Генератор случайных 429: без seed - общий модуль random"""
+        if self.seed is None:
+            return random
+        generator = self._chat_randoms.get(chat_id)
+        if generator is None:
+            generator = self._chat_randoms[chat_id] = random.Random(f"{self.seed}:{chat_id}")
+        return generator
+
+    def _retry_after(self) -> web.Response:
+        return web.json_response({
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {self.retry_after}",
+            "parameters": {"retry_after": self.retry_after}
+        }, status=429)
+
+    @staticmethod
+    def _error(code: int, description: str) -> web.Response:
+        return web.json_response({"ok": False, "error_code": code, "description": description}, status=code)
+
+    # ---------- методы ----------
+
+    async def _true(self, params: dict) -> bool:
+        return True
+
+    async def _get_me(self, params: dict) -> dict:
+        return {"id": self.BOT_ID, "is_bot": True, "first_name": "Fake T-League", "username": "fake_tleague_bot"}
+
+    async def _get_updates(self, params: dict) -> List[dict]:
+        offset = params.get("offset") or 0
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates and params.get("timeout"):
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout=params["timeout"])
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:params.get("limit") or 100]
+
+    async def _send_message(self, params: dict) -> dict:
+        message = self._store_message(params["chat_id"], params.get("text", ""), reply_markup=params.get("reply_markup"))
+        return self._message_json(message)
+
+    async def _edit_message_text(self, params: dict) -> dict:
+        key = (params.get("chat_id"), params.get("message_id"))
+        message = self.messages.get(key)
+        if message is None:
+            raise _ApiError(400, "Bad Request: message to edit not found")
+        text = params.get("text", "")
+        reply_markup = params.get("reply_markup")
+        if message.text == text and message.reply_markup == reply_markup:
+            raise _ApiError(400, "Bad Request: message is not modified")
+        message.text = text
+        message.reply_markup = reply_markup
+        return self._message_json(message)
+
+    async def _get_chat_member(self, params: dict) -> dict:
+        status = self.chat_members.get((params.get("chat_id"), params.get("user_id")), "member")
+        return {"status": status, "user": self._user(params.get("user_id"))}
+
+    async def _send_document(self, params: dict) -> dict:
+        document = params.get("document")
+        if isinstance(document, str) and document.startswith("attach://"):
+            document = params.get(document[len("attach://"):])
+        message = self._store_message(params["chat_id"], params.get("caption", ""), document=document)
+        return self._message_json(message)
+
+    # ---------- сообщения ----------
+
+    def _next_message_id(self, chat_id: int) -> int:
+        self._message_ids[chat_id] = self._message_ids.get(chat_id, 0) + 1
+        return self._message_ids[chat_id]
+
+    def _store_message(
+        self,
+        chat_id: int,
+        text: str,
+        message_id: Optional[int] = None,
+        reply_markup: Optional[dict] = None,
+        document: Optional[Tuple[str, int]] = None
+    ) -> SentMessage:
+        message = SentMessage(
+            chat_id=chat_id,
+            message_id=message_id or self._next_message_id(chat_id),
+            text=text,
+            reply_markup=reply_markup,
+            document=document
+        )
+        self.messages[(chat_id, message.message_id)] = message
+        return message
+
+    def _message_json(self, message: SentMessage) -> dict:
+        data = {
+            "message_id": message.message_id,
+            "date": int(time.time()),
+            "chat": {"id": message.chat_id, "type": "private"},
+            "from": {"id": self.BOT_ID, "is_bot": True, "first_name": "Fake T-League"},
+        }
+        if message.document:
+            filename, size = message.document
+            data["document"] = {"file_id": f"doc{message.message_id}", "file_unique_id": f"u{message.message_id}",
+                                "file_name": filename, "file_size": size}
+            if message.text:
+                data["caption"] = message.text
+        else:
+            data["text"] = message.text
+        if message.reply_markup:
+            data["reply_markup"] = message.reply_markup
+        return data
+
+
+class _ApiError(Exception):
+    def __init__(self, code: int, description: str):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+
+
+async def run_demo(users: int = 200, latency_ms: float = 30, flood_rate: float = 0.0) -> bool:
+    """Настоящий диспетчер через getUpdates: /start от каждого пользователя на временной базе"""
+    # База - временная: настраивается до импорта bot (движок создаётся при импорте)
+    db_dir = tempfile.mkdtemp()
+    config.DB_PATH = os.path.join(db_dir, "fake_api.db")
+    config.DATABASE_URL = f"sqlite+aiosqlite:///{config.DB_PATH}"
+    import bot as bot_module
+
+    api = FakeBotApi(latency=latency_ms / 1000, jitter=latency_ms / 1000, flood_rate=flood_rate)
+    await api.start()
+    bot = bot_module.create_bot(api.api_server)
+    dp = bot_module.create_dispatcher()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+
+    user_ids = list(range(1, users + 1))
+    pushed: Dict[int, float] = {}
+    started = time.perf_counter()
+    for user_id in user_ids:
+        api.push_update(api.message_update(user_id, "/start"))
+        pushed[user_id] = time.perf_counter()
+
+    deadline = started + 60
+    while time.perf_counter() < deadline and not all(api.sent_to(user_id) for user_id in user_ids):
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    latencies = [
+        api.sent_to(user_id)[0].at - pushed[user_id]
+        for user_id in user_ids if api.sent_to(user_id)
+    ]
+    await dp.stop_polling()
+    await polling
+    await api.stop()
+
+    answered = len(latencies)
+    print(f"Обновлений: {users}, ответов: {answered}, 429 от API: {api.rejected}")
+    if latencies:
+        latencies.sort()
+        print(f"Время: {elapsed:.2f} с, {answered / elapsed:.1f} обновлений/с")
+        print(f"Задержка ответа: p50 {statistics.median(latencies) * 1000:.0f} мс, "
+              f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.0f} мс")
+    print(f"Вызовов API: {len(api.calls)} (sendMessage: {len(api.calls_of('sendMessage'))})")
+
+    ok = answered == users
+    print("✅ Все обновления обработаны" if ok else "❌ Часть обновлений без ответа")
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    flood = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    ok = asyncio.run(run_demo(count, latency, flood))
+    sys.exit(0 if ok else 1)
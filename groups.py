@@ -0,0 +1,233 @@
+"""
+T-League Bot - Групповой этап (формат "группы + плей-офф")
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from database.models import (
+    Tournament, TournamentParticipant, Match, User,
+    MatchStatus, TournamentFormat
+)
+from services.playoff import PlayoffService
+from services.seeding import SeedingService
+from typing import List, Dict, Optional
+from config import config
+import math
+
+# Статусы, при которых матч считается сыгранным
+FINISHED_STATUSES = (MatchStatus.CONFIRMED, MatchStatus.TECHNICAL)
+
+GROUP_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+class GroupStageService:
+    """Сервис группового этапа: посев змейкой, круговой турнир в группах, выход в плей-офф"""
+
+    @staticmethod
+    def get_groups_count(players_count: int) -> int:
+        """Количество групп по желаемому размеру группы"""
+        return max(1, math.ceil(players_count / max(config.GROUP_SIZE, 2)))
+
+    @staticmethod
+    def snake_seed(player_ids: List[int], groups_count: int) -> List[List[int]]:
+        """
+        Посев змейкой: игроки (отсортированные по силе) раскладываются
+        A, B, C, C, B, A, A, B, ... - сильнейшие оказываются в разных группах.
+        """
+        groups: List[List[int]] = [[] for _ in range(groups_count)]
+        for i, user_id in enumerate(player_ids):
+            row, col = divmod(i, groups_count)
+            group = col if row % 2 == 0 else groups_count - 1 - col
+            groups[group].append(user_id)
+        return groups
+
+    @staticmethod
+    def get_group_name(group_number: int) -> str:
+        """Буква группы (0 -> A)"""
+        if group_number < len(GROUP_LETTERS):
+            return GROUP_LETTERS[group_number]
+        return str(group_number + 1)
+
+    @staticmethod
+    async def start(
+        session: AsyncSession,
+        tournament: Tournament,
+        participants: List[TournamentParticipant],
+        meetings_count: int
+    ) -> int:
+        """
+        Жеребьёвка группового этапа: посев змейкой по режиму посева турнира, круговой турнир в каждой группе.
+        Туры всех групп идут параллельно. Возвращает количество созданных матчей (без commit).
+        """
+        from services.tournament import TournamentService
+
+        ranked = await SeedingService.rank_participants(session, tournament)
+
+        groups_count = GroupStageService.get_groups_count(len(ranked))
+        groups = GroupStageService.snake_seed(ranked, groups_count)
+
+        group_of = {uid: number for number, members in enumerate(groups) for uid in members}
+        for participant in participants:
+            participant.group_number = group_of[participant.user_id]
+
+        group_rounds = TournamentService.get_round_robin_rounds_count(
+            max(len(members) for members in groups), meetings_count
+        )
+
+        matches = []
+        for members in groups:
+            for round_num in range(1, group_rounds + 1):
+                for home_id, away_id in TournamentService.get_round_pairings(members, round_num):
+                    matches.append(Match(
+                        tournament_id=tournament.id,
+                        round_number=round_num,
+                        player1_id=home_id,
+                        player2_id=away_id,
+                        status=MatchStatus.SCHEDULED,
+                        deadline_set=False
+                    ))
+        session.add_all(matches)
+
+        tournament.groups_count = groups_count
+        tournament.group_qualifiers = max(1, config.GROUP_QUALIFIERS)
+        tournament.group_stage_rounds = group_rounds
+        tournament.meetings_count = meetings_count
+
+        # Сетка плей-офф: группы * выходящие, туры после группового этапа
+        qualifiers_total = groups_count * tournament.group_qualifiers
+        bracket_size = PlayoffService.get_bracket_size(min(qualifiers_total, len(ranked)))
+        tournament.total_rounds = group_rounds + int(math.log2(bracket_size))
+        tournament.current_round = 1
+
+        await session.flush()
+        return len(matches)
+
+    @staticmethod
+    async def get_group_tables(session: AsyncSession, tournament_id: int) -> Dict[int, List[tuple]]:
+        """Таблицы всех групп одним запросом: группа -> [(участник, пользователь), ...]"""
+        result = await session.execute(
+            select(TournamentParticipant, User)
+            .join(User, TournamentParticipant.user_id == User.id)
+            .where(TournamentParticipant.tournament_id == tournament_id)
+            .order_by(
+                TournamentParticipant.group_number,
+                TournamentParticipant.points.desc(),
+                (TournamentParticipant.goals_for - TournamentParticipant.goals_against).desc(),
+                TournamentParticipant.goals_for.desc()
+            )
+        )
+
+        tables: Dict[int, List[tuple]] = {}
+        for participant, user in result.all():
+            tables.setdefault(participant.group_number, []).append((participant, user))
+        return tables
+
+    @staticmethod
+    async def get_qualifiers(session: AsyncSession, tournament: Tournament) -> List[int]:
+        """
+        Вышедшие из групп в порядке посева в плей-офф (один запрос с оконной функцией):
+        сначала все победители групп, затем вторые места и т.д.
+        Внутри каждого места группы переставлены так, чтобы в первом туре
+        не встречались игроки из одной группы.
+        """
+        position = func.row_number().over(
+            partition_by=TournamentParticipant.group_number,
+            order_by=(
+                TournamentParticipant.points.desc(),
+                (TournamentParticipant.goals_for - TournamentParticipant.goals_against).desc(),
+                TournamentParticipant.goals_for.desc(),
+                TournamentParticipant.user_id
+            )
+        ).label("position")
+
+        ranked = (
+            select(
+                TournamentParticipant.group_number,
+                TournamentParticipant.user_id,
+                position
+            )
+            .where(TournamentParticipant.tournament_id == tournament.id)
+            .subquery()
+        )
+        result = await session.execute(
+            select(ranked.c.group_number, ranked.c.user_id, ranked.c.position)
+            .where(ranked.c.position <= tournament.group_qualifiers)
+        )
+
+        by_place: Dict[int, Dict[int, int]] = {}
+        for group_number, user_id, place in result.all():
+            by_place.setdefault(place, {})[group_number] = user_id
+
+        groups_count = tournament.groups_count
+        seeds = []
+        for place in sorted(by_place):
+            order = [(g + place - 1) % groups_count for g in range(groups_count)]
+            if place % 2 == 0:
+                order.reverse()
+            seeds.extend(by_place[place][g] for g in order if g in by_place[place])
+        return seeds
+
+    @staticmethod
+    def build_bracket_order(seeds: List[int]) -> List[Optional[int]]:
+        """Расстановка по сетке по таблице посевов: посев i играет с посевом n-1-i"""
+        return SeedingService.bracket_positions(seeds)
+
+    @staticmethod
+    async def on_match_confirmed(session: AsyncSession, match: Match) -> int:
+        """
+        Когда сыгран последний матч группового этапа, лучшие из групп
+        автоматически выходят в сетку плей-офф (без commit).
+        """
+        if match.bracket_slot is not None:
+            return 0
+
+        tournament = await session.get(Tournament, match.tournament_id)
+        if not tournament or tournament.format != TournamentFormat.GROUP_PLAYOFF:
+            return 0
+        if not tournament.group_stage_rounds:
+            return 0
+
+        unfinished = await session.scalar(
+            select(func.count(Match.id)).where(
+                Match.tournament_id == tournament.id,
+                Match.round_number <= tournament.group_stage_rounds,
+                Match.status.notin_(FINISHED_STATUSES)
+            )
+        )
+        if unfinished:
+            return 0
+
+        seeds = await GroupStageService.get_qualifiers(session, tournament)
+        if len(seeds) < 2:
+            return 0
+        if not await PlayoffService.claim_round(session, tournament, tournament.group_stage_rounds + 1):
+            return 0
+
+        return await PlayoffService.create_bracket(
+            session, tournament, GroupStageService.build_bracket_order(seeds)
+        )
+
+    @staticmethod
+    async def format_group_tables(tables: Dict[int, List[tuple]], qualifiers: int) -> str:
+        """Форматирование таблиц групп (выходящие в плей-офф отмечены)"""
+        if not tables:
+            return "📊 <b>Групповой этап</b>\n\nУчастников пока нет."
+
+        text = "📊 <b>Групповой этап</b>\n\n"
+        for group_number in sorted(tables, key=lambda g: (g is None, g or 0)):
+            name = GroupStageService.get_group_name(group_number) if group_number is not None else "—"
+            text += f"<b>Группа {name}</b>\n<pre>"
+            text += "№  Игрок       М  О  Г\n"
+
+            for i, (participant, user) in enumerate(tables[group_number], 1):
+                player = (f"@{user.username}" if user.username else user.full_name)[:10].ljust(10)
+                mark = "✓" if i <= qualifiers else " "
+                goals = f"{participant.goals_for}:{participant.goals_against}"
+                text += (
+                    f"{str(i).rjust(2)}{mark}{player} "
+                    f"{str(participant.matches_played).rjust(2)} "
+                    f"{str(participant.points).rjust(2)} {goals}\n"
+                )
+            text += "</pre>\n"
+
+        text += "<i>✓ - выход в плей-офф</i>"
+        return text
@@ -194,4 +194,28 @@ def format_tournament_format(format_type: str) -> str:
         "swiss": "🎲 Швейцарская система"
     }
     
-    return formats.get(format_type, "❓ Неизвестный формат")
\ No newline at end of file
+    return formats.get(format_type, "❓ Неизвестный формат")
+
+
+def parse_tournament_list_callback(data: str, prefix: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Разбор callback списка турниров: {prefix}, {prefix}_{фильтр}, {prefix}_{фильтр}_n{id} / _p{id}
+    
+    Args:
+        data: callback_data
+        prefix: Префикс списка ("tournaments" или "admin_tournaments")
+    
+    Returns:
+        (фильтр статуса или "all", after_id, before_id)
+    """
+    parts = data[len(prefix) + 1:].split("_") if data.startswith(prefix + "_") else []
+    status_filter = parts[0] if parts and parts[0] in ("registration", "active", "finished") else "all"
+    after_id = before_id = None
+    
+    if len(parts) > 1 and parts[1][1:].isdigit():
+        if parts[1][0] == "n":
+            after_id = int(parts[1][1:])
+        elif parts[1][0] == "p":
+            before_id = int(parts[1][1:])
+    
+    return status_filter, after_id, before_id
@@ -31,7 +31,8 @@ class MaintenanceMiddleware(BaseMiddleware):
         if not user_id:
             return await handler(event, data)
         
-        # Проверяем статус техобслуживания
+        # Проверяем статус техобслуживания (сессия закрывается до вызова хендлера,
+        # иначе каждое обновление занимало бы два соединения пула)
         async with async_session_maker() as session:
             # Получаем настройку техобслуживания
             result = await session.execute(
@@ -40,18 +41,20 @@ class MaintenanceMiddleware(BaseMiddleware):
             maintenance_setting = result.scalar_one_or_none()
             
             # Если техобслуживание не включено, пропускаем
-            if not maintenance_setting or maintenance_setting.value != "true":
-                return await handler(event, data)
+            allowed = not maintenance_setting or maintenance_setting.value != "true"
             
-            # Проверяем права пользователя
-            result = await session.execute(
-                select(User).where(User.id == user_id)
-            )
-            user = result.scalar_one_or_none()
-            
-            # Пропускаем администраторов и тестеров
-            if user and (user.is_admin or user.is_tester):
-                return await handler(event, data)
+            if not allowed:
+                # Проверяем права пользователя
+                result = await session.execute(
+                    select(User).where(User.id == user_id)
+                )
+                user = result.scalar_one_or_none()
+                
+                # Пропускаем администраторов и тестеров
+                allowed = bool(user and (user.is_admin or user.is_tester))
+        
+        if allowed:
+            return await handler(event, data)
         
         # Блокируем обычных пользователей
         maintenance_message = (
@@ -5,20 +5,107 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from database.models import Match, MatchStatus, User
 from database.engine import async_session_maker
 from services.schedule import ScheduleService
 from services.rating import RatingService
 from services.tournament import TournamentService
 from services.notifications import NotificationService
-from keyboards.user_kb import get_round_selection_keyboard, get_back_button
+from services.playoff import PlayoffService
+from services.standings import StandingsService
+from services.summary import SummaryService
+from services.archive import ArchiveService
+from services.dashboard import DashboardService
+from services.outbox import OutboxService
+from keyboards.user_kb import get_round_selection_keyboard, get_my_matches_keyboard, get_back_button
 from states.states import MatchReport
 from datetime import datetime
+import re
 
 router = Router()
 
+# Счёт "3:2" или "3 : 2", в плей-офф - с серией пенальти: "2:2 (4:3)" / "2:2 4:3"
+SCORE_PATTERN = re.compile(r"^\s*(\d+)\s*:\s*(\d+)(?:(?:\s+\(?|\s*\()\s*(\d+)\s*:\s*(\d+)\s*\)?)?\s*$")
+
+# ================== МОИ МАТЧИ ==================
+
+@router.callback_query(F.data == "my_matches")
+async def my_matches(callback: CallbackQuery):
+    """Открытые матчи игрока во всех турнирах"""
+    user_id = callback.from_user.id
+    
+    async with async_session_maker() as session:
+        rows = await DashboardService.get_open_matches(session, user_id)
+    
+    await callback.message.edit_text(
+        DashboardService.format_dashboard(rows, user_id),
+        reply_markup=get_my_matches_keyboard(rows),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("report_open_"))
+async def report_open_match(callback: CallbackQuery, state: FSMContext):
+    """Внесение результата в один нажим из "Мои матчи" """
+    match_id = int(callback.data.split("_")[2])
+    user_id = callback.from_user.id
+    
+    async with async_session_maker() as session:
+        match = await session.get(Match, match_id)
+        
+        if (
+            not match
+            or user_id not in (match.player1_id, match.player2_id)
+            or match.status != MatchStatus.SCHEDULED
+            or not match.deadline_set
+        ):
+            DashboardService.invalidate(user_id)
+            await callback.answer("Матч не найден или результат уже внесён.", show_alert=True)
+            return
+        
+        await start_score_entry(callback, state, session, match, user_id)
+
 # ================== ВНЕСЕНИЕ РЕЗУЛЬТАТА ==================
 
+async def start_score_entry(
+    callback: CallbackQuery,
+    state: FSMContext,
+    session,
+    match: Match,
+    user_id: int
+):
+    """Запрос счёта матча: соперник, дедлайн, формат ввода"""
+    opponent_id = match.player2_id if match.player1_id == user_id else match.player1_id
+    opponent = await session.get(User, opponent_id)
+    opponent_name = f"@{opponent.username}" if opponent.username else opponent.full_name
+    
+    # Дедлайн
+    deadline_msk = ScheduleService.utc_to_msk(match.deadline)
+    deadline_str = deadline_msk.strftime("%d.%m.%Y %H:%M")
+    
+    text = (
+        f"⚔️ <b>Тур {match.round_number}</b>\n\n"
+        f"Ваш соперник: {opponent_name}\n"
+        f"⏰ Дедлайн: {deadline_str} МСК\n\n"
+        f"Введите счёт матча в формате:\n"
+        f"<code>ВашиГолы:ГолыСоперника</code>\n\n"
+        f"Например: <code>3:2</code>"
+    )
+    
+    if PlayoffService.is_knockout_match(match):
+        text += (
+            "\n\n🏆 Матч плей-офф: при ничьей укажите серию пенальти,\n"
+            "например: <code>2:2 (4:3)</code>"
+        )
+    
+    # Сохраняем ID матча в состояние
+    await state.update_data(match_id=match.id)
+    await state.set_state(MatchReport.enter_score)
+    
+    await callback.message.edit_text(text, parse_mode="HTML")
+    await callback.answer()
+
 @router.callback_query(F.data.startswith("report_match_"))
 async def start_match_report(callback: CallbackQuery):
     """Начало процесса внесения результата - выбор тура"""
@@ -66,48 +153,23 @@ async def select_round_for_report(callback: CallbackQuery, state: FSMContext):
             )
             return
         
-        # Получение информации о сопернике
-        opponent_id = match.player2_id if match.player1_id == user_id else match.player1_id
-        opponent_result = await session.execute(
-            select(User).where(User.id == opponent_id)
-        )
-        opponent = opponent_result.scalar_one()
-        opponent_name = f"@{opponent.username}" if opponent.username else opponent.full_name
-        
-        # Дедлайн
-        deadline_msk = ScheduleService.utc_to_msk(match.deadline)
-        deadline_str = deadline_msk.strftime("%d.%m.%Y %H:%M")
-        
-        text = (
-            f"⚔️ <b>Тур {round_number}</b>\n\n"
-            f"Ваш соперник: {opponent_name}\n"
-            f"⏰ Дедлайн: {deadline_str} МСК\n\n"
-            f"Введите счёт матча в формате:\n"
-            f"<code>ВашиГолы:ГолыСоперника</code>\n\n"
-            f"Например: <code>3:2</code>"
-        )
-        
-        # Сохраняем ID матча в состояние
-        await state.update_data(match_id=match.id)
-        await state.set_state(MatchReport.enter_score)
-        
-        await callback.message.edit_text(text, parse_mode="HTML")
-        await callback.answer()
+        await start_score_entry(callback, state, session, match, user_id)
 
 @router.message(MatchReport.enter_score)
-async def enter_match_score(message: Message, state: FSMContext, bot):
+async def enter_match_score(message: Message, state: FSMContext):
     """Ввод счёта матча"""
     try:
-        # Парсинг счёта
-        score_parts = message.text.strip().split(":")
-        if len(score_parts) != 2:
+        # Парсинг счёта (и серии пенальти для плей-офф: "2:2 (4:3)")
+        parsed = SCORE_PATTERN.match(message.text or "")
+        if not parsed:
             raise ValueError
         
-        score1 = int(score_parts[0])
-        score2 = int(score_parts[1])
+        score1 = int(parsed.group(1))
+        score2 = int(parsed.group(2))
         
-        if score1 < 0 or score2 < 0:
-            raise ValueError
+        tiebreak = None
+        if parsed.group(3) is not None:
+            tiebreak = (int(parsed.group(3)), int(parsed.group(4)))
         
         data = await state.get_data()
         match_id = data.get("match_id")
@@ -118,26 +180,43 @@ async def enter_match_score(message: Message, state: FSMContext, bot):
             )
             match = result.scalar_one()
             
+            # В плей-офф ничья требует победителя в серии пенальти
+            knockout_draw = PlayoffService.is_knockout_match(match) and score1 == score2
+            if knockout_draw and (tiebreak is None or tiebreak[0] == tiebreak[1]):
+                await message.answer(
+                    "❌ В плей-офф нужен победитель!\n"
+                    "Укажите серию пенальти после счёта, например: <code>2:2 (4:3)</code>",
+                    parse_mode="HTML"
+                )
+                return
+            if not knockout_draw:
+                tiebreak = (None, None)
+            
             # Определение, кто играл первым
             if match.player1_id == message.from_user.id:
                 match.player1_score = score1
                 match.player2_score = score2
+                match.player1_tiebreak, match.player2_tiebreak = tiebreak
                 opponent_id = match.player2_id
             else:
                 match.player1_score = score2
                 match.player2_score = score1
+                match.player2_tiebreak, match.player1_tiebreak = tiebreak
                 opponent_id = match.player1_id
             
             match.status = MatchStatus.PENDING
             match.reported_by = message.from_user.id
             match.played_at = datetime.utcnow()
             
-            await session.commit()
-            
-            # Уведомление сопернику
+            # Уведомление сопернику - в той же транзакции, что и результат
             await NotificationService.notify_match_confirmation_request(
-                bot, session, match, opponent_id
+                session, match, opponent_id
             )
+            
+            await session.commit()
+            OutboxService.wake()
+            ScheduleService.touch_round(match.tournament_id, match.round_number)
+            DashboardService.invalidate(match.player1_id, match.player2_id)
         
         await message.answer(
             "✅ Результат внесён!\n"
@@ -157,7 +236,7 @@ async def enter_match_score(message: Message, state: FSMContext, bot):
 # ================== ПОДТВЕРЖДЕНИЕ РЕЗУЛЬТАТА ==================
 
 @router.callback_query(F.data.startswith("confirm_match_"))
-async def confirm_match_result(callback: CallbackQuery, bot):
+async def confirm_match_result(callback: CallbackQuery):
     """Подтверждение результата матча"""
     match_id = int(callback.data.split("_")[2])
     
@@ -171,7 +250,8 @@ async def confirm_match_result(callback: CallbackQuery, bot):
             await callback.answer("Матч не найден или уже обработан.", show_alert=True)
             return
         
-        # Подтверждение матча
+        # Подтверждение матча: статус, статистика, рейтинг, следующий тур и
+        # уведомления - одной транзакцией
         match.status = MatchStatus.CONFIRMED
         match.confirmed_at = datetime.utcnow()
         
@@ -207,21 +287,41 @@ async def confirm_match_result(callback: CallbackQuery, bot):
         # Обновление рейтинга
         await RatingService.update_match_stats(session, match)
         
-        await session.commit()
-        
-        # Уведомления
-        await NotificationService.notify_match_confirmed(bot, session, match)
+        try:
+            # Плей-офф / швейцарская система: создание следующего тура
+            created = await TournamentService.on_match_finished(session, match)
+            
+            # Уведомления
+            await NotificationService.notify_match_confirmed(session, match)
+            
+            with StandingsService.updating(match.tournament_id), SummaryService.updating(match.tournament_id):
+                await session.commit()
+                StandingsService.on_match_confirmed(match)
+                if created:
+                    # Новый тур меняет число матчей и текущий тур
+                    SummaryService.invalidate(match.tournament_id)
+                else:
+                    SummaryService.on_match_confirmed(match)
+        except IntegrityError:
+            # Тур уже создан параллельным подтверждением - откат всего подтверждения,
+            # матч остаётся ожидающим, повторное нажатие его подтвердит
+            await session.rollback()
+            await callback.answer("Тур обновляется, подтвердите результат ещё раз.", show_alert=True)
+            return
+        OutboxService.wake()
+        ScheduleService.touch_round(match.tournament_id, match.round_number)
+        DashboardService.invalidate(match.player1_id, match.player2_id)
         
         await callback.message.edit_text(
             "✅ <b>Результат подтверждён!</b>\n\n"
-            f"Счёт: {match.player1_score}:{match.player2_score}\n"
+            f"Счёт: {PlayoffService.format_score(match)}\n"
             "Рейтинг обновлён.",
             parse_mode="HTML"
         )
         await callback.answer("Результат подтверждён!", show_alert=True)
 
 @router.callback_query(F.data.startswith("dispute_match_"))
-async def dispute_match_result(callback: CallbackQuery, bot):
+async def dispute_match_result(callback: CallbackQuery):
     """Оспаривание результата матча"""
     match_id = int(callback.data.split("_")[2])
     
@@ -237,14 +337,18 @@ async def dispute_match_result(callback: CallbackQuery, bot):
         
         # Оспаривание
         match.status = MatchStatus.DISPUTED
-        await session.commit()
         
         # Уведомление администраторов
         from config import config
         await NotificationService.notify_match_disputed(
-            bot, session, match, config.ADMIN_IDS
+            session, match, config.ADMIN_IDS
         )
         
+        await session.commit()
+        OutboxService.wake()
+        ScheduleService.touch_round(match.tournament_id, match.round_number)
+        DashboardService.invalidate(match.player1_id, match.player2_id)
+        
         await callback.message.edit_text(
             "⚠️ <b>Результат оспорен</b>\n\n"
             "Администратор рассмотрит вашу жалобу.",
@@ -263,6 +367,9 @@ async def show_match_history(callback: CallbackQuery):
         matches = await ScheduleService.get_user_matches(
             session, user_id, status=MatchStatus.CONFIRMED
         )
+        # Завершённые турниры - из архива
+        matches = list(matches) + await ArchiveService.get_user_history(session, user_id, 15)
+        matches.sort(key=lambda m: m.confirmed_at or datetime.min, reverse=True)
         
         if not matches:
             text = "📜 <b>История матчей</b>\n\nУ этого игрока пока нет завершённых матчей."
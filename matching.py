@@ -0,0 +1,392 @@
+"""
+T-League Bot - Паросочетание максимального веса (алгоритм Эдмондса, "цветки")
+"""
+from typing import List, Optional, Tuple
+
+
+def max_weight_matching(
+    edges: List[Tuple[int, int, int]],
+    max_cardinality: bool = False
+) -> List[int]:
+    """
+    Паросочетание максимального веса в произвольном графе за O(n^3).
+    edges - рёбра (i, j, вес) с целыми весами, вершины - 0..n-1.
+    max_cardinality - сначала максимальное число пар, среди таких - максимальный вес.
+    Возвращает mate: mate[v] - пара вершины v или -1.
+
+    Прямо-двойственный метод Эдмондса-Галила: метки S/T на чередующемся лесу,
+    нечётные циклы сжимаются в "цветки", двойственные переменные меняются на
+    наименьшую допустимую величину delta. При целых весах вычисления целочисленные.
+    """
+    if not edges:
+        return []
+
+    edge_count = len(edges)
+    n = 0
+    for i, j, _ in edges:
+        n = max(n, i + 1, j + 1)
+    max_weight = max(0, max(w for _, _, w in edges))
+
+    # Концы рёбер: endpoint[2k] и endpoint[2k + 1] - вершины ребра k
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * edge_count)]
+    # neighbend[v] - концы рёбер, смежных с v, на стороне соседа
+    neighbend: List[List[int]] = [[] for _ in range(n)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    # mate[v] - конец ребра пары на стороне соседа
+    mate = [-1] * n
+    # Метки вершин и верхних цветков: 0 - нет, 1 - S, 2 - T
+    label = [0] * (2 * n)
+    labelend = [-1] * (2 * n)
+    inblossom = list(range(n))
+    blossomparent = [-1] * (2 * n)
+    blossomchilds: List[Optional[List[int]]] = [None] * (2 * n)
+    blossombase = list(range(n)) + [-1] * n
+    blossomendps: List[Optional[List[int]]] = [None] * (2 * n)
+    bestedge = [-1] * (2 * n)
+    blossombestedges: List[Optional[List[int]]] = [None] * (2 * n)
+    unusedblossoms = list(range(n, 2 * n))
+    dualvar = [max_weight] * n + [0] * n
+    allowedge = [False] * edge_count
+    queue: List[int] = []
+
+    def slack(k: int) -> int:
+        i, j, w = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * w
+
+    def blossom_leaves(b: int) -> List[int]:
+        if b < n:
+            return [b]
+        leaves = []
+        stack = [b]
+        while stack:
+            t = stack.pop()
+            if t < n:
+                leaves.append(t)
+            else:
+                stack.extend(blossomchilds[t])
+        return leaves
+
+    def assign_label(w: int, t: int, p: int):
+        while True:
+            b = inblossom[w]
+            label[w] = label[b] = t
+            labelend[w] = labelend[b] = p
+            bestedge[w] = bestedge[b] = -1
+            if t == 1:
+                queue.extend(blossom_leaves(b))
+                return
+            # Вершина T: её пара по базе цветка становится S
+            base = blossombase[b]
+            w, t, p = endpoint[mate[base]], 1, mate[base] ^ 1
+
+    def scan_blossom(v: int, w: int) -> int:
+        """Ищет общего предка v и w в лесу: база нового цветка или -1 (увеличивающий путь)"""
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base: int, k: int):
+        v, w, _ = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+
+        # Лучшие рёбра нового цветка к соседним S-цветкам
+        bestedgeto = {}
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, _ = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if (bj != b and label[bj] == 1
+                            and (bj not in bestedgeto or slack(k) < slack(bestedgeto[bj]))):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = list(bestedgeto.values())
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b: int, endstage: bool):
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < n:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+
+        if not endstage and label[b] == 2:
+            # Цветок T раскрывается посреди этапа: метки переносятся на путь внутри него
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                labeled = next((v for v in blossom_leaves(bv) if label[v] != 0), None)
+                if labeled is not None:
+                    label[labeled] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(labeled, 2, labelend[labeled])
+                j += jstep
+
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b: int, v: int):
+        """Меняет пары вдоль чётного пути от v до базы цветка b; v становится базой"""
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= n:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= n:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= n:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k: int):
+        """Меняет пары вдоль увеличивающего пути через ребро k"""
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= n:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= n:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    # Каждый этап либо увеличивает паросочетание на одно ребро, либо завершает алгоритм
+    for _ in range(n):
+        label[:] = [0] * (2 * n)
+        bestedge[:] = [-1] * (2 * n)
+        blossombestedges[n:] = [None] * n
+        allowedge[:] = [False] * edge_count
+        queue[:] = []
+        for v in range(n):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+            if augmented:
+                break
+
+            # Шаг двойственных переменных: наименьшая из четырёх допустимых величин
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+            if not max_cardinality:
+                deltatype = 1
+                delta = min(dualvar[:n])
+            for v in range(n):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+            for b in range(2 * n):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    d = slack(bestedge[b]) // 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+            for b in range(n, 2 * n):
+                if (blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2
+                        and (deltatype == -1 or dualvar[b] < delta)):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+            if deltatype == -1:
+                # Увеличивающих путей больше нет
+                deltatype = 1
+                delta = max(0, min(dualvar[:n]))
+
+            for v in range(n):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(n, 2 * n):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                i, j, _ = edges[deltaedge]
+                queue.append(i)
+            else:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        # Цветки S с нулевой двойственной переменной раскрываются в конце этапа
+        for b in range(n, 2 * n):
+            if (blossomparent[b] == -1 and blossombase[b] >= 0
+                    and label[b] == 1 and dualvar[b] == 0):
+                expand_blossom(b, True)
+
+    for v in range(n):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+    return mate
@@ -0,0 +1,160 @@
+"""
+Скрипт миграции базы данных T-League Bot
+Добавляет недостающие поля и индексы в существующую БД.
+Новые таблицы создаются автоматически при запуске бота (init_db).
+Запустите ОДИН РАЗ после обновления, перед запуском бота!
+"""
+import sqlite3
+import os
+
+DB_PATH = "database/t_league.db"
+
+# Недостающие поля: таблица -> {поле: определение}
+NEEDED_FIELDS = {
+    'users': {
+        'is_reachable': 'BOOLEAN DEFAULT 1',
+        'unreachable_since': 'DATETIME',
+    },
+    'tournaments': {
+        'registration_open': 'BOOLEAN DEFAULT 0',
+        'participants_count': 'INTEGER DEFAULT 0',
+        'draw_completed': 'BOOLEAN DEFAULT 0',
+        'total_rounds': 'INTEGER DEFAULT 0',
+        'fixture_mode': "VARCHAR(5) DEFAULT 'EAGER'",
+        'seeding_mode': "VARCHAR(8) DEFAULT 'RATING'",
+        'seed_order': 'TEXT',
+        'meetings_count': 'INTEGER DEFAULT 1',
+        'groups_count': 'INTEGER DEFAULT 0',
+        'group_qualifiers': 'INTEGER DEFAULT 0',
+        'group_stage_rounds': 'INTEGER DEFAULT 0',
+        'last_snapshot_round': 'INTEGER DEFAULT 0',
+        'deleted_at': 'DATETIME',
+        'archived_at': 'DATETIME',
+    },
+    'tournament_participants': {
+        'byes': 'INTEGER DEFAULT 0',
+        'group_number': 'INTEGER',
+    },
+    'matches': {
+        'deadline_set': 'BOOLEAN DEFAULT 0',
+        'bracket_slot': 'INTEGER',
+        'player1_tiebreak': 'INTEGER',
+        'player2_tiebreak': 'INTEGER',
+    },
+    'notification_outbox': {
+        'digest': 'BOOLEAN DEFAULT 0',
+    },
+}
+
+# Очистка данных, без которой не создать уникальные индексы (идемпотентно)
+PRE_INDEX_FIXES = {
+    # Дубли участия от старой гонки регистрации: остаётся первая запись,
+    # participants_count пересчитывается в DATA_FIXES
+    'tournament_participants (дубли)': (
+        "DELETE FROM tournament_participants WHERE id NOT IN ("
+        "SELECT MIN(id) FROM tournament_participants GROUP BY tournament_id, user_id)"
+    ),
+}
+
+# Индексы: имя -> SQL
+NEEDED_INDEXES = {
+    'uq_tournament_participant': (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_tournament_participant "
+        "ON tournament_participants (tournament_id, user_id)"
+    ),
+    'ix_matches_tournament_round': (
+        "CREATE INDEX IF NOT EXISTS ix_matches_tournament_round "
+        "ON matches (tournament_id, round_number)"
+    ),
+    'uq_matches_bracket_slot': (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_matches_bracket_slot "
+        "ON matches (tournament_id, round_number, bracket_slot)"
+    ),
+    'ix_matches_expiry': (
+        "CREATE INDEX IF NOT EXISTS ix_matches_expiry "
+        "ON matches (status, deadline_set, deadline)"
+    ),
+    'ix_matches_player1_status': (
+        "CREATE INDEX IF NOT EXISTS ix_matches_player1_status "
+        "ON matches (player1_id, status)"
+    ),
+    'ix_matches_player2_status': (
+        "CREATE INDEX IF NOT EXISTS ix_matches_player2_status "
+        "ON matches (player2_id, status)"
+    ),
+    'ix_tournaments_status_created': (
+        "CREATE INDEX IF NOT EXISTS ix_tournaments_status_created "
+        "ON tournaments (status, created_at, id)"
+    ),
+    'ix_tournaments_created': (
+        "CREATE INDEX IF NOT EXISTS ix_tournaments_created "
+        "ON tournaments (created_at, id)"
+    ),
+    'ix_users_is_reachable': (
+        "CREATE INDEX IF NOT EXISTS ix_users_is_reachable "
+        "ON users (is_reachable)"
+    ),
+}
+
+# Заполнение новых полей по существующим данным (идемпотентно)
+DATA_FIXES = {
+    'tournaments.participants_count': (
+        "UPDATE tournaments SET participants_count = ("
+        "SELECT COUNT(*) FROM tournament_participants "
+        "WHERE tournament_participants.tournament_id = tournaments.id)"
+    ),
+}
+
+
+def migrate_database():
+    """Обновление структуры базы данных"""
+
+    if not os.path.exists(DB_PATH):
+        print("❌ База данных не найдена. Создайте её запустив бота.")
+        return
+
+    print("🔄 Начинаем миграцию базы данных...")
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        for table, fields in NEEDED_FIELDS.items():
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = {col[1] for col in cursor.fetchall()}
+
+            if not columns:
+                # Таблицы ещё нет - её создаст init_db
+                continue
+
+            for field, type_def in fields.items():
+                if field not in columns:
+                    print(f"  ➕ Добавление поля {table}.{field}...")
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {field} {type_def}")
+
+        for name, sql in PRE_INDEX_FIXES.items():
+            print(f"  🧹 Очистка {name}...")
+            cursor.execute(sql)
+            if cursor.rowcount > 0:
+                print(f"     удалено строк: {cursor.rowcount}")
+
+        for name, sql in NEEDED_INDEXES.items():
+            print(f"  ➕ Индекс {name}...")
+            cursor.execute(sql)
+
+        for name, sql in DATA_FIXES.items():
+            print(f"  🔄 Заполнение {name}...")
+            cursor.execute(sql)
+
+        conn.commit()
+        print("✅ Миграция завершена успешно!")
+        print("🚀 Теперь можете запустить бота: python bot.py")
+
+    except Exception as e:
+        print(f"❌ Ошибка миграции: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_database()
@@ -7,7 +7,7 @@ from enum import Enum
 
 from sqlalchemy import (
     BigInteger, String, Integer, Boolean, DateTime,
-    ForeignKey, Text, Float, Enum as SQLEnum
+    ForeignKey, Text, Float, UniqueConstraint, Index, Enum as SQLEnum
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -46,6 +46,19 @@ class TournamentFormat(str, Enum):
     GROUP_PLAYOFF = "group_playoff"
 
 
+class FixtureMode(str, Enum):
+    """Способ хранения расписания кругового турнира"""
+    EAGER = "eager"   # все туры создаются при жеребьёвке
+    LAZY = "lazy"     # хранится только порядок посева, туры создаются по мере открытия
+
+
+class SeedingMode(str, Enum):
+    """Посев участников при жеребьёвке"""
+    RANDOM = "random"       # случайный порядок
+    RATING = "rating"       # по рейтингу игрока
+    PREVIOUS = "previous"   # по месту в предыдущем завершённом турнире
+
+
 class MatchStatus(str, Enum):
     SCHEDULED = "scheduled"
     PENDING = "pending"
@@ -54,6 +67,19 @@ class MatchStatus(str, Enum):
     TECHNICAL = "technical"
 
 
+class BroadcastStatus(str, Enum):
+    """Статусы задания рассылки"""
+    RUNNING = "running"
+    DONE = "done"
+
+
+class OutboxStatus(str, Enum):
+    """Статусы уведомления в очереди отправки"""
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 # =====================
 # BASE
 # =====================
@@ -81,6 +107,10 @@ class User(Base):
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     is_tester: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    # Недоступен для сообщений (заблокировал бота / удалил аккаунт)
+    is_reachable: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
+    unreachable_since: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
     admin_role: Mapped[Optional[str]] = mapped_column(SQLEnum(AdminRole), nullable=True)
     granted_by: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     role_granted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -122,6 +152,11 @@ class SystemSettings(Base):
 
 class Tournament(Base):
     __tablename__ = "tournaments"
+    __table_args__ = (
+        # Постраничный список: вкладка статуса и общий список, новые сверху
+        Index("ix_tournaments_status_created", "status", "created_at", "id"),
+        Index("ix_tournaments_created", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255))
@@ -130,9 +165,20 @@ class Tournament(Base):
     status: Mapped[str] = mapped_column(SQLEnum(TournamentStatus), default=TournamentStatus.REGISTRATION)
     registration_open: Mapped[bool] = mapped_column(Boolean, default=False)
     max_participants: Mapped[Optional[int]] = mapped_column(Integer)
+    participants_count: Mapped[int] = mapped_column(Integer, default=0)
     current_round: Mapped[int] = mapped_column(Integer, default=0)
     total_rounds: Mapped[int] = mapped_column(Integer, default=0)
     draw_completed: Mapped[bool] = mapped_column(Boolean, default=False)
+    fixture_mode: Mapped[str] = mapped_column(SQLEnum(FixtureMode), default=FixtureMode.EAGER)
+    seeding_mode: Mapped[str] = mapped_column(SQLEnum(SeedingMode), default=SeedingMode.RATING)
+    seed_order: Mapped[Optional[str]] = mapped_column(Text)  # JSON-список user_id в порядке посева
+    meetings_count: Mapped[int] = mapped_column(Integer, default=1)
+    groups_count: Mapped[int] = mapped_column(Integer, default=0)
+    group_qualifiers: Mapped[int] = mapped_column(Integer, default=0)
+    group_stage_rounds: Mapped[int] = mapped_column(Integer, default=0)
+    last_snapshot_round: Mapped[int] = mapped_column(Integer, default=0)
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Скрыт, ожидает очистки
+    archived_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Матчи и участники в архиве
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
@@ -144,6 +190,9 @@ class Tournament(Base):
 
 class TournamentParticipant(Base):
     __tablename__ = "tournament_participants"
+    __table_args__ = (
+        UniqueConstraint("tournament_id", "user_id", name="uq_tournament_participant"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"))
@@ -156,6 +205,8 @@ class TournamentParticipant(Base):
     losses: Mapped[int] = mapped_column(Integer, default=0)
     goals_for: Mapped[int] = mapped_column(Integer, default=0)
     goals_against: Mapped[int] = mapped_column(Integer, default=0)
+    byes: Mapped[int] = mapped_column(Integer, default=0)  # свободные туры (швейцарская система)
+    group_number: Mapped[Optional[int]] = mapped_column(Integer)  # группа (формат "группы + плей-офф")
 
     registered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
@@ -165,6 +216,14 @@ class TournamentParticipant(Base):
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_tournament_round", "tournament_id", "round_number"),
+        Index("ix_matches_expiry", "status", "deadline_set", "deadline"),
+        Index("ix_matches_player1_status", "player1_id", "status"),
+        Index("ix_matches_player2_status", "player2_id", "status"),
+        # Пара сетки в туре одна (у матчей вне сетки bracket_slot - NULL)
+        Index("uq_matches_bracket_slot", "tournament_id", "round_number", "bracket_slot", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"))
@@ -185,6 +244,11 @@ class Match(Base):
     confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     reported_by: Mapped[Optional[int]] = mapped_column(BigInteger)
 
+    # Плей-офф: номер пары в туре сетки и серия пенальти при ничьей
+    bracket_slot: Mapped[Optional[int]] = mapped_column(Integer)
+    player1_tiebreak: Mapped[Optional[int]] = mapped_column(Integer)
+    player2_tiebreak: Mapped[Optional[int]] = mapped_column(Integer)
+
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     tournament = relationship("Tournament", back_populates="matches")
@@ -192,6 +256,86 @@ class Match(Base):
     player2 = relationship("User", foreign_keys=[player2_id], back_populates="away_matches")
 
 
+class PlayoffSlot(Base):
+    """Позиция игрока в сетке плей-офф: тур + номер позиции (пара = позиции 2k и 2k+1)"""
+    __tablename__ = "playoff_slots"
+    __table_args__ = (
+        UniqueConstraint("tournament_id", "round_number", "position"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"), index=True)
+    round_number: Mapped[int] = mapped_column(Integer)
+    position: Mapped[int] = mapped_column(Integer)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
+
+
+class StandingsSnapshot(Base):
+    """Строка таблицы после завершения тура"""
+    __tablename__ = "standings_snapshots"
+    __table_args__ = (
+        Index("ix_standings_snapshots_round", "tournament_id", "round_number"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"))
+    round_number: Mapped[int] = mapped_column(Integer)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
+    position: Mapped[int] = mapped_column(Integer)
+    points: Mapped[int] = mapped_column(Integer, default=0)
+    matches_played: Mapped[int] = mapped_column(Integer, default=0)
+    goals_for: Mapped[int] = mapped_column(Integer, default=0)
+    goals_against: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ArchivedMatch(Base):
+    """Матч завершённого турнира (архив: только результат, без дедлайнов)"""
+    __tablename__ = "archived_matches"
+    __table_args__ = (
+        Index("ix_archived_matches_player1", "player1_id", "confirmed_at"),
+        Index("ix_archived_matches_player2", "player2_id", "confirmed_at"),
+        Index("ix_archived_matches_tournament_round", "tournament_id", "round_number"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)  # id исходного матча
+    tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"))
+    round_number: Mapped[int] = mapped_column(Integer)
+    player1_id: Mapped[int] = mapped_column(BigInteger)
+    player2_id: Mapped[int] = mapped_column(BigInteger)
+    player1_score: Mapped[Optional[int]] = mapped_column(Integer)
+    player2_score: Mapped[Optional[int]] = mapped_column(Integer)
+    player1_tiebreak: Mapped[Optional[int]] = mapped_column(Integer)
+    player2_tiebreak: Mapped[Optional[int]] = mapped_column(Integer)
+    bracket_slot: Mapped[Optional[int]] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(SQLEnum(MatchStatus))
+    played_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class ArchivedParticipant(Base):
+    """Итоговая строка участника завершённого турнира (position - место в итоговой таблице)"""
+    __tablename__ = "archived_participants"
+    __table_args__ = (
+        Index("ix_archived_participants_position", "tournament_id", "position"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tournament_id: Mapped[int] = mapped_column(ForeignKey("tournaments.id"))
+    user_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    points: Mapped[int] = mapped_column(Integer, default=0)
+    matches_played: Mapped[int] = mapped_column(Integer, default=0)
+    wins: Mapped[int] = mapped_column(Integer, default=0)
+    draws: Mapped[int] = mapped_column(Integer, default=0)
+    losses: Mapped[int] = mapped_column(Integer, default=0)
+    goals_for: Mapped[int] = mapped_column(Integer, default=0)
+    goals_against: Mapped[int] = mapped_column(Integer, default=0)
+    byes: Mapped[int] = mapped_column(Integer, default=0)
+    group_number: Mapped[Optional[int]] = mapped_column(Integer)
+    registered_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
 class TournamentRecord(Base):
     __tablename__ = "tournament_records"
 
@@ -233,6 +377,59 @@ class TesterAccessLog(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+# =====================
+# NOTIFICATIONS
+# =====================
+
+class BroadcastJob(Base):
+    """Задание массовой рассылки с курсором по user_id (продолжается после перезапуска)"""
+    __tablename__ = "broadcast_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    text: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(SQLEnum(BroadcastStatus), default=BroadcastStatus.RUNNING, index=True)
+    created_by: Mapped[int] = mapped_column(BigInteger)
+
+    # Сообщение администратора с прогрессом
+    progress_chat_id: Mapped[Optional[int]] = mapped_column(BigInteger)
+    progress_message_id: Mapped[Optional[int]] = mapped_column(Integer)
+
+    cursor_user_id: Mapped[int] = mapped_column(BigInteger, default=0)  # последний обработанный получатель
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class NotificationOutbox(Base):
+    """
+    Очередь уведомлений (outbox): строка пишется в той же транзакции,
+    что и изменение матча, и доставляется фоновым обработчиком.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_due", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    text: Mapped[str] = mapped_column(Text)
+    reply_markup: Mapped[Optional[str]] = mapped_column(Text)  # InlineKeyboardMarkup в JSON
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(128), unique=True)
+    # Несрочное: объединяется с другими несрочными того же чата в одно сообщение
+    digest: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    status: Mapped[str] = mapped_column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
 # =====================
 # MARKETPLACE
 # =====================
@@ -4,154 +4,265 @@ T-League Bot - Сервис уведомлений
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database.models import Match, User, MatchStatus
+from database.models import Match, User, Tournament, MatchStatus
 from datetime import datetime, timedelta
 from config import config
-from typing import List
+from middlewares.ratelimit import bulk_priority
+from services.outbox import OutboxService
+from services.playoff import PlayoffService
+from services.reachability import ReachabilityService
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
 
 class NotificationService:
     """Сервис управления уведомлениями"""
     
     @staticmethod
-    async def notify_match_created(
+    async def send_each(
+        bot: Bot,
+        messages: Iterable[Tuple[int, str]],
+        on_result: Optional[Callable[[int, bool], None]] = None,
+        **kwargs
+    ) -> Tuple[int, int]:
+        """
+        Отправка персональных сообщений: пары (user_id, текст).
+        До config.NOTIFY_CONCURRENCY запросов выполняются одновременно; темп,
+        очередь за интерактивными ответами и повторы после 429 обеспечивает
+        RateLimitMiddleware сессии бота (запросы идут с приоритетом bulk).
+        on_result(user_id, успех) вызывается по мере отправки каждому получателю.
+        Заблокировавшие бота отмечаются недоступными (ReachabilityService).
+        Возвращает (отправлено, ошибок).
+        """
+        kwargs.setdefault("parse_mode", "HTML")
+        semaphore = asyncio.Semaphore(max(config.NOTIFY_CONCURRENCY, 1))
+        dead: List[int] = []
+        
+        async def send(user_id: int, text: str) -> bool:
+            async with semaphore:
+                try:
+                    await bot.send_message(user_id, text, **kwargs)
+                    ok = True
+                except Exception as e:
+                    if ReachabilityService.is_dead_recipient(e):
+                        dead.append(user_id)
+                    else:
+                        print(f"Failed to send notification to {user_id}: {e}")
+                    ok = False
+            if on_result:
+                on_result(user_id, ok)
+            return ok
+        
+        with bulk_priority():
+            results = await asyncio.gather(*(send(user_id, text) for user_id, text in messages))
+        await ReachabilityService.mark_unreachable(dead)
+        sent = sum(results)
+        return sent, len(results) - sent
+    
+    @staticmethod
+    async def send_many(
         bot: Bot,
+        user_ids: Iterable[int],
+        text: str,
+        on_result: Optional[Callable[[int, bool], None]] = None,
+        **kwargs
+    ) -> Tuple[int, int]:
+        """Рассылка одного сообщения списку пользователей (см. send_each)"""
+        return await NotificationService.send_each(
+            bot, ((user_id, text) for user_id in user_ids), on_result, **kwargs
+        )
+    
+    @staticmethod
+    async def _load_players(session: AsyncSession, matches: List[Match]) -> Dict[int, User]:
+        """Все игроки пачки матчей одним запросом: user_id -> User"""
+        player_ids = {match.player1_id for match in matches} | {match.player2_id for match in matches}
+        if not player_ids:
+            return {}
+        result = await session.execute(select(User).where(User.id.in_(player_ids)))
+        return {user.id: user for user in result.scalars().all()}
+    
+    @staticmethod
+    def _render_for_players(
+        matches: List[Match],
+        players: Dict[int, User],
+        render: Callable[[Match, User], str],
+        event: Callable[[Match], str]
+    ) -> List[Tuple[int, str, str]]:
+        """Сообщения обоим игрокам каждого матча: (user_id, текст, ключ); недоступные пропускаются"""
+        messages = []
+        for match in matches:
+            for player_id, opponent_id in (
+                (match.player1_id, match.player2_id),
+                (match.player2_id, match.player1_id)
+            ):
+                player = players.get(player_id)
+                opponent = players.get(opponent_id)
+                if not player or not opponent or not player.is_reachable:
+                    continue
+                messages.append((
+                    player_id,
+                    render(match, opponent),
+                    f"match:{match.id}:{event(match)}:{player_id}"
+                ))
+        return messages
+    
+    @staticmethod
+    async def notify_matches_created(
         session: AsyncSession,
-        match: Match
+        matches: List[Match]
     ):
-        """Уведомление игроков о создании матча"""
-        # Получение информации об игроках
-        result = await session.execute(
-            select(User).where(User.id.in_([match.player1_id, match.player2_id]))
-        )
-        players = result.scalars().all()
-        
-        for player in players:
-            opponent_id = match.player2_id if player.id == match.player1_id else match.player1_id
-            opponent_result = await session.execute(
-                select(User).where(User.id == opponent_id)
-            )
-            opponent = opponent_result.scalar_one()
-            
+        """
+        Уведомление игроков о новых матчах (все игроки - одним запросом).
+        Несрочное: ставится в очередь сводок текущей транзакции.
+        """
+        def render(match: Match, opponent: User) -> str:
             opponent_name = opponent.username if opponent.username else opponent.full_name
             deadline_str = match.deadline.strftime("%d.%m.%Y %H:%M")
-            
-            message = (
+            return (
                 f"⚔️ <b>Новый матч!</b>\n\n"
                 f"Вам назначен матч против <b>{opponent_name}</b>\n"
                 f"⏰ Дедлайн: {deadline_str}\n\n"
                 f"Не забудьте внести результат до истечения дедлайна!"
             )
-            
-            try:
-                await bot.send_message(player.id, message, parse_mode="HTML")
-            except Exception as e:
-                # Логирование ошибки
-                print(f"Failed to send notification to {player.id}: {e}")
+        
+        players = await NotificationService._load_players(session, matches)
+        await OutboxService.enqueue_digest(
+            session,
+            NotificationService._render_for_players(matches, players, render, lambda match: "created")
+        )
     
     @staticmethod
-    async def notify_deadline_approaching(
-        bot: Bot,
+    async def notify_match_created(
         session: AsyncSession,
-        match: Match,
-        hours_left: int
+        match: Match
     ):
-        """Уведомление о приближающемся дедлайне"""
-        result = await session.execute(
-            select(User).where(User.id.in_([match.player1_id, match.player2_id]))
-        )
-        players = result.scalars().all()
+        """Уведомление игроков о создании матча"""
+        await NotificationService.notify_matches_created(session, [match])
+    
+    @staticmethod
+    async def notify_deadlines_approaching(
+        session: AsyncSession,
+        matches: List[Match],
+        now: Optional[datetime] = None
+    ):
+        """
+        Предупреждения о приближающемся дедлайне (все игроки - одним запросом).
+        Несрочное: ставится в очередь сводок текущей транзакции, одно на дедлайн матча.
+        """
+        now = now or datetime.utcnow()
         
-        for player in players:
-            opponent_id = match.player2_id if player.id == match.player1_id else match.player1_id
-            opponent_result = await session.execute(
-                select(User).where(User.id == opponent_id)
-            )
-            opponent = opponent_result.scalar_one()
-            
+        def render(match: Match, opponent: User) -> str:
             opponent_name = opponent.username if opponent.username else opponent.full_name
             deadline_str = match.deadline.strftime("%d.%m.%Y %H:%M")
-            
-            message = (
+            hours_left = int((match.deadline - now).total_seconds() / 3600)
+            return (
                 f"⏰ <b>Внимание! Дедлайн близко</b>\n\n"
                 f"До окончания матча против <b>{opponent_name}</b> "
                 f"осталось <b>{hours_left} часов</b>!\n\n"
                 f"⏰ Дедлайн: {deadline_str}\n"
                 f"Внесите результат, иначе будет засчитано техническое поражение."
             )
-            
-            try:
-                await bot.send_message(player.id, message, parse_mode="HTML")
-            except Exception as e:
-                print(f"Failed to send deadline warning to {player.id}: {e}")
+        
+        players = await NotificationService._load_players(session, matches)
+        await OutboxService.enqueue_digest(
+            session,
+            NotificationService._render_for_players(
+                matches, players, render,
+                lambda match: f"deadline_warning:{int(match.deadline.timestamp())}"
+            )
+        )
+    
+    @staticmethod
+    async def notify_deadline_approaching(
+        session: AsyncSession,
+        match: Match,
+        hours_left: int
+    ):
+        """Уведомление о приближающемся дедлайне"""
+        await NotificationService.notify_deadlines_approaching(
+            session, [match], match.deadline - timedelta(hours=hours_left)
+        )
+    
+    @staticmethod
+    async def notify_deadline_set(
+        session: AsyncSession,
+        player_ids: List[int],
+        tournament_id: int,
+        round_number: int,
+        deadline_msk: datetime
+    ):
+        """Уведомление участников тура об установленном дедлайне (несрочное, в очередь сводок)"""
+        message = (
+            f"⏰ <b>Установлен дедлайн!</b>\n\n"
+            f"Тур {round_number}\n"
+            f"📅 До: {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК\n\n"
+            f"Не забудьте сыграть матч и внести результат!"
+        )
+        stamp = int(deadline_msk.timestamp())
+        await OutboxService.enqueue_digest(session, [
+            (player_id, message, f"round:{tournament_id}:{round_number}:deadline:{stamp}:{player_id}")
+            for player_id in player_ids
+        ])
+    
+    @staticmethod
+    def _event_key(match: Match, event: str, recipient_id: int) -> str:
+        """Ключ дедупликации: одно событие отчёта о матче - одно уведомление получателю"""
+        reported = int(match.played_at.timestamp()) if match.played_at else 0
+        return f"match:{match.id}:{reported}:{event}:{recipient_id}"
     
     @staticmethod
     async def notify_match_confirmation_request(
-        bot: Bot,
         session: AsyncSession,
         match: Match,
         opponent_id: int
     ):
-        """Уведомление о запросе подтверждения результата"""
-        result = await session.execute(
-            select(User).where(User.id.in_([match.reported_by, opponent_id]))
-        )
-        users = {u.id: u for u in result.scalars().all()}
-        
-        reporter = users[match.reported_by]
-        opponent = users[opponent_id]
-        
+        """
+        Запрос подтверждения результата сопернику.
+        Уведомление ставится в очередь в транзакции сессии и уходит после commit.
+        """
+        reporter = await session.get(User, match.reported_by)
         reporter_name = reporter.username if reporter.username else reporter.full_name
         
         message = (
             f"📝 <b>Подтверждение результата</b>\n\n"
             f"<b>{reporter_name}</b> внёс результат матча:\n"
-            f"<b>{match.player1_score}:{match.player2_score}</b>\n\n"
+            f"<b>{PlayoffService.format_score(match)}</b>\n\n"
             f"Подтвердите результат или оспорьте его."
         )
         
-        try:
-            from keyboards.user_kb import get_match_confirmation_keyboard
-            await bot.send_message(
-                opponent_id,
-                message,
-                parse_mode="HTML",
-                reply_markup=get_match_confirmation_keyboard(match.id)
-            )
-        except Exception as e:
-            print(f"Failed to send confirmation request to {opponent_id}: {e}")
+        from keyboards.user_kb import get_match_confirmation_keyboard
+        await OutboxService.enqueue(
+            session,
+            opponent_id,
+            message,
+            reply_markup=get_match_confirmation_keyboard(match.id),
+            dedupe_key=NotificationService._event_key(match, "confirm_request", opponent_id)
+        )
     
     @staticmethod
     async def notify_match_confirmed(
-        bot: Bot,
         session: AsyncSession,
         match: Match
     ):
-        """Уведомление об подтверждении матча"""
-        result = await session.execute(
-            select(User).where(User.id.in_([match.player1_id, match.player2_id]))
+        """Уведомление игроков о подтверждении матча (через очередь сводок, в транзакции сессии)"""
+        message = (
+            f"✅ <b>Матч подтверждён!</b>\n\n"
+            f"Результат: <b>{PlayoffService.format_score(match)}</b>\n"
+            f"Рейтинг обновлён."
         )
-        players = result.scalars().all()
         
-        for player in players:
-            message = (
-                f"✅ <b>Матч подтверждён!</b>\n\n"
-                f"Результат: <b>{match.player1_score}:{match.player2_score}</b>\n"
-                f"Рейтинг обновлён."
-            )
-            
-            try:
-                await bot.send_message(player.id, message, parse_mode="HTML")
-            except Exception as e:
-                print(f"Failed to send confirmation to {player.id}: {e}")
+        # Несрочное: может прийти в одной сводке с другими уведомлениями
+        await OutboxService.enqueue_digest(session, [
+            (player_id, message, NotificationService._event_key(match, "confirmed", player_id))
+            for player_id in (match.player1_id, match.player2_id)
+        ])
     
     @staticmethod
     async def notify_match_disputed(
-        bot: Bot,
         session: AsyncSession,
         match: Match,
         admin_ids: List[int]
     ):
-        """Уведомление администраторов об оспаривании результата"""
+        """Уведомление администраторов об оспаривании (через очередь, в транзакции сессии)"""
         result = await session.execute(
             select(User).where(User.id.in_([match.player1_id, match.player2_id]))
         )
@@ -163,67 +274,45 @@ class NotificationService:
         message = (
             f"⚠️ <b>Результат оспорен!</b>\n\n"
             f"Матч: <b>{p1_name}</b> vs <b>{p2_name}</b>\n"
-            f"Счёт: {match.player1_score}:{match.player2_score}\n\n"
+            f"Счёт: {PlayoffService.format_score(match)}\n\n"
             f"Требуется вмешательство администратора."
         )
         
         for admin_id in admin_ids:
-            try:
-                await bot.send_message(admin_id, message, parse_mode="HTML")
-            except Exception as e:
-                print(f"Failed to send dispute notification to admin {admin_id}: {e}")
-    
-    @staticmethod
-    async def broadcast_message(
-        bot: Bot,
-        session: AsyncSession,
-        message_text: str,
-        exclude_admins: bool = False
-    ) -> tuple:
-        """Массовая рассылка сообщения всем пользователям"""
-        query = select(User)
-        if exclude_admins:
-            query = query.where(User.is_admin == False)
-        
-        result = await session.execute(query)
-        users = result.scalars().all()
-        
-        success_count = 0
-        fail_count = 0
-        
-        for user in users:
-            try:
-                await bot.send_message(user.id, message_text, parse_mode="HTML")
-                success_count += 1
-            except Exception:
-                fail_count += 1
-        
-        return success_count, fail_count
+            await OutboxService.enqueue(
+                session,
+                admin_id,
+                message,
+                dedupe_key=NotificationService._event_key(match, "disputed", admin_id)
+            )
     
     @staticmethod
     async def check_and_send_deadline_warnings(
-        bot: Bot,
         session: AsyncSession
     ):
         """
         Проверка и отправка предупреждений о дедлайне
-        (вызывается периодически из фонового задания)
+        (вызывается периодически из фонового задания).
+        Число запросов к БД не зависит от числа матчей: матчи, их игроки, постановка в очередь.
         """
         now = datetime.utcnow()
         warning_time = now + timedelta(hours=config.DEADLINE_WARNING_HOURS)
         
         # Получение матчей с приближающимся дедлайном
         result = await session.execute(
-            select(Match).where(
+            select(Match)
+            .join(Tournament, Match.tournament_id == Tournament.id)
+            .where(
                 Match.status == MatchStatus.SCHEDULED,
                 Match.deadline <= warning_time,
-                Match.deadline > now
+                Match.deadline > now,
+                Tournament.deleted_at.is_(None)
             )
         )
         matches = result.scalars().all()
         
-        for match in matches:
-            hours_left = int((match.deadline - now).total_seconds() / 3600)
-            await NotificationService.notify_deadline_approaching(
-                bot, session, match, hours_left
-            )
\ No newline at end of file
+        # Игроки всех матчей - одним запросом, сообщения собираются в памяти;
+        # повторная проверка того же дедлайна не дублирует предупреждение (dedupe_key)
+        await NotificationService.notify_deadlines_approaching(session, matches, now)
+        await session.commit()
+        OutboxService.wake()
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+T-League Bot - Очередь уведомлений (transactional outbox)
+"""
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from database.engine import async_session_maker
+from database.models import NotificationOutbox, OutboxStatus, User
+from middlewares.ratelimit import bulk_priority
+from services.reachability import ReachabilityService
+from config import config
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Сигнал обработчику о новых уведомлениях и его задача
+_wakeup: Optional[asyncio.Event] = None
+_worker: Optional[asyncio.Task] = None
+
+
+class OutboxService:
+    """
+    Сервис очереди уведомлений.
+    Хендлер пишет уведомление в notification_outbox в своей транзакции
+    (enqueue без commit) и будит обработчик после commit (wake). Обработчик
+    забирает порции готовых к отправке строк, отправляет их параллельно и
+    отмечает доставленные; неудачные повторяются с удваивающейся паузой.
+    Доставка - не меньше одного раза: строка отмечается после отправки,
+    поэтому падение между отправкой и отметкой даёт повтор. Одно и то же
+    событие не ставится в очередь дважды благодаря ключу dedupe_key.
+    Несрочные уведомления (enqueue_digest) ждут config.DIGEST_WINDOW и
+    уходят одним сводным сообщением на чат; срочные (enqueue) - сразу.
+    """
+
+    @staticmethod
+    async def enqueue(
+        session: AsyncSession,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        dedupe_key: Optional[str] = None
+    ):
+        """Уведомление в очередь в текущей транзакции (commit - за вызывающим)"""
+        await session.execute(
+            insert(NotificationOutbox)
+            .values(
+                chat_id=chat_id,
+                text=text,
+                reply_markup=reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+                dedupe_key=dedupe_key,
+                status=OutboxStatus.PENDING,
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
+                created_at=datetime.utcnow()
+            )
+            .on_conflict_do_nothing(index_elements=["dedupe_key"])
+        )
+
+    @staticmethod
+    async def enqueue_digest(
+        session: AsyncSession,
+        messages: List[Tuple[int, str, Optional[str]]]
+    ):
+        """
+        Несрочные уведомления (chat_id, текст, dedupe_key) в очередь текущей транзакции.
+        Окно чата открывает первое несрочное уведомление: следующие получают
+        тот же срок отправки и попадают в то же сводное сообщение.
+        Два запроса на любое число уведомлений.
+        """
+        if not messages:
+            return
+        now = datetime.utcnow()
+        result = await session.execute(
+            select(NotificationOutbox.chat_id, func.min(NotificationOutbox.next_attempt_at))
+            .where(
+                NotificationOutbox.status == OutboxStatus.PENDING,
+                NotificationOutbox.digest == True,
+                NotificationOutbox.chat_id.in_({chat_id for chat_id, _, _ in messages})
+            )
+            .group_by(NotificationOutbox.chat_id)
+        )
+        windows = dict(result.all())
+        window_end = now + timedelta(seconds=config.DIGEST_WINDOW)
+
+        await session.execute(
+            insert(NotificationOutbox).on_conflict_do_nothing(index_elements=["dedupe_key"]),
+            [
+                {
+                    "chat_id": chat_id,
+                    "text": text,
+                    "reply_markup": None,
+                    "dedupe_key": dedupe_key,
+                    "digest": True,
+                    "status": OutboxStatus.PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": windows.get(chat_id, window_end),
+                    "created_at": now
+                }
+                for chat_id, text, dedupe_key in messages
+            ]
+        )
+
+    @staticmethod
+    def _pack(chat_id: int, rows: List[NotificationOutbox]) -> List[Tuple[int, str, List[NotificationOutbox]]]:
+        """Несрочные уведомления чата - в сводные сообщения не длиннее лимита Telegram"""
+        if len(rows) == 1:
+            return [(chat_id, rows[0].text, rows)]
+
+        header = f"📬 <b>Уведомления ({len(rows)})</b>\n\n"
+        separator = "\n\n➖➖➖\n\n"
+        parts, texts, chunk, length = [], [], [], len(header)
+        for row in rows:
+            added = len(row.text) + (len(separator) if chunk else 0)
+            if chunk and length + added > config.DIGEST_MESSAGE_LIMIT:
+                parts.append((chat_id, header + separator.join(texts), chunk))
+                texts, chunk, length = [], [], len(header)
+                added = len(row.text)
+            texts.append(row.text)
+            chunk.append(row)
+            length += added
+        parts.append((chat_id, header + separator.join(texts), chunk))
+        return parts
+
+    @staticmethod
+    def wake():
+        """Сигнал обработчику: в очереди новые уведомления (вызывать после commit)"""
+        if _wakeup is not None:
+            _wakeup.set()
+
+    @staticmethod
+    async def _deliver(
+        bot: Bot,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[str],
+        dead: List[int]
+    ) -> Tuple[bool, bool, Optional[str]]:
+        """Отправка одного сообщения: (доставлено, повторять ли, ошибка)"""
+        markup = InlineKeyboardMarkup.model_validate_json(reply_markup) if reply_markup else None
+        try:
+            await bot.send_message(chat_id, text, parse_mode="HTML", reply_markup=markup)
+            return True, False, None
+        except TelegramBadRequest as e:
+            # Ошибка в запросе или чат недоступен - повтор бесполезен
+            if ReachabilityService.is_dead_recipient(e):
+                dead.append(chat_id)
+            return False, False, str(e)
+        except TelegramForbiddenError as e:
+            # Бот заблокирован - повтор бесполезен
+            dead.append(chat_id)
+            return False, False, str(e)
+        except Exception as e:
+            return False, True, str(e)
+
+    @staticmethod
+    async def process_batch(bot: Bot) -> int:
+        """
+        Одна порция готовых уведомлений; возвращает их количество.
+        Уведомления недоступным получателям закрываются без обращения к API,
+        несрочные уведомления одного чата отправляются одним сообщением.
+        """
+        now = datetime.utcnow()
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(NotificationOutbox, User.is_reachable)
+                .outerjoin(User, User.id == NotificationOutbox.chat_id)
+                .where(
+                    NotificationOutbox.status == OutboxStatus.PENDING,
+                    NotificationOutbox.next_attempt_at <= now
+                )
+                # Несрочные одного чата имеют общий срок - порядок по чату держит их в одной порции
+                .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.chat_id, NotificationOutbox.id)
+                .limit(config.OUTBOX_BATCH_SIZE)
+            )
+            fetched = result.all()
+        if not fetched:
+            return 0
+
+        # Сообщения к отправке: срочные - по одному, несрочные - сводкой на чат
+        units: List[Tuple[int, str, Optional[str], List[NotificationOutbox]]] = []
+        digests: Dict[int, List[NotificationOutbox]] = {}
+        unreachable: List[NotificationOutbox] = []
+        for row, reachable in fetched:
+            if reachable is False:
+                unreachable.append(row)
+            elif row.digest:
+                digests.setdefault(row.chat_id, []).append(row)
+            else:
+                units.append((row.chat_id, row.text, row.reply_markup, [row]))
+        for chat_id, chat_rows in digests.items():
+            units.extend(
+                (chat_id, text, None, unit_rows)
+                for chat_id, text, unit_rows in OutboxService._pack(chat_id, chat_rows)
+            )
+
+        semaphore = asyncio.Semaphore(max(config.NOTIFY_CONCURRENCY, 1))
+        dead: List[int] = []
+
+        async def deliver(chat_id: int, text: str, reply_markup: Optional[str]):
+            async with semaphore:
+                return await OutboxService._deliver(bot, chat_id, text, reply_markup, dead)
+
+        with bulk_priority():
+            outcomes = await asyncio.gather(*(deliver(*unit[:3]) for unit in units))
+        await ReachabilityService.mark_unreachable(dead)
+
+        results = [
+            (row, outcome)
+            for unit, outcome in zip(units, outcomes)
+            for row in unit[3]
+        ] + [(row, (False, False, "recipient unreachable")) for row in unreachable]
+
+        sent_ids = [row.id for row, (ok, _, _) in results if ok]
+        async with async_session_maker() as session:
+            if sent_ids:
+                await session.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id.in_(sent_ids))
+                    .values(status=OutboxStatus.SENT, sent_at=datetime.utcnow())
+                )
+            for row, (ok, retry, error) in results:
+                if ok:
+                    continue
+                attempts = row.attempts + 1
+                give_up = not retry or attempts >= config.OUTBOX_MAX_ATTEMPTS
+                delay = config.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+                await session.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id == row.id)
+                    .values(
+                        attempts=attempts,
+                        status=OutboxStatus.FAILED if give_up else OutboxStatus.PENDING,
+                        next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                        last_error=error
+                    )
+                )
+                if give_up:
+                    logger.warning(f"Notification {row.id} to {row.chat_id} not delivered: {error}")
+            await session.commit()
+        return len(fetched)
+
+    @staticmethod
+    async def cleanup():
+        """Удаление давно доставленных уведомлений"""
+        border = datetime.utcnow() - timedelta(days=config.OUTBOX_RETENTION_DAYS)
+        async with async_session_maker() as session:
+            await session.execute(
+                delete(NotificationOutbox).where(
+                    NotificationOutbox.status == OutboxStatus.SENT,
+                    NotificationOutbox.sent_at < border
+                )
+            )
+            await session.commit()
+
+    @staticmethod
+    async def run_worker(bot: Bot):
+        """Обработчик очереди: порции подряд, пока есть готовые, затем ожидание сигнала"""
+        global _wakeup
+        _wakeup = asyncio.Event()
+        last_cleanup = datetime.min
+
+        while True:
+            _wakeup.clear()
+            try:
+                while await OutboxService.process_batch(bot) >= config.OUTBOX_BATCH_SIZE:
+                    pass
+                if datetime.utcnow() - last_cleanup > timedelta(hours=1):
+                    await OutboxService.cleanup()
+                    last_cleanup = datetime.utcnow()
+            except Exception as e:
+                logger.error(f"Outbox worker failed: {e}")
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=config.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def start_worker(bot: Bot) -> asyncio.Task:
+        """Запуск обработчика очереди (один на процесс)"""
+        global _worker
+        if _worker is None or _worker.done():
+            _worker = asyncio.create_task(OutboxService.run_worker(bot))
+        return _worker
@@ -0,0 +1,263 @@
+"""
+T-League Bot - Сетка плей-офф
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.sqlite import insert
+from database.models import (
+    Tournament, Match, PlayoffSlot, MatchStatus, TournamentFormat
+)
+from typing import List, Optional, Dict
+import math
+
+# Статусы, при которых матч тура считается сыгранным
+FINISHED_STATUSES = (MatchStatus.CONFIRMED, MatchStatus.TECHNICAL)
+
+
+class PlayoffService:
+    """
+    Сервис сетки плей-офф.
+    Позиции хранятся для каждого тура: пара k тура r - это позиции 2k и 2k+1,
+    победитель пары k занимает позицию k в туре r+1 (вычисляется за O(1)).
+    Победитель финала (или единственный финалист) - позиция 0 тура total_rounds + 1.
+    В формате "группы + плей-офф" туры сетки идут после group_stage_rounds туров групп.
+    """
+
+    @staticmethod
+    def get_bracket_size(players_count: int) -> int:
+        """Размер сетки - ближайшая сверху степень двойки"""
+        return 2 ** math.ceil(math.log2(max(players_count, 2)))
+
+    @staticmethod
+    def get_match_winner(match: Match) -> Optional[int]:
+        """Победитель матча по счёту, а при ничьей - по серии пенальти"""
+        if match.player1_score is None or match.player2_score is None:
+            return None
+
+        if match.player1_score != match.player2_score:
+            return match.player1_id if match.player1_score > match.player2_score else match.player2_id
+
+        if match.player1_tiebreak is None or match.player2_tiebreak is None:
+            return None
+        if match.player1_tiebreak == match.player2_tiebreak:
+            return None
+        return match.player1_id if match.player1_tiebreak > match.player2_tiebreak else match.player2_id
+
+    @staticmethod
+    def format_score(match) -> str:
+        """Счёт матча, при серии пенальти - с ней: "2:2 (4:3)" (матч или строка расписания)"""
+        score = f"{match.player1_score}:{match.player2_score}"
+        if match.player1_tiebreak is not None and match.player2_tiebreak is not None:
+            score += f" ({match.player1_tiebreak}:{match.player2_tiebreak})"
+        return score
+
+    @staticmethod
+    def is_knockout_match(match: Match) -> bool:
+        """Матч сетки плей-офф (ничья требует серии пенальти)"""
+        return match.bracket_slot is not None
+
+    @staticmethod
+    async def create_bracket(
+        session: AsyncSession,
+        tournament: Tournament,
+        player_ids: List[int]
+    ) -> int:
+        """
+        Создание сетки: позиции первого тура и его матчи.
+        player_ids - игроки в порядке расстановки по сетке (None - свободный слот).
+        Первый тур сетки идёт сразу после группового этапа (если он есть).
+        Если список короче сетки, свободные слоты раздаются так, чтобы в каждой паре
+        был хотя бы один игрок. Возвращает количество созданных матчей.
+        """
+        bracket_size = PlayoffService.get_bracket_size(len(player_ids))
+        half = bracket_size // 2
+
+        if len(player_ids) < bracket_size:
+            positions: List[Optional[int]] = [None] * bracket_size
+            for i in range(half):
+                positions[2 * i] = player_ids[i]
+                if half + i < len(player_ids):
+                    positions[2 * i + 1] = player_ids[half + i]
+        else:
+            positions = list(player_ids)
+
+        first_round = (tournament.group_stage_rounds or 0) + 1
+        session.add_all([
+            PlayoffSlot(
+                tournament_id=tournament.id,
+                round_number=first_round,
+                position=position,
+                user_id=user_id
+            )
+            for position, user_id in enumerate(positions)
+            if user_id is not None
+        ])
+
+        tournament.total_rounds = first_round - 1 + int(math.log2(bracket_size))
+        tournament.current_round = first_round
+
+        created = PlayoffService._build_round_matches(
+            tournament, first_round, dict(enumerate(positions))
+        )
+        session.add_all(created["matches"])
+        session.add_all(created["byes"])
+        await session.flush()
+        return len(created["matches"])
+
+    @staticmethod
+    def _build_round_matches(
+        tournament: Tournament,
+        round_number: int,
+        positions: Dict[int, Optional[int]]
+    ) -> Dict[str, list]:
+        """Матчи тура по позициям; игрок без соперника сразу проходит дальше"""
+        matches = []
+        byes = []
+        bracket_rounds = tournament.total_rounds - (tournament.group_stage_rounds or 0)
+        slots_count = (2 ** bracket_rounds) >> (round_number - (tournament.group_stage_rounds or 0))
+
+        for slot in range(slots_count):
+            p1 = positions.get(2 * slot)
+            p2 = positions.get(2 * slot + 1)
+
+            if p1 is not None and p2 is not None:
+                matches.append(Match(
+                    tournament_id=tournament.id,
+                    round_number=round_number,
+                    bracket_slot=slot,
+                    player1_id=p1,
+                    player2_id=p2,
+                    status=MatchStatus.SCHEDULED,
+                    deadline_set=False
+                ))
+            elif p1 is not None or p2 is not None:
+                byes.append(PlayoffSlot(
+                    tournament_id=tournament.id,
+                    round_number=round_number + 1,
+                    position=slot,
+                    user_id=p1 if p1 is not None else p2
+                ))
+
+        return {"matches": matches, "byes": byes}
+
+    @staticmethod
+    async def on_match_confirmed(session: AsyncSession, match: Match) -> int:
+        """
+        Продвижение победителя после подтверждения (или технического результата) матча.
+        Когда сыгран последний матч тура, матчи следующего тура создаются одним пакетом.
+        Возвращает количество созданных матчей (без commit).
+        """
+        if not PlayoffService.is_knockout_match(match):
+            return 0
+
+        tournament = await session.get(Tournament, match.tournament_id)
+        if not tournament or tournament.format not in (
+            TournamentFormat.PLAYOFF, TournamentFormat.GROUP_PLAYOFF
+        ):
+            return 0
+
+        await PlayoffService.record_winners(session, [match])
+        return await PlayoffService._advance_completed_rounds(
+            session, tournament, match.round_number
+        )
+
+    @staticmethod
+    async def record_winners(session: AsyncSession, matches: List[Match]):
+        """
+        Победители сыгранных матчей сетки - на их позиции следующего тура
+        (повторная запись не дублирует позицию). Пакет просроченных матчей
+        записывается целиком до продвижения, чтобы тур не создавался без них.
+        """
+        rows = []
+        for match in matches:
+            winner_id = PlayoffService.get_match_winner(match)
+            if PlayoffService.is_knockout_match(match) and winner_id is not None:
+                rows.append({
+                    "tournament_id": match.tournament_id,
+                    "round_number": match.round_number + 1,
+                    "position": match.bracket_slot,
+                    "user_id": winner_id
+                })
+        if rows:
+            await session.execute(
+                insert(PlayoffSlot).on_conflict_do_nothing(
+                    index_elements=["tournament_id", "round_number", "position"]
+                ),
+                rows
+            )
+
+    @staticmethod
+    async def _advance_completed_rounds(
+        session: AsyncSession,
+        tournament: Tournament,
+        round_number: int
+    ) -> int:
+        """Создание следующих туров, пока текущий тур полностью сыгран"""
+        created_total = 0
+
+        while round_number < tournament.total_rounds:
+            unfinished = await session.scalar(
+                select(func.count(Match.id)).where(
+                    Match.tournament_id == tournament.id,
+                    Match.round_number == round_number,
+                    Match.status.notin_(FINISHED_STATUSES)
+                )
+            )
+            if unfinished:
+                break
+
+            next_round = round_number + 1
+            if not await PlayoffService.claim_round(session, tournament, next_round):
+                break
+
+            result = await session.execute(
+                select(PlayoffSlot.position, PlayoffSlot.user_id).where(
+                    PlayoffSlot.tournament_id == tournament.id,
+                    PlayoffSlot.round_number == next_round
+                )
+            )
+            positions = {position: user_id for position, user_id in result.all()}
+
+            created = PlayoffService._build_round_matches(tournament, next_round, positions)
+            session.add_all(created["matches"])
+            session.add_all(created["byes"])
+            await session.flush()
+
+            created_total += len(created["matches"])
+            round_number = next_round
+
+        return created_total
+
+    @staticmethod
+    async def claim_round(
+        session: AsyncSession,
+        tournament: Tournament,
+        round_number: int
+    ) -> bool:
+        """
+        Право на создание тура: условный UPDATE current_round (без commit).
+        Из параллельных подтверждений последних матчей тура его получает одно,
+        остальные ждут блокировку строки турнира и получают rowcount 0.
+        """
+        result = await session.execute(
+            update(Tournament)
+            .where(
+                Tournament.id == tournament.id,
+                Tournament.current_round < round_number
+            )
+            .values(current_round=round_number)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    async def get_bracket(session: AsyncSession, tournament_id: int) -> Dict[int, Dict[int, int]]:
+        """Сетка: тур -> {позиция: user_id}"""
+        result = await session.execute(
+            select(PlayoffSlot.round_number, PlayoffSlot.position, PlayoffSlot.user_id)
+            .where(PlayoffSlot.tournament_id == tournament_id)
+            .order_by(PlayoffSlot.round_number, PlayoffSlot.position)
+        )
+        bracket: Dict[int, Dict[int, int]] = {}
+        for round_number, position, user_id in result.all():
+            bracket.setdefault(round_number, {})[position] = user_id
+        return bracket
@@ -0,0 +1,131 @@
+"""
+T-League Bot - Фоновая очистка удалённых турниров
+"""
+from sqlalchemy import select, delete, func
+from database.engine import async_session_maker
+from database.models import (
+    Tournament, TournamentParticipant, Match, TournamentRecord,
+    PlayoffSlot, StandingsSnapshot, ArchivedMatch, ArchivedParticipant
+)
+from config import config
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Связанные таблицы в порядке очистки (сам турнир удаляется последним)
+CHILD_MODELS = (
+    StandingsSnapshot, PlayoffSlot, Match, TournamentRecord, TournamentParticipant,
+    ArchivedMatch, ArchivedParticipant
+)
+
+# Прогресс: (удалено строк, всего строк)
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# Запущенные очистки: tournament_id -> задача (держим ссылку, чтобы задачу не собрал GC)
+_tasks: Dict[int, asyncio.Task] = {}
+
+
+class PurgeService:
+    """
+    Сервис очистки удалённых турниров.
+    Удаление в админке только скрывает турнир (deleted_at), а строки матчей,
+    участников и рекордов удаляются здесь порциями по config.PURGE_CHUNK_SIZE.
+    Каждая порция - отдельная короткая транзакция, между порциями блокировка
+    записи SQLite освобождается, и остальные пользователи не ждут.
+    """
+
+    @staticmethod
+    async def count_rows(tournament_id: int) -> int:
+        """Сколько связанных строк осталось удалить"""
+        total = 0
+        async with async_session_maker() as session:
+            for model in CHILD_MODELS:
+                total += await session.scalar(
+                    select(func.count(model.id)).where(model.tournament_id == tournament_id)
+                ) or 0
+        return total
+
+    @staticmethod
+    async def purge_tournament(
+        tournament_id: int,
+        progress: Optional[ProgressCallback] = None
+    ) -> int:
+        """
+        Порционное удаление связанных строк и самого турнира.
+        Возвращает количество удалённых связанных строк.
+        Прерванная очистка продолжается с того же места при следующем запуске.
+        """
+        total = await PurgeService.count_rows(tournament_id)
+        done = 0
+        chunk = max(config.PURGE_CHUNK_SIZE, 1)
+
+        for model in CHILD_MODELS:
+            while True:
+                async with async_session_maker() as session:
+                    ids = select(model.id).where(
+                        model.tournament_id == tournament_id
+                    ).limit(chunk).scalar_subquery()
+                    result = await session.execute(
+                        delete(model)
+                        .where(model.id.in_(ids))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+
+                if not result.rowcount:
+                    break
+
+                done += result.rowcount
+                if progress:
+                    await progress(done, total)
+                await asyncio.sleep(config.PURGE_CHUNK_PAUSE)
+
+        async with async_session_maker() as session:
+            await session.execute(
+                delete(Tournament).where(
+                    Tournament.id == tournament_id,
+                    Tournament.deleted_at.is_not(None)
+                )
+            )
+            await session.commit()
+
+        if progress and not total:
+            await progress(done, total)
+        return done
+
+    @staticmethod
+    def start_purge(
+        tournament_id: int,
+        progress: Optional[ProgressCallback] = None
+    ) -> asyncio.Task:
+        """Запуск очистки в фоне (повторный запуск для того же турнира не дублируется)"""
+        task = _tasks.get(tournament_id)
+        if task and not task.done():
+            return task
+
+        async def run():
+            try:
+                await PurgeService.purge_tournament(tournament_id, progress)
+            except Exception as e:
+                logger.error(f"Failed to purge tournament {tournament_id}: {e}")
+            finally:
+                _tasks.pop(tournament_id, None)
+
+        task = asyncio.create_task(run())
+        _tasks[tournament_id] = task
+        return task
+
+    @staticmethod
+    async def resume_pending() -> List[int]:
+        """Продолжение очистки турниров, удалённых до перезапуска бота"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Tournament.id).where(Tournament.deleted_at.is_not(None))
+            )
+            tournament_ids = [tournament_id for (tournament_id,) in result.all()]
+
+        for tournament_id in tournament_ids:
+            PurgeService.start_purge(tournament_id)
+        return tournament_ids
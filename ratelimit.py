@@ -0,0 +1,169 @@
+"""
+T-League Bot - Ограничение скорости исходящих запросов к Telegram
+"""
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from config import config
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета: меньше - раньше
+PRIORITY_INTERACTIVE = 0  # ответы на действия пользователя
+PRIORITY_BULK = 1  # уведомления и рассылки
+
+_priority: ContextVar[int] = ContextVar("telegram_send_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """Запросы внутри блока (и созданных в нём задач) пропускают вперёд интерактивные"""
+    token = _priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Взять токен: 0 - взят, иначе сколько секунд подождать"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, seconds: float):
+        """Пауза после 429 (RetryAfter)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self) -> bool:
+        """Корзина полна - её можно забыть без потери ограничения"""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity and time.monotonic() >= self.blocked_until
+
+
+class PriorityLimiter:
+    """Общая корзина с очередью ожидающих по приоритету (FIFO внутри класса)"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int):
+        if not self._waiters and self.bucket.take() == 0:
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            delay = self.bucket.take()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Ожидающий отменён - токен отдаём следующему
+                self.bucket.tokens += 1
+                continue
+            future.set_result(None)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: каждый запрос, адресованный чату (отправка,
+    редактирование, медиа), проходит корзину своего чата и общую корзину бота.
+    Общая корзина выдаёт токены сначала интерактивным запросам, затем
+    массовым (bulk_priority). На 429 вся отправка приостанавливается на
+    retry_after, и запрос повторяется, пока Telegram отвечает retry_after
+    и суммарное ожидание не превышает config.TELEGRAM_RETRY_MAX_WAIT.
+    Запросы без chat_id (getUpdates, answerCallbackQuery) не ограничиваются.
+    """
+
+    # Сколько корзин чатов держать до чистки полных
+    MAX_CHAT_BUCKETS = 10000
+
+    def __init__(
+        self,
+        global_rate: Optional[float] = None,
+        chat_rate: Optional[float] = None,
+        chat_burst: Optional[float] = None
+    ):
+        global_rate = global_rate or config.TELEGRAM_GLOBAL_RATE
+        self.limiter = PriorityLimiter(TokenBucket(global_rate, global_rate))
+        self.chat_rate = chat_rate or config.TELEGRAM_CHAT_RATE
+        self.chat_burst = chat_burst or config.TELEGRAM_CHAT_BURST
+        self._chats: Dict[int, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                self._chats = {key: b for key, b in self._chats.items() if not b.is_idle()}
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        chat_bucket = self._chat_bucket(chat_id)
+        priority = _priority.get()
+
+        waited = 0.0
+        while True:
+            while True:
+                delay = chat_bucket.take()
+                if not delay:
+                    break
+                await asyncio.sleep(delay)
+            await self.limiter.acquire(priority)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                waited += e.retry_after
+                if waited > config.TELEGRAM_RETRY_MAX_WAIT:
+                    raise
+                logger.warning(f"Telegram 429 for chat {chat_id}, retry after {e.retry_after} s")
+                self.limiter.bucket.block(e.retry_after)
+                chat_bucket.block(e.retry_after)
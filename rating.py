@@ -3,8 +3,10 @@ T-League Bot - Рейтинговая система
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from database.models import User, Match, MatchStatus
+from database.models import User, Match, ArchivedMatch
+from services.standings import FINISHED_STATUSES, is_double_loss
 from config import config
+from datetime import datetime
 
 class RatingService:
     """Сервис управления рейтингом"""
@@ -22,8 +24,9 @@ class RatingService:
     async def update_match_stats(session: AsyncSession, match: Match):
         """
         Обновление статистики после матча и рейтинга игроков
+        (подтверждённый или технический результат; без commit)
         """
-        if match.status != MatchStatus.CONFIRMED:
+        if match.status not in FINISHED_STATUSES:
             return
         
         player1_id = match.player1_id
@@ -32,7 +35,15 @@ class RatingService:
         score2 = match.player2_score
         
         # Определение результата
-        if score1 > score2:
+        if is_double_loss(match.status, score1, score2):
+            # Обоюдное техническое поражение
+            await RatingService._update_player_after_match(
+                session, player1_id, "loss", score1, score2
+            )
+            await RatingService._update_player_after_match(
+                session, player2_id, "loss", score2, score1
+            )
+        elif score1 > score2:
             # Победа игрока 1
             await RatingService._update_player_after_match(
                 session, player1_id, "win", score1, score2
@@ -65,7 +76,7 @@ class RatingService:
         goals_for: int,
         goals_against: int
     ):
-        """Обновление статистики игрока после матча"""
+        """Обновление статистики игрока после матча (без commit)"""
         result_user = await session.execute(
             select(User).where(User.id == user_id)
         )
@@ -94,8 +105,6 @@ class RatingService:
             user.draws += 1
             user.rating += config.RATING_DRAW
             user.current_streak = 0
-        
-        await session.commit()
     
     @staticmethod
     async def calculate_winrate(user: User) -> float:
@@ -166,7 +175,8 @@ class RatingService:
     @staticmethod
     async def recalculate_all_ratings(session: AsyncSession):
         """
-        Полный пересчёт всех рейтингов на основе подтверждённых матчей
+        Полный пересчёт всех рейтингов на основе сыгранных матчей
+        (подтверждённых и технических) одной транзакцией
         """
         # Сброс всех рейтингов и статистики
         await session.execute(
@@ -179,16 +189,20 @@ class RatingService:
                 current_streak=0
             )
         )
-        await session.commit()
         
-        # Получение всех подтверждённых матчей в хронологическом порядке
-        result = await session.execute(
-            select(Match)
-            .where(Match.status == MatchStatus.CONFIRMED)
-            .order_by(Match.confirmed_at)
-        )
-        matches = result.scalars().all()
+        # Получение всех сыгранных матчей в хронологическом порядке
+        # (идущие турниры + архив завершённых)
+        matches = []
+        for model in (ArchivedMatch, Match):
+            result = await session.execute(
+                select(model)
+                .where(model.status.in_(FINISHED_STATUSES))
+                .order_by(model.confirmed_at)
+            )
+            matches.extend(result.scalars().all())
+        matches.sort(key=lambda m: m.confirmed_at or datetime.min)
         
         # Пересчёт по каждому матчу
         for match in matches:
-            await RatingService.update_match_stats(session, match)
\ No newline at end of file
+            await RatingService.update_match_stats(session, match)
+        await session.commit()
\ No newline at end of file
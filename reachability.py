@@ -0,0 +1,56 @@
+"""
+T-League Bot - Учёт недоступных получателей
+"""
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy import update
+from database.engine import async_session_maker
+from database.models import User
+from datetime import datetime
+from typing import Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReachabilityService:
+    """
+    Сервис доступности получателей.
+    Пользователь, заблокировавший бота или удаливший аккаунт, отмечается
+    недоступным (users.is_reachable = False) по первой же ошибке Forbidden /
+    "chat not found"; аудитории рассылок и уведомлений его не включают.
+    Отметка снимается, когда пользователь снова отправляет /start.
+    """
+
+    @staticmethod
+    def is_dead_recipient(error: Exception) -> bool:
+        """Ошибка означает, что писать пользователю бесполезно"""
+        if isinstance(error, TelegramForbiddenError):
+            return True
+        return isinstance(error, TelegramBadRequest) and "chat not found" in error.message.lower()
+
+    @staticmethod
+    async def mark_unreachable(user_ids: Iterable[int]) -> int:
+        """Отметка недоступных получателей (одна короткая транзакция)"""
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return 0
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(User)
+                .where(User.id.in_(user_ids), User.is_reachable == True)
+                .values(is_reachable=False, unreachable_since=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if result.rowcount:
+            logger.info(f"Marked {result.rowcount} users unreachable")
+        return result.rowcount
+
+    @staticmethod
+    def reactivate(user: User) -> bool:
+        """Снятие отметки (commit - за вызывающим); True, если пользователь был недоступен"""
+        if user.is_reachable:
+            return False
+        user.is_reachable = True
+        user.unreachable_since = None
+        return True
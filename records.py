@@ -3,7 +3,8 @@ T-League Bot - Рекорды турнира
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
-from database.models import TournamentRecord, TournamentParticipant, Match, MatchStatus, User
+from database.models import TournamentRecord, MatchStatus, User
+from services.archive import ArchiveService
 from typing import Dict
 
 class RecordsService:
@@ -19,11 +20,12 @@ class RecordsService:
             delete(TournamentRecord).where(TournamentRecord.tournament_id == tournament_id)
         )
         
-        # Получение всех участников турнира
+        # Получение всех участников турнира (рабочие или архивные таблицы)
+        _, Participant = await ArchiveService.get_models(session, tournament_id)
         result = await session.execute(
-            select(TournamentParticipant, User)
-            .join(User, TournamentParticipant.user_id == User.id)
-            .where(TournamentParticipant.tournament_id == tournament_id)
+            select(Participant, User)
+            .join(User, Participant.user_id == User.id)
+            .where(Participant.tournament_id == tournament_id)
         )
         participants_data = result.all()
         
@@ -101,11 +103,12 @@ class RecordsService:
     @staticmethod
     async def _calculate_biggest_defeat(session: AsyncSession, tournament_id: int):
         """Расчёт самого крупного поражения"""
+        MatchModel, _ = await ArchiveService.get_models(session, tournament_id)
         result = await session.execute(
-            select(Match)
+            select(MatchModel)
             .where(
-                Match.tournament_id == tournament_id,
-                Match.status == MatchStatus.CONFIRMED
+                MatchModel.tournament_id == tournament_id,
+                MatchModel.status == MatchStatus.CONFIRMED
             )
         )
         matches = result.scalars().all()
@@ -135,13 +138,14 @@ class RecordsService:
     async def _calculate_best_win_streak(session: AsyncSession, tournament_id: int):
         """Расчёт лучшей серии побед"""
         # Получение всех матчей турнира в хронологическом порядке
+        MatchModel, _ = await ArchiveService.get_models(session, tournament_id)
         result = await session.execute(
-            select(Match)
+            select(MatchModel)
             .where(
-                Match.tournament_id == tournament_id,
-                Match.status == MatchStatus.CONFIRMED
+                MatchModel.tournament_id == tournament_id,
+                MatchModel.status == MatchStatus.CONFIRMED
             )
-            .order_by(Match.confirmed_at)
+            .order_by(MatchModel.confirmed_at)
         )
         matches = result.scalars().all()
         
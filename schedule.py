@@ -2,11 +2,41 @@
 T-League Bot - Расписание матчей
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from database.models import Match, Tournament, User, MatchStatus
+from sqlalchemy import select, update, null, false, and_, not_, case, bindparam
+from sqlalchemy.orm import aliased
+from database.engine import async_session_maker
+from database.models import (
+    Match, Tournament, TournamentParticipant, User, MatchStatus, FixtureMode
+)
+from services.tournament import TournamentService
+from services.summary import SummaryService
+from services.standings import StandingsService
+from services.archive import ArchiveService
+from services.dashboard import DashboardService
+from services.playoff import PlayoffService
+from contextlib import ExitStack
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from config import config
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Версии туров: (tournament_id, round_number) -> счётчик изменений матчей тура
+_round_versions: Dict[Tuple[int, int], int] = {}
+# Готовые страницы туров: (tournament_id, round_number) -> (версия, страницы)
+_round_pages: Dict[Tuple[int, int], Tuple[tuple, List[str]]] = {}
+# Номера туров с матчами: tournament_id -> (число матчей, туры)
+_rounds: Dict[int, Tuple[int, List[int]]] = {}
+
+MATCH_STATUS_EMOJI = {
+    MatchStatus.SCHEDULED: "⏳",
+    MatchStatus.PENDING: "⌛",
+    MatchStatus.CONFIRMED: "✅",
+    MatchStatus.DISPUTED: "⚠️",
+    MatchStatus.TECHNICAL: "🚫"
+}
 
 class ScheduleService:
     """Сервис управления расписанием матчей"""
@@ -35,6 +65,12 @@ class ScheduleService:
         )
         
         rounds_data = {}
+        
+        # При ленивом расписании ещё не созданные туры тоже доступны для выбора
+        tournament = await session.get(Tournament, tournament_id)
+        if tournament and tournament.fixture_mode == FixtureMode.LAZY:
+            rounds_data = {r: False for r in range(1, tournament.total_rounds + 1)}
+        
         for round_num, deadline_set in result.all():
             if round_num not in rounds_data:
                 rounds_data[round_num] = False
@@ -75,22 +111,43 @@ class ScheduleService:
         # Конвертация в UTC для хранения в БД
         deadline_utc = ScheduleService.msk_to_utc(deadline_msk)
         
+        # Ленивое расписание: матчи тура создаются при установке дедлайна
+        tournament = await session.get(Tournament, tournament_id)
+        if tournament and await TournamentService.materialize_round(session, tournament, round_number):
+            SummaryService.invalidate(tournament_id)
+        
+        # Один UPDATE по индексу (tournament_id, round_number)
         result = await session.execute(
-            select(Match).where(
+            update(Match)
+            .where(
                 Match.tournament_id == tournament_id,
                 Match.round_number == round_number
             )
+            .values(deadline=deadline_utc, deadline_set=True)
+            .execution_options(synchronize_session=False)
         )
-        matches = result.scalars().all()
-        
-        count = 0
-        for match in matches:
-            match.deadline = deadline_utc
-            match.deadline_set = True
-            count += 1
         
         await session.commit()
-        return count
+        ScheduleService.touch_round(tournament_id, round_number)
+        return result.rowcount
+    
+    @staticmethod
+    async def get_round_player_ids(
+        session: AsyncSession,
+        tournament_id: int,
+        round_number: int,
+        reachable_only: bool = True
+    ) -> List[int]:
+        """Участники матчей тура без повторов (один запрос); по умолчанию - только доступные"""
+        conditions = (Match.tournament_id == tournament_id, Match.round_number == round_number)
+        players = (
+            select(Match.player1_id).where(*conditions)
+            .union(select(Match.player2_id).where(*conditions))
+        )
+        if reachable_only:
+            players = select(User.id).where(User.id.in_(players), User.is_reachable == True)
+        result = await session.execute(players)
+        return [player_id for (player_id,) in result.all()]
     
     @staticmethod
     async def get_tournament_matches(
@@ -98,32 +155,51 @@ class ScheduleService:
         tournament_id: int,
         round_number: Optional[int] = None
     ) -> List[tuple]:
-        """Получение матчей турнира с игроками"""
+        """
+        Матчи турнира с именами игроков одним запросом (два псевдонима User).
+        Возвращает лёгкие строки: id, round_number, status, счёт и серия пенальти, дедлайн,
+        player1_id/player1_username/player1_full_name и то же для player2.
+        Фильтр по туру идёт по индексу (tournament_id, round_number);
+        завершённые турниры читаются из архива (без дедлайнов).
+        """
+        MatchModel, _ = await ArchiveService.get_models(session, tournament_id)
+        player1 = aliased(User)
+        player2 = aliased(User)
+        
+        if MatchModel is Match:
+            deadline_columns = (Match.deadline, Match.deadline_set)
+        else:
+            deadline_columns = (null().label("deadline"), false().label("deadline_set"))
+        
         query = (
-            select(Match)
-            .where(Match.tournament_id == tournament_id)
+            select(
+                MatchModel.id,
+                MatchModel.round_number,
+                MatchModel.status,
+                MatchModel.player1_id,
+                MatchModel.player2_id,
+                MatchModel.player1_score,
+                MatchModel.player2_score,
+                MatchModel.player1_tiebreak,
+                MatchModel.player2_tiebreak,
+                *deadline_columns,
+                player1.username.label("player1_username"),
+                player1.full_name.label("player1_full_name"),
+                player2.username.label("player2_username"),
+                player2.full_name.label("player2_full_name")
+            )
+            .join(player1, player1.id == MatchModel.player1_id)
+            .join(player2, player2.id == MatchModel.player2_id)
+            .where(MatchModel.tournament_id == tournament_id)
         )
         
         if round_number:
-            query = query.where(Match.round_number == round_number)
+            query = query.where(MatchModel.round_number == round_number)
         
-        query = query.order_by(Match.round_number, Match.created_at)
+        query = query.order_by(MatchModel.round_number, MatchModel.id)
         
         result = await session.execute(query)
-        matches = result.scalars().all()
-        
-        # Получаем информацию об игроках
-        matches_with_players = []
-        for match in matches:
-            p1_result = await session.execute(select(User).where(User.id == match.player1_id))
-            p2_result = await session.execute(select(User).where(User.id == match.player2_id))
-            
-            player1 = p1_result.scalar_one()
-            player2 = p2_result.scalar_one()
-            
-            matches_with_players.append((match, player1, player2))
-        
-        return matches_with_players
+        return result.all()
     
     @staticmethod
     async def get_user_matches_in_round(
@@ -167,76 +243,266 @@ class ScheduleService:
         result = await session.execute(query)
         return result.scalars().all()
     
+    # ================== СТРАНИЦЫ ТУРОВ ==================
+    
+    @staticmethod
+    def touch_round(tournament_id: int, round_number: int):
+        """Изменение матча тура (результат, дедлайн, тех. поражение) - готовые страницы тура устаревают"""
+        key = (tournament_id, round_number)
+        _round_versions[key] = _round_versions.get(key, 0) + 1
+    
+    @staticmethod
+    async def get_schedule_rounds(session: AsyncSession, tournament_id: int, matches_total: int) -> List[int]:
+        """Туры, в которых есть матчи (перечитываются, когда меняется число матчей турнира)"""
+        cached = _rounds.get(tournament_id)
+        if cached is not None and cached[0] == matches_total:
+            return cached[1]
+        
+        MatchModel, _ = await ArchiveService.get_models(session, tournament_id)
+        result = await session.execute(
+            select(MatchModel.round_number)
+            .where(MatchModel.tournament_id == tournament_id)
+            .distinct()
+            .order_by(MatchModel.round_number)
+        )
+        rounds = [round_number for (round_number,) in result.all()]
+        _rounds[tournament_id] = (matches_total, rounds)
+        return rounds
+    
+    @staticmethod
+    async def get_round_pages(
+        session: AsyncSession,
+        tournament_id: int,
+        round_number: int,
+        matches_total: int
+    ) -> List[str]:
+        """
+        Страницы расписания тура из кэша.
+        Версия страницы - счётчик изменений тура и число матчей турнира
+        (новые туры, жеребьёвка), поэтому изменения в одном туре
+        не заставляют перерисовывать остальные.
+        """
+        key = (tournament_id, round_number)
+        version = (_round_versions.get(key, 0), matches_total)
+        cached = _round_pages.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        matches_data = await ScheduleService.get_tournament_matches(session, tournament_id, round_number)
+        pages = ScheduleService.format_round_pages(matches_data, round_number)
+        _round_pages[key] = (version, pages)
+        return pages
+    
+    @staticmethod
+    def format_match(match) -> str:
+        """Строка матча расписания с username"""
+        status_emoji = MATCH_STATUS_EMOJI.get(match.status, "❓")
+        p1_name = f"@{match.player1_username}" if match.player1_username else match.player1_full_name
+        p2_name = f"@{match.player2_username}" if match.player2_username else match.player2_full_name
+        
+        # Счёт
+        score_text = ""
+        if match.status in [MatchStatus.CONFIRMED, MatchStatus.PENDING, MatchStatus.DISPUTED]:
+            score_text = f" <b>{PlayoffService.format_score(match)}</b>"
+        
+        # Дедлайн
+        deadline_text = ""
+        if match.deadline_set and match.deadline:
+            deadline_msk = ScheduleService.utc_to_msk(match.deadline)
+            deadline_text = f"\n⏰ Дедлайн: {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК"
+        elif not match.deadline_set:
+            deadline_text = "\n⏰ Дедлайн не установлен"
+        
+        return f"{status_emoji} {p1_name} <b>vs</b> {p2_name}{score_text}{deadline_text}\n\n"
+    
     @staticmethod
-    async def format_schedule(matches_data: List[tuple]) -> str:
-        """Форматирование расписания матчей с username"""
+    def format_round_pages(matches_data: List[tuple], round_number: int) -> List[str]:
+        """
+        Расписание тура, разбитое на страницы не длиннее config.SCHEDULE_PAGE_LIMIT.
+        Разрыв - только между матчами, продолжения помечаются в заголовке.
+        """
+        title = f"📅 <b>Расписание матчей</b>\n\n<b>═══ Тур {round_number} ═══</b>\n\n"
         if not matches_data:
-            return "📅 <b>Расписание матчей</b>\n\nМатчей пока нет."
-        
-        text = "📅 <b>Расписание матчей</b>\n\n"
-        
-        current_round = None
-        for match, player1, player2 in matches_data:
-            # Заголовок раунда
-            if current_round != match.round_number:
-                current_round = match.round_number
-                text += f"<b>═══ Тур {current_round} ═══</b>\n\n"
-            
-            # Статус матча
-            status_emoji = {
-                MatchStatus.SCHEDULED: "⏳",
-                MatchStatus.PENDING: "⌛",
-                MatchStatus.CONFIRMED: "✅",
-                MatchStatus.DISPUTED: "⚠️",
-                MatchStatus.TECHNICAL: "🚫"
-            }.get(match.status, "❓")
-            
-            # Имена игроков с username
-            p1_name = f"@{player1.username}" if player1.username else player1.full_name
-            p2_name = f"@{player2.username}" if player2.username else player2.full_name
-            
-            # Счёт
-            score_text = ""
-            if match.status in [MatchStatus.CONFIRMED, MatchStatus.PENDING, MatchStatus.DISPUTED]:
-                score_text = f" <b>{match.player1_score}:{match.player2_score}</b>"
-            
-            # Дедлайн
-            deadline_text = ""
-            if match.deadline_set and match.deadline:
-                deadline_msk = ScheduleService.utc_to_msk(match.deadline)
-                deadline_text = f"\n⏰ Дедлайн: {deadline_msk.strftime('%d.%m.%Y %H:%M')} МСК"
-            elif not match.deadline_set:
-                deadline_text = "\n⏰ Дедлайн не установлен"
-            
-            text += (
-                f"{status_emoji} {p1_name} <b>vs</b> {p2_name}{score_text}"
-                f"{deadline_text}\n\n"
-            )
+            return [title + "Матчей пока нет."]
+        
+        # Запас под пометку "(часть N/M)" в заголовке
+        limit = config.SCHEDULE_PAGE_LIMIT - len(title) - 32
+        chunks: List[List[str]] = [[]]
+        length = 0
+        for match in matches_data:
+            line = ScheduleService.format_match(match)
+            if chunks[-1] and length + len(line) > limit:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(line)
+            length += len(line)
         
-        return text
+        if len(chunks) == 1:
+            return [title + "".join(chunks[0])]
+        
+        return [
+            f"📅 <b>Расписание матчей</b> (часть {number}/{len(chunks)})\n\n"
+            f"<b>═══ Тур {round_number} ═══</b>\n\n" + "".join(lines)
+            for number, lines in enumerate(chunks, 1)
+        ]
     
     @staticmethod
-    async def check_expired_matches(session: AsyncSession):
+    async def check_expired_matches(session: AsyncSession) -> List[Match]:
         """
-        Проверка просроченных матчей и автоматическое техническое поражение
+        Техническое поражение по истечении дедлайна.
+        Просроченные матчи переводятся одним UPDATE ... RETURNING по индексу
+        (status, deadline_set, deadline), затем в той же транзакции пакетно
+        обновляются таблицы турниров и рейтинг, а турниры продвигаются дальше
+        (один раз на каждый тур с просроченными матчами).
+        Работа пропорциональна числу просроченных матчей.
+        
+        config.TECHNICAL_LOSS_MODE:
+        "non_reporter" - внёсший результат побеждает TECHNICAL_WIN_SCORE:0,
+        матч без результата - обоюдное поражение;
+        "double" - обоюдное поражение всегда.
+        В плей-офф обоюдного поражения нет - сетке нужен победитель: вместо него
+        TECHNICAL_WIN_SCORE:0 получает игрок верхней позиции пары (player1;
+        в первом туре это старший посев).
         """
         now = datetime.utcnow()
+        win_score = config.TECHNICAL_WIN_SCORE
+        knockout = Match.bracket_slot.is_not(None)
+        
+        if config.TECHNICAL_LOSS_MODE == "non_reporter":
+            statuses = [MatchStatus.SCHEDULED, MatchStatus.PENDING]
+            reported = and_(Match.status == MatchStatus.PENDING, Match.reported_by.is_not(None))
+            score1 = case(
+                (and_(reported, Match.reported_by == Match.player1_id), win_score),
+                (and_(not_(reported), knockout), win_score),
+                else_=0
+            )
+            score2 = case((and_(reported, Match.reported_by == Match.player2_id), win_score), else_=0)
+        else:
+            statuses = [MatchStatus.SCHEDULED]
+            score1 = case((knockout, win_score), else_=0)
+            score2 = 0
         
         result = await session.execute(
-            select(Match).where(
-                Match.status == MatchStatus.SCHEDULED,
+            update(Match)
+            .where(
+                Match.status.in_(statuses),
                 Match.deadline_set == True,
-                Match.deadline < now
+                Match.deadline < now,
+                # Удалённые турниры ждут очистки - их матчи не доигрываются
+                Match.tournament_id.notin_(
+                    select(Tournament.id).where(Tournament.deleted_at.is_not(None))
+                )
+            )
+            .values(
+                status=MatchStatus.TECHNICAL,
+                player1_score=score1,
+                player2_score=score2,
+                player1_tiebreak=None,
+                player2_tiebreak=None,
+                played_at=now,
+                confirmed_at=now
+            )
+            .returning(
+                Match.id, Match.tournament_id, Match.player1_id, Match.player2_id,
+                Match.player1_score, Match.player2_score
+            )
+            .execution_options(synchronize_session=False)
+        )
+        expired = result.all()
+        if not expired:
+            return []
+        
+        # Результат каждого игрока: победа технически или поражение (в т.ч. обоюдное)
+        results = []
+        for row in expired:
+            results.append((row.tournament_id, row.player1_id, row.player1_score, row.player2_score))
+            results.append((row.tournament_id, row.player2_id, row.player2_score, row.player1_score))
+        
+        participants = TournamentParticipant.__table__
+        await session.execute(
+            participants.update()
+            .where(
+                participants.c.tournament_id == bindparam("t_id"),
+                participants.c.user_id == bindparam("u_id")
             )
+            .values(
+                matches_played=participants.c.matches_played + 1,
+                wins=participants.c.wins + bindparam("won"),
+                losses=participants.c.losses + 1 - bindparam("won"),
+                points=participants.c.points + 3 * bindparam("won"),
+                goals_for=participants.c.goals_for + bindparam("gf"),
+                goals_against=participants.c.goals_against + bindparam("ga")
+            ),
+            [
+                {"t_id": tid, "u_id": uid, "won": int(gf > ga), "gf": gf, "ga": ga}
+                for tid, uid, gf, ga in results
+            ]
+        )
+        
+        users = User.__table__
+        streak = users.c.current_streak
+        await session.execute(
+            users.update()
+            .where(users.c.id == bindparam("u_id"))
+            .values(
+                matches_played=users.c.matches_played + 1,
+                wins=users.c.wins + bindparam("won"),
+                losses=users.c.losses + 1 - bindparam("won"),
+                rating=users.c.rating + bindparam("delta"),
+                current_streak=case(
+                    (bindparam("won") == 1, case((streak >= 0, streak + 1), else_=1)),
+                    else_=case((streak <= 0, streak - 1), else_=-1)
+                )
+            ),
+            [
+                {
+                    "u_id": uid,
+                    "won": int(gf > ga),
+                    "delta": config.RATING_WIN if gf > ga else config.RATING_LOSS
+                }
+                for _, uid, gf, ga in results
+            ]
         )
-        expired_matches = result.scalars().all()
         
+        # Таблицы после туров и следующие туры (плей-офф, швейцарская система, группы)
+        matches_result = await session.execute(
+            select(Match)
+            .where(Match.id.in_([row.id for row in expired]))
+            .execution_options(populate_existing=True)
+        )
+        expired_matches = matches_result.scalars().all()
+        # Все победители сеток - до продвижения: тур создаётся, только когда занята каждая позиция
+        await PlayoffService.record_winners(session, expired_matches)
+        # Продвижение - один раз на тур турнира (проверки тура не зависят от матча)
+        rounds: Dict[Tuple[int, int], Match] = {}
         for match in expired_matches:
-            match.status = MatchStatus.TECHNICAL
-            match.player1_score = 0
-            match.player2_score = 0
-            match.played_at = now
-            match.confirmed_at = now
+            rounds.setdefault((match.tournament_id, match.round_number), match)
+        for key in sorted(rounds):
+            await TournamentService.on_match_finished(session, rounds[key])
         
-        await session.commit()
-        return expired_matches
\ No newline at end of file
+        tournament_ids = {match.tournament_id for match in expired_matches}
+        with ExitStack() as stack:
+            for tournament_id in tournament_ids:
+                stack.enter_context(StandingsService.updating(tournament_id))
+            await session.commit()
+            for tournament_id in tournament_ids:
+                StandingsService.invalidate(tournament_id)
+        for tournament_id in tournament_ids:
+            SummaryService.invalidate(tournament_id)
+        for match in expired_matches:
+            ScheduleService.touch_round(match.tournament_id, match.round_number)
+            DashboardService.invalidate(match.player1_id, match.player2_id)
+        return expired_matches
+    
+    @staticmethod
+    async def run_expiry_sweeps():
+        """Фоновая проверка дедлайнов каждые config.EXPIRY_SWEEP_INTERVAL секунд"""
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    expired = await ScheduleService.check_expired_matches(session)
+                if expired:
+                    logger.info(f"Технические результаты: {len(expired)} матчей")
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {e}")
+            await asyncio.sleep(config.EXPIRY_SWEEP_INTERVAL)
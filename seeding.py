@@ -0,0 +1,128 @@
+"""
+T-League Bot - Посев участников при жеребьёвке
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+from sqlalchemy.orm import aliased
+from database.models import (
+    Tournament, TournamentParticipant, ArchivedParticipant, User, TournamentStatus, SeedingMode
+)
+from services.playoff import PlayoffService
+from typing import List, Optional, Dict
+import random
+
+# Таблицы расстановки посевов считаются заранее для сеток до этого размера
+SEED_TABLE_MAX_SIZE = 1024
+
+
+def _build_seed_orders(max_size: int) -> Dict[int, List[int]]:
+    """
+    Стандартная расстановка посевов по позициям сетки для всех степеней двойки:
+    2 -> [1, 2], 4 -> [1, 4, 2, 3], 8 -> [1, 8, 4, 5, 2, 7, 3, 6], ...
+    Каждый посев s из сетки размера n даёт пару (s, 2n + 1 - s) в сетке 2n,
+    поэтому первый и второй посевы могут встретиться только в финале.
+    """
+    orders = {1: [1]}
+    order = [1]
+    size = 1
+    while size < max_size:
+        size *= 2
+        order = [seed for top in order for seed in (top, size + 1 - top)]
+        orders[size] = order
+    return orders
+
+
+SEED_ORDERS = _build_seed_orders(SEED_TABLE_MAX_SIZE)
+
+
+class SeedingService:
+    """Сервис посева: порядок участников по выбранному режиму и расстановка по сетке"""
+
+    @staticmethod
+    def get_seed_order(bracket_size: int) -> List[int]:
+        """Номера посевов по позициям сетки (из готовой таблицы, больше 1024 - расчёт)"""
+        order = SEED_ORDERS.get(bracket_size)
+        if order is None:
+            order = _build_seed_orders(bracket_size)[bracket_size]
+        return order
+
+    @staticmethod
+    def bracket_positions(ranked_ids: List[int]) -> List[Optional[int]]:
+        """
+        Расстановка игроков (сильнейший первым) по позициям сетки за O(n):
+        посев 1 играет с последним, 8 с 9 и т.д. Недостающие посевы - свободные
+        слоты (None), поэтому свободный тур достаётся сильнейшим.
+        """
+        bracket_size = PlayoffService.get_bracket_size(len(ranked_ids))
+        return [
+            ranked_ids[seed - 1] if seed <= len(ranked_ids) else None
+            for seed in SeedingService.get_seed_order(bracket_size)
+        ]
+
+    @staticmethod
+    async def rank_participants(session: AsyncSession, tournament: Tournament) -> List[int]:
+        """
+        Участники турнира от сильнейшего к слабейшему по режиму посева.
+        Рейтинги и результаты предыдущего турнира загружаются одним запросом
+        (участники + пользователи + итоговые места предыдущего завершённого турнира
+        из архива, а если он ещё не перенесён - его участники в рабочей таблице),
+        сортировка - O(n log n).
+        """
+        previous_id = (
+            select(Tournament.id)
+            .where(
+                Tournament.id != tournament.id,
+                Tournament.status == TournamentStatus.FINISHED,
+                Tournament.deleted_at.is_(None)
+            )
+            .order_by(Tournament.finished_at.desc(), Tournament.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        previous = aliased(TournamentParticipant)
+        archived = aliased(ArchivedParticipant)
+
+        result = await session.execute(
+            select(
+                TournamentParticipant.user_id,
+                User.rating,
+                archived.position,
+                previous.points,
+                previous.goals_for,
+                previous.goals_against
+            )
+            .join(User, User.id == TournamentParticipant.user_id)
+            .outerjoin(archived, and_(
+                archived.user_id == TournamentParticipant.user_id,
+                archived.tournament_id == previous_id
+            ))
+            .outerjoin(previous, and_(
+                previous.user_id == TournamentParticipant.user_id,
+                previous.tournament_id == previous_id
+            ))
+            .where(TournamentParticipant.tournament_id == tournament.id)
+        )
+        rows = result.all()
+
+        mode = tournament.seeding_mode or SeedingMode.RATING
+        if mode == SeedingMode.RANDOM:
+            player_ids = [row.user_id for row in rows]
+            random.shuffle(player_ids)
+            return player_ids
+
+        if mode == SeedingMode.PREVIOUS:
+            # Архивный турнир - по итоговому месту, неархивный - по его таблице;
+            # не игравшие в предыдущем турнире - после остальных, по рейтингу
+            rows = sorted(rows, key=lambda row: (
+                row.position is None and row.points is None,
+                row.position or 0,
+                -(row.points or 0),
+                -((row.goals_for or 0) - (row.goals_against or 0)),
+                -(row.goals_for or 0),
+                -(row.rating or 0),
+                row.user_id
+            ))
+        else:
+            rows = sorted(rows, key=lambda row: (-(row.rating or 0), row.user_id))
+
+        return [row.user_id for row in rows]
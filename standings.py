@@ -0,0 +1,478 @@
+"""
+T-League Bot - Турнирные таблицы в памяти
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from database.models import (
+    Tournament, TournamentParticipant, Match, User, StandingsSnapshot,
+    MatchStatus, TournamentFormat
+)
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Tuple
+from config import config
+from contextlib import contextmanager
+import bisect
+
+# Статусы, при которых матч тура считается сыгранным
+FINISHED_STATUSES = (MatchStatus.CONFIRMED, MatchStatus.TECHNICAL)
+
+
+def is_double_loss(status: MatchStatus, score1: int, score2: int) -> bool:
+    """Обоюдное техническое поражение (равный технический счёт): поражение обоим"""
+    return status == MatchStatus.TECHNICAL and score1 == score2
+
+
+@dataclass
+class StandingRow:
+    """Строка таблицы (поля совпадают с TournamentParticipant для форматирования)"""
+    user_id: int
+    points: int = 0
+    matches_played: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    goals_for: int = 0
+    goals_against: int = 0
+
+
+@dataclass
+class StandingPlayer:
+    """Данные игрока для отображения"""
+    id: int
+    username: Optional[str]
+    full_name: str
+
+
+class StandingsTable:
+    """
+    Упорядоченная таблица одного турнира.
+    Строки хранятся в списке, отсортированном по первому критерию (очки), поэтому
+    результат матча переставляет строку бинарным поиском. Остальные критерии
+    (личные встречи, разница, забитые) применяются только внутри групп с равными
+    очками при чтении; готовый порядок кэшируется до следующего результата.
+    """
+
+    def __init__(self, tiebreakers: List[str]):
+        self.tiebreakers = tiebreakers
+        self.rows: Dict[int, StandingRow] = {}
+        self.players: Dict[int, StandingPlayer] = {}
+        # Индекс личных встреч: (меньший id, больший id) -> [очки, голы] каждого
+        self.head_to_head: Dict[Tuple[int, int], List[int]] = {}
+        self._order: List[Tuple] = []
+        self._ranked: Optional[List[tuple]] = None
+
+    def _key(self, row: StandingRow) -> Tuple:
+        return (-StandingsTable._value(row, self.tiebreakers[0]), row.user_id)
+
+    @staticmethod
+    def _value(row: StandingRow, criterion: str) -> int:
+        if criterion == "points":
+            return row.points
+        if criterion == "goal_difference":
+            return row.goals_for - row.goals_against
+        if criterion == "goals_for":
+            return row.goals_for
+        if criterion == "wins":
+            return row.wins
+        raise ValueError(f"Неизвестный критерий: {criterion}")
+
+    def add_player(self, row: StandingRow, player: Optional[StandingPlayer] = None):
+        self.rows[row.user_id] = row
+        self.players[row.user_id] = player
+        bisect.insort(self._order, self._key(row))
+        self._ranked = None
+
+    def add_head_to_head(
+        self,
+        player1_id: int,
+        player2_id: int,
+        score1: int,
+        score2: int,
+        double_loss: bool = False
+    ):
+        """Учёт матча в индексе личных встреч"""
+        if player1_id > player2_id:
+            player1_id, player2_id, score1, score2 = player2_id, player1_id, score2, score1
+        record = self.head_to_head.setdefault((player1_id, player2_id), [0, 0, 0, 0])
+
+        if double_loss:
+            pass
+        elif score1 > score2:
+            record[0] += 3
+        elif score1 < score2:
+            record[1] += 3
+        else:
+            record[0] += 1
+            record[1] += 1
+        record[2] += score1
+        record[3] += score2
+
+    def apply_result(
+        self,
+        player1_id: int,
+        player2_id: int,
+        score1: int,
+        score2: int,
+        double_loss: bool = False
+    ):
+        """
+        Результат матча: перестановка двух строк за O(log n) поиска + индекс личных встреч.
+        double_loss - обоюдное техническое поражение: поражение обоим вместо ничьей.
+        """
+        for user_id, goals_for, goals_against in (
+            (player1_id, score1, score2),
+            (player2_id, score2, score1)
+        ):
+            row = self.rows.get(user_id)
+            if row is None:
+                continue
+
+            index = bisect.bisect_left(self._order, self._key(row))
+            del self._order[index]
+
+            row.matches_played += 1
+            row.goals_for += goals_for
+            row.goals_against += goals_against
+            if goals_for > goals_against:
+                row.wins += 1
+                row.points += 3
+            elif goals_for == goals_against and not double_loss:
+                row.draws += 1
+                row.points += 1
+            else:
+                row.losses += 1
+
+            bisect.insort(self._order, self._key(row))
+
+        self.add_head_to_head(player1_id, player2_id, score1, score2, double_loss)
+        self._ranked = None
+
+    def _head_to_head_values(self, user_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """Мини-таблица личных встреч внутри группы: (очки, разница мячей)"""
+        values = {uid: [0, 0] for uid in user_ids}
+        for i, first in enumerate(user_ids):
+            for second in user_ids[i + 1:]:
+                a, b = (first, second) if first < second else (second, first)
+                record = self.head_to_head.get((a, b))
+                if not record:
+                    continue
+                values[a][0] += record[0]
+                values[b][0] += record[1]
+                values[a][1] += record[2] - record[3]
+                values[b][1] += record[3] - record[2]
+        return {uid: (v[0], v[1]) for uid, v in values.items()}
+
+    def _resolve(self, user_ids: List[int], chain: List[str]) -> List[int]:
+        """Упорядочивание группы по цепочке критериев"""
+        if len(user_ids) <= 1 or not chain:
+            return sorted(user_ids)
+
+        criterion, rest = chain[0], chain[1:]
+        if criterion == "head_to_head":
+            h2h = self._head_to_head_values(user_ids)
+            value = lambda uid: h2h[uid]
+        else:
+            value = lambda uid: StandingsTable._value(self.rows[uid], criterion)
+
+        ordered = sorted(user_ids, key=value, reverse=True)
+        result = []
+        start = 0
+        for i in range(1, len(ordered) + 1):
+            if i == len(ordered) or value(ordered[i]) != value(ordered[start]):
+                result.extend(self._resolve(ordered[start:i], rest))
+                start = i
+        return result
+
+    def ranked(self) -> List[tuple]:
+        """Таблица [(строка, игрок), ...] в итоговом порядке"""
+        if self._ranked is not None:
+            return self._ranked
+
+        ranked_ids: List[int] = []
+        block: List[int] = []
+        block_key = None
+        for key in self._order:
+            if block and key[0] != block_key:
+                ranked_ids.extend(self._resolve(block, self.tiebreakers[1:]))
+                block = []
+            block_key = key[0]
+            block.append(key[1])
+        if block:
+            ranked_ids.extend(self._resolve(block, self.tiebreakers[1:]))
+
+        self._ranked = [(self.rows[uid], self.players[uid]) for uid in ranked_ids]
+        return self._ranked
+
+
+# Кэш таблиц: tournament_id -> таблица
+_tables: Dict[int, StandingsTable] = {}
+# Счётчик изменений таблицы: загрузка, во время которой он сменился, не кэшируется
+_generations: Dict[int, int] = {}
+# Незавершённые изменения: транзакции между началом commit и обновлением таблицы
+_pending: Dict[int, int] = {}
+
+
+class StandingsService:
+    """
+    Сервис турнирных таблиц в памяти.
+    Таблица строится из БД при первом просмотре (два запроса) и дальше обновляется
+    на каждом подтверждённом матче. Цепочка критериев - config.STANDINGS_TIEBREAKERS
+    (первый критерий - не личные встречи).
+    """
+
+    @staticmethod
+    async def get_table(session: AsyncSession, tournament_id: int) -> List[tuple]:
+        """Турнирная таблица: из памяти, при первом обращении - загрузка из БД"""
+        table = _tables.get(tournament_id)
+        if table is None:
+            generation = _generations.get(tournament_id, 0)
+            table = await StandingsService._load(session, tournament_id)
+            # Загрузка могла застать результат, уже учтённый в БД, но ещё не в памяти
+            if not _pending.get(tournament_id) and _generations.get(tournament_id, 0) == generation:
+                _tables[tournament_id] = table
+        return table.ranked()
+
+    @staticmethod
+    async def _load(session: AsyncSession, tournament_id: int) -> StandingsTable:
+        """Построение таблицы: участники и сыгранные матчи (в т.ч. технические)"""
+        table = StandingsTable(list(config.STANDINGS_TIEBREAKERS))
+
+        result = await session.execute(
+            select(TournamentParticipant, User.username, User.full_name)
+            .join(User, TournamentParticipant.user_id == User.id)
+            .where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        for participant, username, full_name in result.all():
+            table.add_player(
+                StandingRow(
+                    user_id=participant.user_id,
+                    points=participant.points,
+                    matches_played=participant.matches_played,
+                    wins=participant.wins,
+                    draws=participant.draws,
+                    losses=participant.losses,
+                    goals_for=participant.goals_for,
+                    goals_against=participant.goals_against
+                ),
+                StandingPlayer(id=participant.user_id, username=username, full_name=full_name)
+            )
+
+        result = await session.execute(
+            select(
+                Match.player1_id, Match.player2_id,
+                Match.player1_score, Match.player2_score, Match.status
+            ).where(
+                Match.tournament_id == tournament_id,
+                Match.status.in_(FINISHED_STATUSES)
+            )
+        )
+        for player1_id, player2_id, score1, score2, status in result.all():
+            table.add_head_to_head(
+                player1_id, player2_id, score1, score2,
+                is_double_loss(status, score1, score2)
+            )
+
+        return table
+
+    @staticmethod
+    @contextmanager
+    def updating(tournament_id: int):
+        """
+        Обёртка commit результата и обновления таблицы в памяти:
+        загрузка таблицы, пересёкшаяся с ними, не попадает в кэш
+        (иначе результат был бы учтён дважды или потерян).
+        """
+        _pending[tournament_id] = _pending.get(tournament_id, 0) + 1
+        _generations[tournament_id] = _generations.get(tournament_id, 0) + 1
+        try:
+            yield
+        finally:
+            _pending[tournament_id] -= 1
+            if not _pending[tournament_id]:
+                del _pending[tournament_id]
+            _generations[tournament_id] += 1
+
+    @staticmethod
+    def on_match_confirmed(match: Match):
+        """Обновление загруженной таблицы после подтверждения матча (после commit, внутри updating)"""
+        table = _tables.get(match.tournament_id)
+        if table is None:
+            return
+        table.apply_result(
+            match.player1_id, match.player2_id,
+            match.player1_score, match.player2_score,
+            is_double_loss(match.status, match.player1_score, match.player2_score)
+        )
+
+    @staticmethod
+    def invalidate(tournament_id: int):
+        """Сброс таблицы (регистрация, жеребьёвка, удаление) - пересоберётся при просмотре"""
+        _tables.pop(tournament_id, None)
+        _generations[tournament_id] = _generations.get(tournament_id, 0) + 1
+
+    # ================== ТАБЛИЦЫ ПОСЛЕ ТУРА ==================
+
+    @staticmethod
+    async def snapshot_if_round_complete(session: AsyncSession, match: Match) -> bool:
+        """
+        Сохранение таблицы после тура, если подтверждён последний матч тура (без commit).
+        Групповой этап не сохраняется - у него свои таблицы групп.
+        """
+        tournament = await session.get(Tournament, match.tournament_id)
+        if not tournament or tournament.format == TournamentFormat.GROUP_PLAYOFF:
+            return False
+
+        unfinished = await session.scalar(
+            select(func.count(Match.id)).where(
+                Match.tournament_id == tournament.id,
+                Match.round_number == match.round_number,
+                Match.status.notin_(FINISHED_STATUSES)
+            )
+        )
+        if unfinished:
+            return False
+
+        exists = await session.scalar(
+            select(StandingsSnapshot.id).where(
+                StandingsSnapshot.tournament_id == tournament.id,
+                StandingsSnapshot.round_number == match.round_number
+            ).limit(1)
+        )
+        if exists:
+            return False
+
+        await StandingsService.write_round_snapshot(session, tournament, match.round_number)
+        return True
+
+    @staticmethod
+    async def write_round_snapshot(
+        session: AsyncSession,
+        tournament: Tournament,
+        round_number: int
+    ):
+        """
+        Компактные строки таблицы после тура: позиция, очки, голы.
+        Круговой турнир - по матчам до этого тура включительно (туры могут
+        завершаться не по порядку); швейцарская система идёт строго по турам,
+        поэтому берутся текущие очки с Бухгольцем и Зоннеборном-Бергером.
+        """
+        if tournament.format == TournamentFormat.SWISS:
+            from services.tournament import TournamentService
+            ranked = [
+                (participant, None)
+                for participant, _ in await TournamentService.get_tournament_table(session, tournament.id)
+            ]
+        else:
+            table = StandingsTable(list(config.STANDINGS_TIEBREAKERS))
+            result = await session.execute(
+                select(TournamentParticipant.user_id)
+                .where(TournamentParticipant.tournament_id == tournament.id)
+            )
+            for (user_id,) in result.all():
+                table.add_player(StandingRow(user_id=user_id))
+
+            result = await session.execute(
+                select(
+                    Match.player1_id, Match.player2_id,
+                    Match.player1_score, Match.player2_score, Match.status
+                ).where(
+                    Match.tournament_id == tournament.id,
+                    Match.status.in_(FINISHED_STATUSES),
+                    Match.round_number <= round_number
+                )
+            )
+            for player1_id, player2_id, score1, score2, status in result.all():
+                table.apply_result(
+                    player1_id, player2_id, score1, score2,
+                    is_double_loss(status, score1, score2)
+                )
+            ranked = table.ranked()
+
+        session.add_all([
+            StandingsSnapshot(
+                tournament_id=tournament.id,
+                round_number=round_number,
+                user_id=row.user_id,
+                position=position,
+                points=row.points,
+                matches_played=row.matches_played,
+                goals_for=row.goals_for,
+                goals_against=row.goals_against
+            )
+            for position, (row, _) in enumerate(ranked, 1)
+        ])
+        tournament.last_snapshot_round = max(tournament.last_snapshot_round or 0, round_number)
+        await session.flush()
+
+    @staticmethod
+    async def get_round_snapshot(
+        session: AsyncSession,
+        tournament_id: int,
+        round_number: int
+    ) -> List[tuple]:
+        """
+        Таблица после тура одним запросом по индексу (tournament_id, round_number):
+        [(строка, игрок, позиция после предыдущего тура или None), ...]
+        """
+        result = await session.execute(
+            select(StandingsSnapshot, User.username, User.full_name)
+            .join(User, StandingsSnapshot.user_id == User.id)
+            .where(
+                StandingsSnapshot.tournament_id == tournament_id,
+                StandingsSnapshot.round_number.in_([round_number - 1, round_number])
+            )
+            .order_by(StandingsSnapshot.round_number, StandingsSnapshot.position)
+        )
+
+        previous: Dict[int, int] = {}
+        rows = []
+        for snapshot, username, full_name in result.all():
+            if snapshot.round_number != round_number:
+                previous[snapshot.user_id] = snapshot.position
+                continue
+            rows.append((
+                snapshot,
+                StandingPlayer(id=snapshot.user_id, username=username, full_name=full_name)
+            ))
+
+        return [(row, player, previous.get(row.user_id)) for row, player in rows]
+
+    @staticmethod
+    async def format_round_table(rows: List[tuple], round_number: int) -> str:
+        """Таблица после тура со стрелками изменения позиции"""
+        if not rows:
+            return (
+                f"📊 <b>Таблица после тура {round_number}</b>\n\n"
+                "Тур ещё не завершён."
+            )
+
+        text = f"📊 <b>Таблица после тура {round_number}</b>\n\n"
+        text += "<pre>"
+        text += "№     Игрок       М  О  Г\n"
+        text += "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+
+        for row, player, previous in rows:
+            if player.username:
+                name = f"@{player.username}"[:10]
+            else:
+                name = player.full_name[:10]
+            name = name.ljust(10)
+
+            if previous is None or previous == row.position:
+                move = "  ="
+            elif previous > row.position:
+                move = f"▲{previous - row.position}".rjust(3)
+            else:
+                move = f"▼{row.position - previous}".rjust(3)
+
+            pos = str(row.position).rjust(2)
+            matches = str(row.matches_played).rjust(2)
+            points = str(row.points).rjust(2)
+            goals = f"{row.goals_for}:{row.goals_against}"
+
+            text += f"{pos} {move} {name} {matches} {points} {goals}\n"
+
+        text += "</pre>\n"
+        text += "<i>▲▼ - изменение позиции за тур</i>"
+
+        return text
@@ -8,6 +8,7 @@ class TournamentCreation(StatesGroup):
     name = State()
     description = State()
     format = State()
+    seeding = State()
     max_participants = State()
 
 class MatchReport(StatesGroup):
@@ -0,0 +1,187 @@
+"""
+T-League Bot - Сводки турниров для карточек турниров
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from database.models import (
+    Tournament, TournamentParticipant, Match, ArchivedMatch, ArchivedParticipant
+)
+from services.standings import FINISHED_STATUSES
+from dataclasses import dataclass
+from typing import Optional, Dict, Set
+from contextlib import contextmanager
+
+
+@dataclass
+class TournamentSummary:
+    """Сводка турнира (поля совпадают с Tournament для клавиатур)"""
+    id: int
+    name: str
+    description: Optional[str]
+    format: str
+    status: str
+    registration_open: bool
+    draw_completed: bool
+    max_participants: Optional[int]
+    participants_count: int
+    current_round: int
+    total_rounds: int
+    matches_total: int
+    matches_confirmed: int
+
+
+# Кэш сводок: tournament_id -> сводка
+_summaries: Dict[int, TournamentSummary] = {}
+# Участие: user_id -> множество tournament_id
+_participations: Dict[int, Set[int]] = {}
+# Счётчики изменений сводки турнира и участия пользователя: загрузка, во время
+# которой счётчик сменился, не кэшируется
+_generations: Dict[int, int] = {}
+_user_generations: Dict[int, int] = {}
+# Незавершённые изменения: транзакции между началом commit и учётом события
+_pending: Dict[int, int] = {}
+
+
+class SummaryService:
+    """
+    Сервис сводок турниров в памяти.
+    Сводка загружается одним запросом при первом просмотре турнира (счётчики
+    матчей - подзапросами) и дальше обновляется на событиях: регистрация
+    увеличивает счётчик участников, подтверждение - счётчик сыгранных матчей;
+    жеребьёвка, запуск, завершение, удаление и новые туры сбрасывают сводку.
+    Участие пользователя - множество id турниров, загружаемое одним запросом.
+    Загрузка, застав изменение, ещё не учтённое в памяти, в кэш не попадает.
+    """
+
+    @staticmethod
+    async def _load(session: AsyncSession, tournament_id: int) -> Optional[TournamentSummary]:
+        """Сводка турнира со счётчиками матчей (один запрос)"""
+        # Матчи завершённого турнира лежат в архиве - считаются обе таблицы
+        def count_matches(model, *conditions):
+            return (
+                select(func.count(model.id))
+                .where(model.tournament_id == Tournament.id, *conditions)
+                .scalar_subquery()
+            )
+
+        matches_total = count_matches(Match) + count_matches(ArchivedMatch)
+        # Сыгранные - подтверждённые и технические результаты
+        matches_confirmed = (
+            count_matches(Match, Match.status.in_(FINISHED_STATUSES))
+            + count_matches(ArchivedMatch, ArchivedMatch.status.in_(FINISHED_STATUSES))
+        )
+        result = await session.execute(
+            select(
+                Tournament.id, Tournament.name, Tournament.description,
+                Tournament.format, Tournament.status, Tournament.registration_open,
+                Tournament.draw_completed, Tournament.max_participants,
+                Tournament.participants_count, Tournament.current_round,
+                Tournament.total_rounds,
+                matches_total.label("matches_total"),
+                matches_confirmed.label("matches_confirmed")
+            )
+            .where(
+                Tournament.id == tournament_id,
+                Tournament.deleted_at.is_(None)
+            )
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        return TournamentSummary(
+            id=row.id,
+            name=row.name,
+            description=row.description,
+            format=row.format,
+            status=row.status,
+            registration_open=row.registration_open,
+            draw_completed=row.draw_completed,
+            max_participants=row.max_participants,
+            participants_count=row.participants_count or 0,
+            current_round=row.current_round or 0,
+            total_rounds=row.total_rounds or 0,
+            matches_total=row.matches_total or 0,
+            matches_confirmed=row.matches_confirmed or 0
+        )
+
+    @staticmethod
+    async def get_summary(session: AsyncSession, tournament_id: int) -> Optional[TournamentSummary]:
+        """Сводка турнира: из памяти, при первом обращении - из БД"""
+        summary = _summaries.get(tournament_id)
+        if summary is None:
+            generation = _generations.get(tournament_id, 0)
+            summary = await SummaryService._load(session, tournament_id)
+            if (
+                summary is not None
+                and not _pending.get(tournament_id)
+                and _generations.get(tournament_id, 0) == generation
+            ):
+                _summaries[tournament_id] = summary
+        return summary
+
+    @staticmethod
+    async def get_user_tournament_ids(session: AsyncSession, user_id: int) -> Set[int]:
+        """Турниры, в которых участвует пользователь"""
+        tournament_ids = _participations.get(user_id)
+        if tournament_ids is None:
+            generation = _user_generations.get(user_id, 0)
+            result = await session.execute(
+                select(TournamentParticipant.tournament_id)
+                .where(TournamentParticipant.user_id == user_id)
+                .union(
+                    select(ArchivedParticipant.tournament_id)
+                    .where(ArchivedParticipant.user_id == user_id)
+                )
+            )
+            tournament_ids = {tournament_id for (tournament_id,) in result.all()}
+            if _user_generations.get(user_id, 0) == generation:
+                _participations[user_id] = tournament_ids
+        return tournament_ids
+
+    @staticmethod
+    async def is_participant(session: AsyncSession, tournament_id: int, user_id: int) -> bool:
+        """Участие пользователя в турнире (из кэша участия)"""
+        return tournament_id in await SummaryService.get_user_tournament_ids(session, user_id)
+
+    @staticmethod
+    @contextmanager
+    def updating(tournament_id: int):
+        """
+        Обёртка commit и следующего за ним on_registered / on_match_confirmed:
+        пока она открыта, загруженная сводка турнира не кэшируется
+        (иначе изменение было бы учтено дважды или потеряно).
+        """
+        _pending[tournament_id] = _pending.get(tournament_id, 0) + 1
+        _generations[tournament_id] = _generations.get(tournament_id, 0) + 1
+        try:
+            yield
+        finally:
+            _pending[tournament_id] -= 1
+            if not _pending[tournament_id]:
+                del _pending[tournament_id]
+            _generations[tournament_id] += 1
+
+    @staticmethod
+    def on_registered(tournament_id: int, user_id: int):
+        """Учёт новой регистрации (после commit, внутри updating)"""
+        if tournament_id in _summaries:
+            _summaries[tournament_id].participants_count += 1
+        if user_id in _participations:
+            _participations[user_id].add(tournament_id)
+        _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+
+    @staticmethod
+    def on_match_confirmed(match: Match):
+        """Учёт подтверждённого матча (после commit, внутри updating)"""
+        if match.tournament_id in _summaries:
+            _summaries[match.tournament_id].matches_confirmed += 1
+
+    @staticmethod
+    def invalidate(tournament_id: int):
+        """
+        Сброс сводки (жеребьёвка, запуск, завершение, удаление, новые туры) -
+        перечитается одним запросом при следующем просмотре.
+        """
+        _summaries.pop(tournament_id, None)
+        _generations[tournament_id] = _generations.get(tournament_id, 0) + 1
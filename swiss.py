@@ -0,0 +1,361 @@
+"""
+T-League Bot - Швейцарская система
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from database.models import (
+    Tournament, TournamentParticipant, Match, User, MatchStatus, TournamentFormat
+)
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Set, Tuple
+from services.standings import is_double_loss
+from services.playoff import PlayoffService
+from services.matching import max_weight_matching
+from config import config
+import math
+
+# Статусы, при которых матч тура считается сыгранным
+FINISHED_STATUSES = (MatchStatus.CONFIRMED, MatchStatus.TECHNICAL)
+
+
+class SwissSearchExhausted(Exception):
+    """Перебор вариантов жеребьёвки превысил лимит шагов"""
+
+
+@dataclass
+class SwissPlayer:
+    """Участник в момент жеребьёвки тура"""
+    user_id: int
+    score: int
+    rating: int = 0
+    buchholz: float = 0.0
+    home_count: int = 0
+    had_bye: bool = False
+
+
+class SwissService:
+    """Сервис жеребьёвки по швейцарской системе"""
+
+    @staticmethod
+    def get_rounds_count(players_count: int) -> int:
+        """Количество туров: из конфигурации или log2(n) с округлением вверх"""
+        if config.SWISS_ROUNDS:
+            return min(config.SWISS_ROUNDS, max(players_count - 1, 1))
+        return max(math.ceil(math.log2(max(players_count, 2))), 1)
+
+    @staticmethod
+    def pair_players(
+        players: List[SwissPlayer],
+        history: Dict[int, Set[int]]
+    ) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        """
+        Жеребьёвка тура по очковым группам (голландская система).
+        history - индекс сыгранных пар: user_id -> множество соперников (проверка повтора за O(1)).
+        Внутри группы верхняя половина играет с нижней; кто не нашёл пары, "плавает" в группу ниже.
+        При нечётном числе свободный тур получает самый низкий в таблице игрок без bye.
+        Если так без повторных встреч не разбить, жеребьёвка проводится паросочетанием
+        минимальной стоимости (_match_pairs): оно само выбирает bye и сводит повторы к минимуму.
+        Возвращает (список пар (хозяева, гости), user_id игрока со свободным туром).
+        """
+        ranked = sorted(
+            players,
+            key=lambda p: (-p.score, -p.buchholz, -p.rating, p.user_id)
+        )
+
+        bye_player = None
+        pool = ranked
+        if len(ranked) % 2 == 1:
+            bye_player = next((p for p in reversed(ranked) if not p.had_bye), ranked[-1])
+            pool = [p for p in ranked if p is not bye_player]
+
+        try:
+            index_pairs = SwissService._search_pairs(pool, history)
+        except SwissSearchExhausted:
+            index_pairs = None
+
+        if index_pairs is not None:
+            player_pairs = [(pool[i], pool[j]) for i, j in index_pairs]
+        else:
+            player_pairs, bye_player = SwissService._match_pairs(ranked, history)
+
+        pairs = []
+        for first, second in player_pairs:
+            # Хозяином становится тот, кто реже играл дома
+            if second.home_count < first.home_count:
+                first, second = second, first
+            pairs.append((first.user_id, second.user_id))
+
+        return pairs, bye_player.user_id if bye_player else None
+
+    @staticmethod
+    def _search_pairs(
+        ranked: List[SwissPlayer],
+        history: Dict[int, Set[int]]
+    ) -> Optional[List[Tuple[int, int]]]:
+        """Поиск с возвратом без повторных встреч: старший свободный игрок перебирает соперников"""
+        n = len(ranked)
+        used = [False] * n
+        result: List[Tuple[int, int]] = []
+        steps = 0
+
+        def candidates(i: int) -> List[int]:
+            score = ranked[i].score
+            group = [j for j in range(i + 1, n) if not used[j] and ranked[j].score == score]
+            lower = [j for j in range(i + 1, n) if not used[j] and ranked[j].score != score]
+            k = (len(group) - 1) // 2
+            return group[k:] + group[:k][::-1] + lower
+
+        def solve(start: int) -> bool:
+            nonlocal steps
+            i = start
+            while i < n and used[i]:
+                i += 1
+            if i == n:
+                return True
+
+            used[i] = True
+            played = history.get(ranked[i].user_id, ())
+            for j in candidates(i):
+                steps += 1
+                if steps > config.SWISS_SEARCH_BUDGET:
+                    raise SwissSearchExhausted()
+                if ranked[j].user_id in played:
+                    continue
+                used[j] = True
+                result.append((i, j))
+                if solve(i + 1):
+                    return True
+                result.pop()
+                used[j] = False
+            used[i] = False
+            return False
+
+        return result if solve(0) else None
+
+    @staticmethod
+    def _match_pairs(
+        ranked: List[SwissPlayer],
+        history: Dict[int, Set[int]]
+    ) -> Tuple[List[Tuple[SwissPlayer, SwissPlayer]], Optional[SwissPlayer]]:
+        """
+        Жеребьёвка паросочетанием максимального веса (вместо первой жадной пары).
+        Рёбра - соперники в пределах SWISS_MATCHING_WINDOW мест по таблице; при нечётном
+        числе добавляется фиктивная вершина "bye", связанная с нижними по таблице игроками.
+        Порядок критериев задаётся весами: меньше повторных встреч (повторный bye считается
+        как повтор), затем меньше сумма квадратов разницы очков в парах (bye - самому
+        низкому по очкам), затем ближе места соперников. Возвращает (пары игроков, игрок
+        со свободным туром).
+        """
+        n = len(ranked)
+        window = max(config.SWISS_MATCHING_WINDOW, 2)
+        bye = n if n % 2 == 1 else None
+        # Кандидаты на bye - нижние по таблице: сначала без свободного тура
+        bye_candidates = [i for i in reversed(range(n)) if not ranked[i].had_bye][:window]
+        bye_candidates = bye_candidates or list(range(max(n - window, 0), n))
+        min_score = min(p.score for p in ranked)
+        max_diff = max(p.score for p in ranked) - min_score
+        # Вес каждого критерия больше суммы всех младших: повтор не окупается никакой
+        # разницей очков, разница очков - никакой разницей мест
+        nearness = window
+        closeness = nearness * (n // 2 + 1)
+        fresh = closeness * (max_diff * max_diff + 1) * (n // 2 + 1)
+
+        edges = []
+        for i in range(n):
+            played = history.get(ranked[i].user_id, ())
+            for j in range(i + 1, min(n, i + 1 + window)):
+                diff = ranked[i].score - ranked[j].score
+                weight = closeness * (max_diff * max_diff - diff * diff) + nearness - (j - i)
+                if ranked[j].user_id not in played:
+                    weight += fresh
+                edges.append((i, j, weight))
+        if bye is not None:
+            for place, i in enumerate(bye_candidates):
+                diff = ranked[i].score - min_score
+                weight = closeness * (max_diff * max_diff - diff * diff) + nearness - place
+                if not ranked[i].had_bye:
+                    weight += fresh
+                edges.append((i, bye, weight))
+
+        mate = max_weight_matching(edges, max_cardinality=True)
+        pairs = [(ranked[i], ranked[mate[i]]) for i in range(n) if i < mate[i] < n]
+        bye_player = ranked[mate[bye]] if bye is not None else None
+        return pairs, bye_player
+
+    @staticmethod
+    def calculate_tiebreaks(
+        points: Dict[int, int],
+        results: List[Tuple[int, int, int, int]]
+    ) -> Dict[int, Tuple[float, float]]:
+        """
+        Дополнительные показатели: user_id -> (Бухгольц, Зоннеборн-Бергер).
+        results - сыгранные матчи (player1_id, player2_id, player1_score, player2_score[, status]).
+        Бухгольц - сумма очков соперников; З-Б - очки побеждённых соперников + половина очков
+        соперников, с которыми сыграна ничья (обоюдное техническое поражение в З-Б не идёт).
+        """
+        tiebreaks: Dict[int, List[float]] = {uid: [0.0, 0.0] for uid in points}
+
+        for p1, p2, s1, s2, *status in results:
+            double_loss = bool(status) and is_double_loss(status[0], s1, s2)
+            for me, opp, my_score, opp_score in ((p1, p2, s1, s2), (p2, p1, s2, s1)):
+                if me not in tiebreaks:
+                    continue
+                opp_points = points.get(opp, 0)
+                tiebreaks[me][0] += opp_points
+                if double_loss:
+                    continue
+                if my_score > opp_score:
+                    tiebreaks[me][1] += opp_points
+                elif my_score == opp_score:
+                    tiebreaks[me][1] += opp_points / 2
+
+        return {uid: (values[0], values[1]) for uid, values in tiebreaks.items()}
+
+    @staticmethod
+    async def _load_state(
+        session: AsyncSession,
+        tournament_id: int
+    ) -> Tuple[List[SwissPlayer], Dict[int, Set[int]]]:
+        """Участники и индекс сыгранных пар за два запроса"""
+        result = await session.execute(
+            select(
+                TournamentParticipant.user_id,
+                TournamentParticipant.points,
+                TournamentParticipant.byes,
+                User.rating
+            )
+            .join(User, TournamentParticipant.user_id == User.id)
+            .where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        players = {
+            user_id: SwissPlayer(
+                user_id=user_id,
+                score=points or 0,
+                rating=rating or 0,
+                had_bye=bool(byes)
+            )
+            for user_id, points, byes, rating in result.all()
+        }
+
+        result = await session.execute(
+            select(
+                Match.player1_id, Match.player2_id,
+                Match.player1_score, Match.player2_score, Match.status
+            ).where(Match.tournament_id == tournament_id)
+        )
+
+        history: Dict[int, Set[int]] = {uid: set() for uid in players}
+        played = []
+        for p1, p2, s1, s2, status in result.all():
+            history.setdefault(p1, set()).add(p2)
+            history.setdefault(p2, set()).add(p1)
+            if p1 in players:
+                players[p1].home_count += 1
+            if status in FINISHED_STATUSES and s1 is not None and s2 is not None:
+                played.append((p1, p2, s1, s2, status))
+
+        tiebreaks = SwissService.calculate_tiebreaks(
+            {uid: p.score for uid, p in players.items()}, played
+        )
+        for uid, (buchholz, _) in tiebreaks.items():
+            players[uid].buchholz = buchholz
+
+        return list(players.values()), history
+
+    @staticmethod
+    async def get_tiebreaks(
+        session: AsyncSession,
+        tournament_id: int
+    ) -> Dict[int, Tuple[float, float]]:
+        """Бухгольц и Зоннеборн-Бергер всех участников турнира"""
+        result = await session.execute(
+            select(TournamentParticipant.user_id, TournamentParticipant.points)
+            .where(TournamentParticipant.tournament_id == tournament_id)
+        )
+        points = {user_id: pts or 0 for user_id, pts in result.all()}
+
+        result = await session.execute(
+            select(
+                Match.player1_id, Match.player2_id,
+                Match.player1_score, Match.player2_score, Match.status
+            ).where(
+                Match.tournament_id == tournament_id,
+                Match.status.in_(FINISHED_STATUSES)
+            )
+        )
+        return SwissService.calculate_tiebreaks(points, result.all())
+
+    @staticmethod
+    async def create_round(
+        session: AsyncSession,
+        tournament: Tournament,
+        round_number: int
+    ) -> int:
+        """Жеребьёвка и создание матчей тура (без commit). Возвращает количество матчей"""
+        players, history = await SwissService._load_state(session, tournament.id)
+        pairs, bye_user_id = SwissService.pair_players(players, history)
+
+        session.add_all([
+            Match(
+                tournament_id=tournament.id,
+                round_number=round_number,
+                player1_id=home_id,
+                player2_id=away_id,
+                status=MatchStatus.SCHEDULED,
+                deadline_set=False
+            )
+            for home_id, away_id in pairs
+        ])
+
+        if bye_user_id is not None:
+            await session.execute(
+                update(TournamentParticipant)
+                .where(
+                    TournamentParticipant.tournament_id == tournament.id,
+                    TournamentParticipant.user_id == bye_user_id
+                )
+                .values(
+                    points=TournamentParticipant.points + config.SWISS_BYE_POINTS,
+                    byes=TournamentParticipant.byes + 1
+                )
+            )
+
+        tournament.current_round = round_number
+        await session.flush()
+        return len(pairs)
+
+    @staticmethod
+    async def start(
+        session: AsyncSession,
+        tournament: Tournament,
+        participants_count: int
+    ) -> int:
+        """Жеребьёвка турнира: количество туров и первый тур"""
+        tournament.total_rounds = SwissService.get_rounds_count(participants_count)
+        return await SwissService.create_round(session, tournament, 1)
+
+    @staticmethod
+    async def on_match_confirmed(session: AsyncSession, match: Match) -> int:
+        """Когда сыгран последний матч тура, проводится жеребьёвка следующего (без commit)"""
+        tournament = await session.get(Tournament, match.tournament_id)
+        if not tournament or tournament.format != TournamentFormat.SWISS:
+            return 0
+        if match.round_number != tournament.current_round:
+            return 0
+        if tournament.current_round >= tournament.total_rounds:
+            return 0
+
+        unfinished = await session.scalar(
+            select(func.count(Match.id)).where(
+                Match.tournament_id == tournament.id,
+                Match.round_number == match.round_number,
+                Match.status.notin_(FINISHED_STATUSES)
+            )
+        )
+        if unfinished:
+            return 0
+        # Жеребьёвку тура проводит одно из параллельных подтверждений
+        if not await PlayoffService.claim_round(session, tournament, match.round_number + 1):
+            return 0
+
+        return await SwissService.create_round(session, tournament, match.round_number + 1)
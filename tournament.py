@@ -2,15 +2,25 @@
 T-League Bot - Логика турниров (ИСПРАВЛЕННАЯ ВЕРСИЯ v1.1.2)
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
 from database.models import (
     Tournament, TournamentParticipant, Match, User, 
     TournamentStatus, TournamentFormat, MatchStatus,
-    TournamentRecord
+    FixtureMode, SeedingMode
 )
+from services.playoff import PlayoffService
+from services.swiss import SwissService
+from services.groups import GroupStageService
+from services.standings import StandingsService
+from services.summary import SummaryService
+from services.seeding import SeedingService
+from services.archive import ArchiveService
+from services.dashboard import DashboardService
+from config import config
 from datetime import datetime
-from typing import List, Optional
-import random
+from typing import List, Optional, Tuple
+import json
 
 class TournamentService:
     """Сервис управления турнирами"""
@@ -21,7 +31,8 @@ class TournamentService:
         name: str,
         description: str,
         format: TournamentFormat,
-        max_participants: Optional[int] = None
+        max_participants: Optional[int] = None,
+        seeding_mode: SeedingMode = SeedingMode.RATING
     ) -> Tournament:
         """Создание нового турнира (регистрация закрыта по умолчанию)"""
         tournament = Tournament(
@@ -29,6 +40,7 @@ class TournamentService:
             description=description,
             format=format,
             max_participants=max_participants,
+            seeding_mode=seeding_mode,
             status=TournamentStatus.REGISTRATION,
             registration_open=False
         )
@@ -50,6 +62,7 @@ class TournamentService:
         
         tournament.registration_open = not tournament.registration_open
         await session.commit()
+        SummaryService.invalidate(tournament_id)
         return True
     
     @staticmethod
@@ -84,16 +97,19 @@ class TournamentService:
                 session, tournament, participants, meetings_count
             )
         elif tournament.format == TournamentFormat.GROUP_PLAYOFF:
-            await TournamentService._generate_round_robin_meetings(
+            await GroupStageService.start(
                 session, tournament, participants, meetings_count
             )
         elif tournament.format == TournamentFormat.PLAYOFF:
             await TournamentService._generate_playoff_bracket(
                 session, tournament, participants
             )
+        elif tournament.format == TournamentFormat.SWISS:
+            await SwissService.start(session, tournament, len(participants))
         
         tournament.draw_completed = True
         await session.commit()
+        SummaryService.invalidate(tournament_id)
         return True
     
     @staticmethod
@@ -110,95 +126,159 @@ class TournamentService:
         participants: List[TournamentParticipant],
         meetings_count: int
     ):
-        """Генерация матчей с учётом количества встреч"""
-        player_ids = [p.user_id for p in participants]
-        n = len(player_ids)
-        
-        if n % 2 == 1:
-            player_ids.append(None)
-            n += 1
-        
-        round_num = 0
-        for meeting in range(meetings_count):
-            for r in range(n - 1):
-                round_num += 1
-                matches_per_round = n // 2
-                
-                for match_num in range(matches_per_round):
-                    home_idx = match_num
-                    away_idx = n - 1 - match_num
-                    
-                    home_id = player_ids[home_idx]
-                    away_id = player_ids[away_idx]
-                    
-                    if home_id is None or away_id is None:
-                        continue
-                    
-                    match = Match(
-                        tournament_id=tournament.id,
-                        round_number=round_num,
-                        player1_id=home_id,
-                        player2_id=away_id,
-                        status=MatchStatus.SCHEDULED,
-                        deadline_set=False
-                    )
-                    session.add(match)
-                
-                player_ids = [player_ids[0]] + [player_ids[-1]] + player_ids[1:-1]
-        
-        tournament.total_rounds = round_num
+        """
+        Генерация матчей с учётом количества встреч.
+        Порядок посева задаёт режим посева: сильнейший (слот 0) в первом туре
+        играет с последним, лидеры встречаются в последних турах.
+        """
+        player_ids = await SeedingService.rank_participants(session, tournament)
+        tournament.meetings_count = meetings_count
+        tournament.total_rounds = TournamentService.get_round_robin_rounds_count(
+            len(player_ids), meetings_count
+        )
+        
+        # Для больших турниров сохраняем только порядок посева,
+        # туры создаются при открытии (см. materialize_round)
+        if len(player_ids) >= config.LAZY_FIXTURES_MIN_PARTICIPANTS:
+            tournament.fixture_mode = FixtureMode.LAZY
+            tournament.seed_order = json.dumps(player_ids)
+            await session.commit()
+            return
+        
+        tournament.fixture_mode = FixtureMode.EAGER
+        for round_num in range(1, tournament.total_rounds + 1):
+            pairs = TournamentService.get_round_pairings(player_ids, round_num)
+            session.add_all([
+                Match(
+                    tournament_id=tournament.id,
+                    round_number=round_num,
+                    player1_id=home_id,
+                    player2_id=away_id,
+                    status=MatchStatus.SCHEDULED,
+                    deadline_set=False
+                )
+                for home_id, away_id in pairs
+            ])
+        
         await session.commit()
     
     @staticmethod
-    async def _generate_playoff_bracket(
-        session: AsyncSession,
-        tournament: Tournament,
-        participants: List[TournamentParticipant]
-    ):
-        """Генерация сетки плей-офф"""
-        import math
-        n = len(participants)
-        
-        # Ближайшая степень двойки
-        bracket_size = 2 ** math.ceil(math.log2(n))
+    def get_round_robin_rounds_count(players_count: int, meetings_count: int = 1) -> int:
+        """Количество туров круговой системы"""
+        n = players_count + players_count % 2
+        return (n - 1) * meetings_count
+    
+    @staticmethod
+    def get_round_pairings(player_ids: List[int], round_number: int) -> List[tuple]:
+        """
+        Пары тура круговой системы (метод кругов) за O(n) без генерации предыдущих туров.
+        Первый игрок неподвижен, остальные сдвигаются на одну позицию каждый тур.
+        Повторные встречи повторяют сетку первого круга.
+        """
+        slots = list(player_ids)
+        if len(slots) % 2 == 1:
+            slots.append(None)
+        n = len(slots)
+        if n < 2:
+            return []
         
-        # Перемешиваем участников
-        player_ids = [p.user_id for p in participants]
-        random.shuffle(player_ids)
+        shift = (round_number - 1) % (n - 1)
         
-        # Добавляем "bye" (пустые слоты)
-        while len(player_ids) < bracket_size:
-            player_ids.append(None)
+        def slot(position: int) -> Optional[int]:
+            if position == 0:
+                return slots[0]
+            return slots[1 + (position - 1 - shift) % (n - 1)]
         
-        # Генерация первого раунда
-        round_num = 1
         pairs = []
+        for match_num in range(n // 2):
+            home_id = slot(match_num)
+            away_id = slot(n - 1 - match_num)
+            if home_id is None or away_id is None:
+                continue
+            pairs.append((home_id, away_id))
+        return pairs
+    
+    @staticmethod
+    async def materialize_round(
+        session: AsyncSession,
+        tournament: Tournament,
+        round_number: int
+    ) -> int:
+        """
+        Создание матчей тура для турнира с ленивым расписанием.
+        Ничего не делает, если тур уже создан или расписание хранится целиком.
+        Возвращает количество созданных матчей (без commit).
+        """
+        if tournament.fixture_mode != FixtureMode.LAZY or not tournament.seed_order:
+            return 0
+        if round_number < 1 or round_number > tournament.total_rounds:
+            return 0
         
-        for i in range(0, len(player_ids), 2):
-            p1 = player_ids[i]
-            p2 = player_ids[i + 1] if i + 1 < len(player_ids) else None
-            
-            if p1 and p2:
-                match = Match(
-                    tournament_id=tournament.id,
-                    round_number=round_num,
-                    player1_id=p1,
-                    player2_id=p2,
-                    status=MatchStatus.SCHEDULED,
-                    deadline_set=False
-                )
-                session.add(match)
+        result = await session.execute(
+            select(Match.id).where(
+                Match.tournament_id == tournament.id,
+                Match.round_number == round_number
+            ).limit(1)
+        )
+        if result.first():
+            return 0
         
-        # Расчёт общего количества раундов
-        total_rounds = int(math.log2(bracket_size))
-        tournament.total_rounds = total_rounds
+        pairs = TournamentService.get_round_pairings(
+            json.loads(tournament.seed_order), round_number
+        )
+        session.add_all([
+            Match(
+                tournament_id=tournament.id,
+                round_number=round_number,
+                player1_id=home_id,
+                player2_id=away_id,
+                status=MatchStatus.SCHEDULED,
+                deadline_set=False
+            )
+            for home_id, away_id in pairs
+        ])
+        tournament.current_round = max(tournament.current_round or 0, round_number)
+        await session.flush()
+        return len(pairs)
+    
+    @staticmethod
+    async def _generate_playoff_bracket(
+        session: AsyncSession,
+        tournament: Tournament,
+        participants: List[TournamentParticipant]
+    ):
+        """
+        Генерация сетки плей-офф по посеву (1 - последний, 8 - 9 и т.д.;
+        свободные слоты достаются сильнейшим и проходят автоматически)
+        """
+        ranked = await SeedingService.rank_participants(session, tournament)
+        await PlayoffService.create_bracket(
+            session, tournament, SeedingService.bracket_positions(ranked)
+        )
         await session.commit()
     
+    @staticmethod
+    async def on_match_finished(session: AsyncSession, match: Match) -> int:
+        """
+        Продвижение турнира после подтверждения матча (без commit):
+        следующий тур плей-офф, жеребьёвка следующего тура швейцарской системы
+        или выход из групп в плей-офф. Возвращает количество созданных матчей.
+        """
+        await StandingsService.snapshot_if_round_complete(session, match)
+        
+        created = await PlayoffService.on_match_confirmed(session, match)
+        created += await GroupStageService.on_match_confirmed(session, match)
+        created += await SwissService.on_match_confirmed(session, match)
+        return created
+    
     @staticmethod
     async def get_tournament(session: AsyncSession, tournament_id: int) -> Optional[Tournament]:
-        """Получение турнира по ID"""
+        """Получение турнира по ID (удалённые не возвращаются)"""
         result = await session.execute(
-            select(Tournament).where(Tournament.id == tournament_id)
+            select(Tournament).where(
+                Tournament.id == tournament_id,
+                Tournament.deleted_at.is_(None)
+            )
         )
         return result.scalar_one_or_none()
     
@@ -206,7 +286,9 @@ class TournamentService:
     async def get_all_tournaments(session: AsyncSession) -> List[Tournament]:
         """Получение всех турниров"""
         result = await session.execute(
-            select(Tournament).order_by(Tournament.created_at.desc())
+            select(Tournament)
+            .where(Tournament.deleted_at.is_(None))
+            .order_by(Tournament.created_at.desc())
         )
         return result.scalars().all()
     
@@ -215,46 +297,114 @@ class TournamentService:
         """Получение активных турниров"""
         result = await session.execute(
             select(Tournament)
-            .where(Tournament.status.in_([TournamentStatus.REGISTRATION, TournamentStatus.ACTIVE]))
+            .where(
+                Tournament.status.in_([TournamentStatus.REGISTRATION, TournamentStatus.ACTIVE]),
+                Tournament.deleted_at.is_(None)
+            )
             .order_by(Tournament.created_at.desc())
         )
         return result.scalars().all()
     
+    @staticmethod
+    async def get_tournaments_page(
+        session: AsyncSession,
+        status: Optional[TournamentStatus] = None,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[list, bool, bool]:
+        """
+        Страница списка турниров (новые сверху) по ключу (created_at, id):
+        after_id - страница после этого турнира, before_id - страница перед ним.
+        Один запрос по индексу (status, created_at, id) или (created_at, id) с LIMIT -
+        стоимость не зависит от количества турниров.
+        Возвращает (строки id/name/status, есть предыдущая, есть следующая).
+        """
+        limit = limit or config.TOURNAMENTS_PAGE_SIZE
+        query = select(Tournament.id, Tournament.name, Tournament.status).where(
+            Tournament.deleted_at.is_(None)
+        )
+        if status is not None:
+            query = query.where(Tournament.status == status)
+        
+        cursor_id = after_id or before_id
+        if cursor_id:
+            cursor = (
+                select(Tournament.created_at)
+                .where(Tournament.id == cursor_id)
+                .scalar_subquery()
+            )
+            if after_id:
+                query = query.where(or_(
+                    Tournament.created_at < cursor,
+                    and_(Tournament.created_at == cursor, Tournament.id < cursor_id)
+                ))
+            else:
+                query = query.where(or_(
+                    Tournament.created_at > cursor,
+                    and_(Tournament.created_at == cursor, Tournament.id > cursor_id)
+                ))
+        
+        if before_id:
+            query = query.order_by(Tournament.created_at, Tournament.id)
+        else:
+            query = query.order_by(Tournament.created_at.desc(), Tournament.id.desc())
+        
+        result = await session.execute(query.limit(limit + 1))
+        rows = list(result.all())
+        more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if before_id:
+            rows.reverse()
+            return rows, more, True
+        return rows, after_id is not None, more
+    
     @staticmethod
     async def register_participant(
         session: AsyncSession,
         tournament_id: int,
         user_id: int
     ) -> bool:
-        """Регистрация участника на турнир"""
-        tournament = await TournamentService.get_tournament(session, tournament_id)
-        if not tournament or tournament.status != TournamentStatus.REGISTRATION or not tournament.registration_open:
-            return False
-        
-        if tournament.max_participants:
-            result = await session.execute(
-                select(TournamentParticipant)
-                .where(TournamentParticipant.tournament_id == tournament_id)
-            )
-            count = len(result.scalars().all())
-            if count >= tournament.max_participants:
-                return False
-        
+        """
+        Регистрация участника на турнир одной короткой транзакцией:
+        условный UPDATE счётчика (статус, открытая регистрация и лимит проверяются
+        в самом запросе) + вставка, защищённая уникальным ключом (tournament_id, user_id).
+        Одновременные нажатия не превышают max_participants и не создают дублей.
+        """
         result = await session.execute(
-            select(TournamentParticipant).where(
-                TournamentParticipant.tournament_id == tournament_id,
-                TournamentParticipant.user_id == user_id
+            update(Tournament)
+            .where(
+                Tournament.id == tournament_id,
+                Tournament.status == TournamentStatus.REGISTRATION,
+                Tournament.deleted_at.is_(None),
+                Tournament.registration_open == True,
+                or_(
+                    Tournament.max_participants.is_(None),
+                    Tournament.participants_count < Tournament.max_participants
+                )
             )
+            .values(participants_count=Tournament.participants_count + 1)
+            .execution_options(synchronize_session=False)
         )
-        if result.scalar_one_or_none():
+        if result.rowcount == 0:
+            await session.rollback()
             return False
         
-        participant = TournamentParticipant(
+        session.add(TournamentParticipant(
             tournament_id=tournament_id,
             user_id=user_id
-        )
-        session.add(participant)
-        await session.commit()
+        ))
+        with SummaryService.updating(tournament_id):
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Уже зарегистрирован - откат вместе с увеличением счётчика
+                await session.rollback()
+                return False
+            
+            StandingsService.invalidate(tournament_id)
+            SummaryService.on_registered(tournament_id, user_id)
         return True
     
     @staticmethod
@@ -287,7 +437,11 @@ class TournamentService:
                 started_at=datetime.utcnow()
             )
         )
+        
+        # Ленивое расписание: открываем первый тур
+        await TournamentService.materialize_round(session, tournament, 1)
         await session.commit()
+        SummaryService.invalidate(tournament_id)
         return True
     
     @staticmethod
@@ -306,50 +460,62 @@ class TournamentService:
             )
         )
         await session.commit()
+        StandingsService.invalidate(tournament_id)
+        SummaryService.invalidate(tournament_id)
+        DashboardService.invalidate_tournament(tournament_id)
         return True
     
     @staticmethod
     async def delete_tournament(session: AsyncSession, tournament_id: int) -> bool:
-        """Удаление турнира со всеми связанными данными"""
-        try:
-            await session.execute(
-                delete(Match).where(Match.tournament_id == tournament_id)
-            )
-            await session.execute(
-                delete(TournamentParticipant).where(
-                    TournamentParticipant.tournament_id == tournament_id
-                )
-            )
-            await session.execute(
-                delete(TournamentRecord).where(
-                    TournamentRecord.tournament_id == tournament_id
-                )
-            )
-            await session.execute(
-                delete(Tournament).where(Tournament.id == tournament_id)
+        """
+        Удаление турнира: турнир сразу скрывается одним коротким UPDATE,
+        связанные данные удаляет порциями фоновая очистка (PurgeService).
+        """
+        result = await session.execute(
+            update(Tournament)
+            .where(
+                Tournament.id == tournament_id,
+                Tournament.deleted_at.is_(None)
             )
-            
-            await session.commit()
-            return True
-        except Exception as e:
-            await session.rollback()
-            print(f"Error deleting tournament: {e}")
-            return False
+            .values(deleted_at=datetime.utcnow(), registration_open=False)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        StandingsService.invalidate(tournament_id)
+        SummaryService.invalidate(tournament_id)
+        DashboardService.invalidate_tournament(tournament_id)
+        return result.rowcount > 0
     
     @staticmethod
     async def get_tournament_table(session: AsyncSession, tournament_id: int) -> List[tuple]:
-        """Получение турнирной таблицы"""
+        """
+        Получение турнирной таблицы.
+        Обычные турниры - из таблицы в памяти (очки, личные встречи, разница, забитые);
+        швейцарская система - по очкам, Бухгольцу и Зоннеборну-Бергеру;
+        турниры в архиве - итоговая таблица одним запросом.
+        """
+        if await ArchiveService.is_archived(session, tournament_id):
+            return await ArchiveService.get_final_table(session, tournament_id)
+        
+        tournament = await session.get(Tournament, tournament_id)
+        if not tournament or tournament.format != TournamentFormat.SWISS:
+            return await StandingsService.get_table(session, tournament_id)
+        
         result = await session.execute(
             select(TournamentParticipant, User)
             .join(User, TournamentParticipant.user_id == User.id)
             .where(TournamentParticipant.tournament_id == tournament_id)
-            .order_by(
-                TournamentParticipant.points.desc(),
-                (TournamentParticipant.goals_for - TournamentParticipant.goals_against).desc(),
-                TournamentParticipant.goals_for.desc()
-            )
         )
-        return result.all()
+        table = result.all()
+        
+        tiebreaks = await SwissService.get_tiebreaks(session, tournament_id)
+        table.sort(key=lambda row: (
+            -row[0].points,
+            -tiebreaks.get(row[0].user_id, (0, 0))[0],
+            -tiebreaks.get(row[0].user_id, (0, 0))[1],
+            row[0].user_id
+        ))
+        return table
     
     @staticmethod
     async def format_tournament_table(table_data: List[tuple]) -> str:
@@ -391,11 +557,12 @@ class TournamentService:
         tournament_id: int
     ) -> List[tuple]:
         """Получение списка участников турнира"""
+        _, Participant = await ArchiveService.get_models(session, tournament_id)
         result = await session.execute(
-            select(TournamentParticipant, User)
-            .join(User, TournamentParticipant.user_id == User.id)
-            .where(TournamentParticipant.tournament_id == tournament_id)
-            .order_by(TournamentParticipant.registered_at)
+            select(Participant, User)
+            .join(User, Participant.user_id == User.id)
+            .where(Participant.tournament_id == tournament_id)
+            .order_by(Participant.registered_at)
         )
         return result.all()
     
@@ -408,7 +575,7 @@ class TournamentService:
         goals_for: int,
         goals_against: int
     ):
-        """Обновление статистики участника турнира"""
+        """Обновление статистики участника турнира (без commit - в транзакции подтверждения)"""
         result_participant = await session.execute(
             select(TournamentParticipant).where(
                 TournamentParticipant.tournament_id == tournament_id,
@@ -428,6 +595,4 @@ class TournamentService:
             participant.draws += 1
             participant.points += 1
         else:
-            participant.losses += 1
-        
-        await session.commit()
\ No newline at end of file
+            participant.losses += 1
\ No newline at end of file
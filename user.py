@@ -8,7 +8,7 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy import select
 
 from database.engine import async_session_maker
-from database.models import User, Tournament
+from database.models import User, Tournament, TournamentFormat, TournamentStatus
 
 from keyboards.user_kb import (
     get_main_menu,
@@ -20,6 +20,8 @@ from keyboards.user_kb import (
     get_records_keyboard,
     get_tournament_records_keyboard,
     get_search_cancel_keyboard,
+    get_table_rounds_keyboard,
+    get_schedule_keyboard,
     get_back_button
 )
 from keyboards.admin_kb import get_admin_main_menu
@@ -28,8 +30,14 @@ from services.tournament import TournamentService
 from services.rating import RatingService
 from services.records import RecordsService
 from services.schedule import ScheduleService
+from services.groups import GroupStageService
+from services.standings import StandingsService
+from services.summary import SummaryService
+from services.archive import ArchiveService
+from services.reachability import ReachabilityService
 
 from states.states import PlayerSearch
+from utils.helpers import parse_tournament_list_callback
 from config import config
 
 router = Router()
@@ -52,6 +60,9 @@ async def start_cmd(message: Message):
             )
             session.add(user)
             await session.commit()
+        elif ReachabilityService.reactivate(user):
+            # Вернулся после блокировки бота - снова получает уведомления
+            await session.commit()
 
         text = (
             f"👋 <b>{user.full_name}</b>\n\n"
@@ -80,43 +91,52 @@ async def main_menu(callback: CallbackQuery):
 # TOURNAMENTS
 # ======================================================
 
-@router.callback_query(F.data == "tournaments")
+@router.callback_query(F.data.regexp(r"^tournaments(_[a-z]+(_[np]\d+)?)?$"))
 async def tournaments(callback: CallbackQuery):
+    status_filter, after_id, before_id = parse_tournament_list_callback(
+        callback.data, "tournaments"
+    )
+    status = None if status_filter == "all" else TournamentStatus(status_filter)
+
     async with async_session_maker() as session:
-        tournaments = await TournamentService.get_all_tournaments(session)
+        tournaments, has_prev, has_next = await TournamentService.get_tournaments_page(
+            session, status, after_id, before_id
+        )
 
     text = "🏆 <b>Турниры</b>\n\n"
     text += "Выберите турнир:" if tournaments else "Турниров пока нет"
 
     await callback.message.edit_text(
         text,
-        reply_markup=get_tournaments_keyboard(tournaments),
+        reply_markup=get_tournaments_keyboard(tournaments, status_filter, has_prev, has_next),
         parse_mode="HTML"
     )
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("tournament_"))
+@router.callback_query(F.data.regexp(r"^tournament_\d+$"))
 async def tournament_detail(callback: CallbackQuery):
     tournament_id = int(callback.data.split("_")[1])
 
     async with async_session_maker() as session:
-        tournament = await TournamentService.get_tournament(session, tournament_id)
+        tournament = await SummaryService.get_summary(session, tournament_id)
         if not tournament:
             await callback.answer("Турнир не найден", show_alert=True)
             return
 
-        is_participant = await TournamentService.is_participant(
+        is_participant = await SummaryService.is_participant(
             session, tournament_id, callback.from_user.id
         )
 
-        participants = await TournamentService.get_participants(session, tournament_id)
-
     text = (
         f"🏆 <b>{tournament.name}</b>\n\n"
         f"{tournament.description or 'Нет описания'}\n\n"
-        f"👥 Участников: {len(participants)}"
+        f"👥 Участников: {tournament.participants_count}"
     )
+    if tournament.total_rounds:
+        text += f"\n🔄 Тур: {tournament.current_round} из {tournament.total_rounds}"
+    if tournament.matches_total:
+        text += f"\n⚽ Сыграно матчей: {tournament.matches_confirmed} из {tournament.matches_total}"
 
     await callback.message.edit_text(
         text,
@@ -152,15 +172,33 @@ async def register_tournament(callback: CallbackQuery):
 
 @router.callback_query(F.data.startswith("tournament_table_"))
 async def tournament_table(callback: CallbackQuery):
-    tid = int(callback.data.split("_")[2])
+    parts = callback.data.split("_")
+    tid = int(parts[2])
+    round_number = int(parts[3]) if len(parts) > 3 else 0
 
     async with async_session_maker() as session:
-        table = await TournamentService.get_tournament_table(session, tid)
-        text = await TournamentService.format_tournament_table(table)
+        tournament = await TournamentService.get_tournament(session, tid)
+        last_round = (tournament.last_snapshot_round or 0) if tournament else 0
+
+        if round_number:
+            rows = await StandingsService.get_round_snapshot(session, tid, round_number)
+            if not rows:
+                await callback.answer("Тур ещё не завершён", show_alert=True)
+                return
+            text = await StandingsService.format_round_table(rows, round_number)
+        elif tournament and tournament.format == TournamentFormat.GROUP_PLAYOFF and tournament.groups_count:
+            if tournament.archived_at:
+                tables = await ArchiveService.get_group_tables(session, tid)
+            else:
+                tables = await GroupStageService.get_group_tables(session, tid)
+            text = await GroupStageService.format_group_tables(tables, tournament.group_qualifiers)
+        else:
+            table = await TournamentService.get_tournament_table(session, tid)
+            text = await TournamentService.format_tournament_table(table)
 
     await callback.message.edit_text(
         text,
-        reply_markup=get_back_button(f"tournament_{tid}"),
+        reply_markup=get_table_rounds_keyboard(tid, round_number, last_round),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -168,19 +206,49 @@ async def tournament_table(callback: CallbackQuery):
 
 @router.callback_query(F.data.startswith("tournament_schedule_"))
 async def tournament_schedule(callback: CallbackQuery):
-    tid = int(callback.data.split("_")[2])
+    # tournament_schedule_{tid}[_{тур}_{часть}], по умолчанию - текущий тур
+    parts = callback.data.split("_")
+    tid = int(parts[2])
+    round_number = int(parts[3]) if len(parts) > 3 else 0
+    page = int(parts[4]) if len(parts) > 4 else 1
 
     async with async_session_maker() as session:
-        matches = await ScheduleService.get_tournament_matches(session, tid)
-        text = await ScheduleService.format_schedule(matches)
+        summary = await SummaryService.get_summary(session, tid)
+        if not summary:
+            await callback.answer("Турнир не найден", show_alert=True)
+            return
 
+        rounds = await ScheduleService.get_schedule_rounds(session, tid, summary.matches_total)
+        if not rounds:
+            await callback.message.edit_text(
+                "📅 <b>Расписание матчей</b>\n\nМатчей пока нет.",
+                reply_markup=get_back_button(f"tournament_{tid}"),
+                parse_mode="HTML"
+            )
+            await callback.answer()
+            return
+
+        if round_number not in rounds:
+            current = [r for r in rounds if r <= summary.current_round]
+            round_number = current[-1] if current else rounds[0]
+
+        pages = await ScheduleService.get_round_pages(
+            session, tid, round_number, summary.matches_total
+        )
+
+    page = min(max(page, 1), len(pages))
     await callback.message.edit_text(
-        text,
-        reply_markup=get_back_button(f"tournament_{tid}"),
+        pages[page - 1],
+        reply_markup=get_schedule_keyboard(tid, rounds, round_number, page, len(pages)),
         parse_mode="HTML"
     )
     await callback.answer()
 
+
+@router.callback_query(F.data == "schedule_noop")
+async def schedule_noop(callback: CallbackQuery):
+    await callback.answer()
+
 # ======================================================
 # RATING
 # ======================================================
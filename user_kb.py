@@ -3,19 +3,21 @@ T-League Bot - Клавиатуры пользователя
 """
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from database.models import MatchStatus
 from config import config
 
 def get_main_menu() -> InlineKeyboardMarkup:
     """Главное меню пользователя (inline)"""
     kb = InlineKeyboardBuilder()
     kb.button(text="🏆 Турниры", callback_data="tournaments")
+    kb.button(text="⚔️ Мои матчи", callback_data="my_matches")
     kb.button(text="📊 Рейтинг игроков", callback_data="rating")
     kb.button(text="🛒 Маркетплейс", callback_data="marketplace")
     kb.button(text="🔍 Поиск игрока", callback_data="search_player")
     kb.button(text="🏅 Рекорды", callback_data="records_menu")
     kb.button(text="👤 Мой профиль", callback_data="my_profile")
     kb.button(text="ℹ️ О проекте", callback_data="about_project")
-    kb.adjust(2, 1, 2, 2)
+    kb.adjust(2, 2, 2, 2)
     return kb.as_markup()
 
 def get_about_project_keyboard() -> InlineKeyboardMarkup:
@@ -29,8 +31,50 @@ def get_about_project_keyboard() -> InlineKeyboardMarkup:
     kb.adjust(2, 2, 1)
     return kb.as_markup()
 
-def get_tournaments_keyboard(tournaments: list) -> InlineKeyboardMarkup:
-    """Клавиатура списка турниров"""
+# Вкладки списка турниров: фильтр -> подпись
+TOURNAMENT_TABS = {
+    "all": "📋 Все",
+    "registration": "🟡 Рег.",
+    "active": "🟢 Идут",
+    "finished": "🔴 Архив",
+}
+
+def add_tournament_list_navigation(
+    kb: InlineKeyboardBuilder,
+    prefix: str,
+    status_filter: str,
+    tournaments: list,
+    has_prev: bool,
+    has_next: bool
+) -> list:
+    """
+    Вкладки статусов и листание страниц списка турниров.
+    Страницы адресуются id крайнего турнира: {prefix}_{фильтр}_p{id} / _n{id}.
+    Возвращает размеры добавленных рядов для kb.adjust.
+    """
+    for status, label in TOURNAMENT_TABS.items():
+        text = f"• {label}" if status == status_filter else label
+        kb.button(text=text, callback_data=f"{prefix}_{status}")
+    sizes = [len(TOURNAMENT_TABS)]
+    
+    nav = 0
+    if has_prev and tournaments:
+        kb.button(text="◀️", callback_data=f"{prefix}_{status_filter}_p{tournaments[0].id}")
+        nav += 1
+    if has_next and tournaments:
+        kb.button(text="▶️", callback_data=f"{prefix}_{status_filter}_n{tournaments[-1].id}")
+        nav += 1
+    if nav:
+        sizes.append(nav)
+    return sizes
+
+def get_tournaments_keyboard(
+    tournaments: list,
+    status_filter: str = "all",
+    has_prev: bool = False,
+    has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """Клавиатура списка турниров (одна страница)"""
     kb = InlineKeyboardBuilder()
     
     for tournament in tournaments:
@@ -43,9 +87,13 @@ def get_tournaments_keyboard(tournaments: list) -> InlineKeyboardMarkup:
     if not tournaments:
         kb.button(text="Турниров пока нет", callback_data="no_action")
     
-    kb.button(text="🔄 Обновить", callback_data="tournaments")
+    sizes = add_tournament_list_navigation(
+        kb, "tournaments", status_filter, tournaments, has_prev, has_next
+    )
+    
+    kb.button(text="🔄 Обновить", callback_data=f"tournaments_{status_filter}")
     kb.button(text="◀️ В главное меню", callback_data="main_menu")
-    kb.adjust(1)
+    kb.adjust(*([1] * max(len(tournaments), 1)), *sizes, 1, 1)
     return kb.as_markup()
 
 def get_tournament_detail_keyboard(tournament_id: int, is_participant: bool, registration_open: bool, status: str) -> InlineKeyboardMarkup:
@@ -141,6 +189,108 @@ def get_round_selection_keyboard(tournament_id: int, rounds: list) -> InlineKeyb
     kb.adjust(2)
     return kb.as_markup()
 
+def get_my_matches_keyboard(rows: list) -> InlineKeyboardMarkup:
+    """Кнопки внесения результата для матчей 'Мои матчи' (только ещё не внесённые)"""
+    kb = InlineKeyboardBuilder()
+
+    for number, row in enumerate(rows, 1):
+        if row.status != MatchStatus.SCHEDULED:
+            continue
+        opponent = f"@{row.opponent_username}" if row.opponent_username else row.opponent_full_name
+        kb.button(
+            text=f"📝 {number}. Результат vs {opponent}",
+            callback_data=f"report_open_{row.id}"
+        )
+
+    kb.button(text="◀️ В главное меню", callback_data="main_menu")
+    kb.adjust(1)
+    return kb.as_markup()
+
+def get_table_rounds_keyboard(tournament_id: int, round_number: int, last_round: int) -> InlineKeyboardMarkup:
+    """
+    Навигация по таблицам после туров.
+    round_number = 0 - текущая таблица, last_round - последний сохранённый тур.
+    """
+    kb = InlineKeyboardBuilder()
+    buttons = 0
+
+    if round_number == 0:
+        if last_round:
+            kb.button(
+                text=f"🕓 После тура {last_round}",
+                callback_data=f"tournament_table_{tournament_id}_{last_round}"
+            )
+            buttons += 1
+    else:
+        if round_number > 1:
+            kb.button(
+                text=f"◀️ Тур {round_number - 1}",
+                callback_data=f"tournament_table_{tournament_id}_{round_number - 1}"
+            )
+            buttons += 1
+        if round_number < last_round:
+            kb.button(
+                text=f"Тур {round_number + 1} ▶️",
+                callback_data=f"tournament_table_{tournament_id}_{round_number + 1}"
+            )
+            buttons += 1
+        kb.button(text="📊 Текущая", callback_data=f"tournament_table_{tournament_id}")
+        buttons += 1
+
+    kb.button(text="◀️ Назад", callback_data=f"tournament_{tournament_id}")
+    kb.adjust(*([2] * (buttons // 2) + [1] * (buttons % 2)), 1)
+    return kb.as_markup()
+
+def get_schedule_keyboard(
+    tournament_id: int,
+    rounds: list,
+    round_number: int,
+    page: int,
+    pages: int
+) -> InlineKeyboardMarkup:
+    """
+    Расписание по турам: части длинного тура, выбор тура (окно из 5 туров
+    вокруг текущего, крайние туры - стрелками) и кнопка 'Назад'.
+    Открытые тур и часть ведут на schedule_noop (повторное редактирование
+    тем же текстом Telegram отклоняет).
+    """
+    kb = InlineKeyboardBuilder()
+    sizes = []
+
+    def callback(round_num: int, page_num: int = 1) -> str:
+        return f"tournament_schedule_{tournament_id}_{round_num}_{page_num}"
+
+    if pages > 1:
+        if page > 1:
+            kb.button(text=f"⬅️ Часть {page - 1}", callback_data=callback(round_number, page - 1))
+        kb.button(text=f"📄 {page}/{pages}", callback_data="schedule_noop")
+        if page < pages:
+            kb.button(text=f"Часть {page + 1} ➡️", callback_data=callback(round_number, page + 1))
+        sizes.append(1 + (page > 1) + (page < pages))
+
+    if len(rounds) > 1:
+        index = rounds.index(round_number) if round_number in rounds else 0
+        start = max(0, min(index - 2, len(rounds) - 5))
+        window = rounds[start:start + 5]
+        row = 0
+        if start > 0:
+            kb.button(text="⏮", callback_data=callback(rounds[0]))
+            row += 1
+        for round_num in window:
+            if round_num == round_number:
+                kb.button(text=f"· {round_num} ·", callback_data="schedule_noop")
+            else:
+                kb.button(text=str(round_num), callback_data=callback(round_num))
+            row += 1
+        if start + len(window) < len(rounds):
+            kb.button(text="⏭", callback_data=callback(rounds[-1]))
+            row += 1
+        sizes.append(row)
+
+    kb.button(text="◀️ Назад", callback_data=f"tournament_{tournament_id}")
+    kb.adjust(*sizes, 1)
+    return kb.as_markup()
+
 def get_search_cancel_keyboard() -> InlineKeyboardMarkup:
     """Кнопка отмены поиска"""
     kb = InlineKeyboardBuilder()